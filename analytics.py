@@ -0,0 +1,259 @@
+"""
+Columnar analytics over vehicle prices, mileage and sale values.
+
+Numeric columns are read straight from SQLite into ``array.array('d')``
+buffers (or NumPy arrays when NumPy is installed) instead of lists of
+dicts, and the statistics run over whole columns at once. NumPy is
+optional: every function has a pure standard library path that gives the
+same results.
+
+Usage (from the project root):
+    python -m scripts.benchmark_analytics --vehicles 1000000
+"""
+
+import math
+import operator
+import os
+import sqlite3
+from array import array
+from typing import Dict, List, Sequence
+from urllib.parse import quote
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+HAS_NUMPY = numpy is not None
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Columns that may be loaded, per table (also guards the generated SQL)
+NUMERIC_COLUMNS = {
+    'vehicles': ('id', 'year', 'price', 'mileage'),
+    'sales': ('id', 'customer_id', 'vehicle_id', 'sale_price'),
+}
+
+def _use_numpy(use_numpy) -> bool:
+    if use_numpy is None:
+        return HAS_NUMPY
+    if use_numpy and not HAS_NUMPY:
+        raise RuntimeError("NumPy não está instalado")
+    return bool(use_numpy)
+
+def load_columns(db_path: str, table: str, columns: Sequence[str], where: str = None,
+                 params: Sequence = (), use_numpy: bool = None) -> Dict[str, object]:
+    """Load numeric columns of ``table`` as {column: array}.
+    
+    Rows with a NULL in any requested column are skipped so the arrays stay
+    aligned. ``where`` is an extra SQL condition over the table's columns.
+    Returns NumPy float64 arrays when ``use_numpy`` (default: when NumPy is
+    installed), otherwise ``array('d')``.
+    """
+    unknown = [column for column in columns if column not in NUMERIC_COLUMNS.get(table, ())]
+    if unknown:
+        raise ValueError(f"colunas não numéricas ou desconhecidas: {', '.join(unknown)}")
+    
+    conditions = [f'{column} IS NOT NULL' for column in columns]
+    if where:
+        conditions.append(f'({where})')
+    conn = sqlite3.connect(f'file:{quote(os.path.abspath(db_path))}?mode=ro', uri=True)
+    try:
+        rows = conn.execute(f'''
+            SELECT {', '.join(columns)} FROM {table}
+            WHERE {' AND '.join(conditions)}
+        ''', params).fetchall()
+    finally:
+        conn.close()
+    return _to_columns(rows, columns, _use_numpy(use_numpy))
+
+def _sales_source(include_archive: bool) -> str:
+    """FROM source for sales, with the archived sales merged in by include_archive"""
+    if not include_archive:
+        return 'sales'
+    return '''(SELECT vehicle_id, sale_price FROM sales
+                   UNION ALL
+                   SELECT vehicle_id, sale_price FROM sales_archive)'''
+
+def load_sales_with_list_price(db_path: str, use_numpy: bool = None,
+                               include_archive: bool = True) -> Dict[str, object]:
+    """sale_price and the vehicle's list price for every sale, as aligned columns.
+    
+    The vehicle may be in either vehicle table (it is archived once sold
+    long enough, or when deleted); include_archive adds the archived sales.
+    """
+    conn = sqlite3.connect(f'file:{quote(os.path.abspath(db_path))}?mode=ro', uri=True)
+    try:
+        rows = conn.execute(f'''
+            SELECT sale_price, price, year, mileage FROM (
+                SELECT s.sale_price, COALESCE(v.price, va.price) AS price,
+                       COALESCE(v.year, va.year) AS year, COALESCE(v.mileage, va.mileage) AS mileage
+                FROM {_sales_source(include_archive)} s
+                LEFT JOIN vehicles v ON s.vehicle_id = v.id
+                LEFT JOIN vehicles_archive va ON s.vehicle_id = va.id
+                WHERE s.sale_price IS NOT NULL AND (v.id IS NOT NULL OR va.id IS NOT NULL)
+            )
+            WHERE price > 0 AND mileage IS NOT NULL
+        ''').fetchall()
+    finally:
+        conn.close()
+    return _to_columns(rows, ('sale_price', 'price', 'year', 'mileage'), _use_numpy(use_numpy))
+
+def _to_columns(rows: List[tuple], columns: Sequence[str], use_numpy: bool) -> Dict[str, object]:
+    if use_numpy:
+        matrix = numpy.array(rows, dtype=numpy.float64).reshape(len(rows), len(columns))
+        return {column: matrix[:, i].copy() for i, column in enumerate(columns)}
+    if not rows:
+        return {column: array('d') for column in columns}
+    return {column: array('d', values) for column, values in zip(columns, zip(*rows))}
+
+def _is_numpy(values) -> bool:
+    return HAS_NUMPY and isinstance(values, numpy.ndarray)
+
+def total(values) -> float:
+    if _is_numpy(values):
+        return float(values.sum())
+    return math.fsum(values)
+
+def mean(values) -> float:
+    if len(values) == 0:
+        return math.nan
+    if _is_numpy(values):
+        return float(values.mean())
+    return total(values) / len(values)
+
+def percentiles(values, qs: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[float, float]:
+    """Percentiles with linear interpolation (NumPy's default method)"""
+    if len(values) == 0:
+        return {q: math.nan for q in qs}
+    if _is_numpy(values):
+        return dict(zip(qs, (float(p) for p in numpy.percentile(values, qs))))
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    result = {}
+    for q in qs:
+        position = last * q / 100
+        low = math.floor(position)
+        high = min(low + 1, last)
+        result[q] = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+    return result
+
+def histogram(values, bins: int = 20, value_range=None) -> Dict[str, List]:
+    """Equal-width histogram; returns ``counts`` and the ``edges`` of each bin"""
+    if len(values) == 0:
+        return {'counts': [0] * bins, 'edges': [0.0] * (bins + 1)}
+    low, high = value_range or (min(values), max(values))
+    if high == low:
+        high = low + 1
+    if _is_numpy(values):
+        counts, edges = numpy.histogram(values, bins=bins, range=(low, high))
+        return {'counts': counts.tolist(), 'edges': edges.tolist()}
+    
+    width = (high - low) / bins
+    counts = [0] * bins
+    last = bins - 1
+    for value in values:
+        if low <= value <= high:
+            index = int((value - low) / width)
+            counts[index if index < last else last] += 1
+    return {'counts': counts, 'edges': [low + width * i for i in range(bins + 1)]}
+
+def linear_fit(x, y) -> Dict[str, float]:
+    """Least-squares line y = intercept + slope * x"""
+    n = len(x)
+    if n < 2:
+        return {'slope': math.nan, 'intercept': math.nan}
+    if _is_numpy(x):
+        x_mean, y_mean = x.mean(), y.mean()
+        dx = x - x_mean
+        variance = float(dx @ dx)
+        slope = float(dx @ (y - y_mean)) / variance if variance else math.nan
+        return {'slope': slope, 'intercept': float(y_mean) - slope * float(x_mean)}
+    
+    x_mean, y_mean = math.fsum(x) / n, math.fsum(y) / n
+    sxx = math.fsum(map(operator.mul, x, x)) - n * x_mean * x_mean
+    sxy = math.fsum(map(operator.mul, x, y)) - n * x_mean * y_mean
+    slope = sxy / sxx if sxx else math.nan
+    return {'slope': slope, 'intercept': y_mean - slope * x_mean}
+
+def group_means(keys, values) -> Dict[float, Dict]:
+    """Mean of ``values`` per distinct key: {key: {'count', 'mean'}}"""
+    if _is_numpy(keys):
+        unique, inverse = numpy.unique(keys, return_inverse=True)
+        counts = numpy.bincount(inverse)
+        sums = numpy.bincount(inverse, weights=values)
+        return {float(key): {'count': int(count), 'mean': float(value_sum / count)}
+                for key, count, value_sum in zip(unique, counts, sums)}
+    
+    sums = {}
+    counts = {}
+    for key, value in zip(keys, values):
+        sums[key] = sums.get(key, 0.0) + value
+        counts[key] = counts.get(key, 0) + 1
+    return {key: {'count': counts[key], 'mean': sums[key] / counts[key]} for key in sorted(sums)}
+
+# Reports
+def price_distribution(db_path: str, status: str = None, qs: Sequence[float] = DEFAULT_PERCENTILES,
+                       bins: int = 20, use_numpy: bool = None) -> Dict:
+    """Percentiles, mean and histogram of vehicle list prices"""
+    where, params = ('status = ?', (status,)) if status else (None, ())
+    prices = load_columns(db_path, 'vehicles', ('price',), where, params, use_numpy)['price']
+    return {
+        'count': len(prices),
+        'mean': mean(prices),
+        'percentiles': percentiles(prices, qs),
+        'histogram': histogram(prices, bins),
+    }
+
+def depreciation(db_path: str, mileage_band: int = 10000, use_numpy: bool = None) -> Dict:
+    """How list prices fall with age and mileage.
+    
+    Returns the mean price per model year and per mileage band, and the
+    least-squares price change per year of age and per 1,000 km.
+    """
+    columns = load_columns(db_path, 'vehicles', ('year', 'mileage', 'price'), use_numpy=use_numpy)
+    years, mileage, prices = columns['year'], columns['mileage'], columns['price']
+    if _is_numpy(mileage):
+        bands = numpy.floor_divide(mileage, mileage_band) * mileage_band
+    else:
+        bands = array('d', (value // mileage_band * mileage_band for value in mileage))
+    
+    return {
+        'by_year': {int(year): stats for year, stats in group_means(years, prices).items()},
+        'by_mileage_band': {int(band): stats for band, stats in group_means(bands, prices).items()},
+        'per_year': linear_fit(years, prices)['slope'],
+        'per_1000_km': linear_fit(mileage, prices)['slope'] * 1000,
+    }
+
+def discount_analysis(db_path: str, qs: Sequence[float] = DEFAULT_PERCENTILES, bins: int = 20,
+                      use_numpy: bool = None, include_archive: bool = True) -> Dict:
+    """Discount of sale_price against the vehicle's list price (0.05 = 5% below list)"""
+    columns = load_sales_with_list_price(db_path, use_numpy, include_archive)
+    sale_prices, list_prices = columns['sale_price'], columns['price']
+    if _is_numpy(sale_prices):
+        discounts = 1.0 - sale_prices / list_prices
+    else:
+        discounts = array('d', (1.0 - sale / price for sale, price in zip(sale_prices, list_prices)))
+    
+    return {
+        'count': len(discounts),
+        'mean_discount': mean(discounts),
+        'total_list_value': total(list_prices),
+        'total_sale_value': total(sale_prices),
+        'percentiles': percentiles(discounts, qs),
+        'histogram': histogram(discounts, bins),
+    }
+
+def sale_value_histogram(db_path: str, bins: int = 20, use_numpy: bool = None,
+                         include_archive: bool = True) -> Dict:
+    """Histogram of sale values, archived sales included by default"""
+    conn = sqlite3.connect(f'file:{quote(os.path.abspath(db_path))}?mode=ro', uri=True)
+    try:
+        rows = conn.execute(f'''
+            SELECT sale_price FROM {_sales_source(include_archive)} s
+            WHERE sale_price IS NOT NULL
+        ''').fetchall()
+    finally:
+        conn.close()
+    sale_prices = _to_columns(rows, ('sale_price',), _use_numpy(use_numpy))['sale_price']
+    return histogram(sale_prices, bins)
@@ -0,0 +1,138 @@
+"""
+Archival of sold vehicles and old sales.
+
+Rows are moved from the hot tables (vehicles, sales) to vehicles_archive
+and sales_archive in the same database. Inventory screens and searches
+only read the hot tables, which stay small; history queries add the
+archive when asked (``include_archive=True``). A sale is copied to the
+archive before it is deleted, which tells the customer_stats triggers
+that its lifetime figures must not change.
+
+Usage (from the project root):
+    python main.py archive --months 24                # archive once
+    python main.py archive --months 24 --every 24     # every 24 hours
+    python main.py archive --report                   # table sizes only
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from contention import retry_on_busy
+from scheduling import PeriodicTask
+from scripts.create_database import ARCHIVE_TABLES
+
+DEFAULT_MONTHS = 24
+
+# Rows moved per transaction, so writers are never blocked for long
+DEFAULT_BATCH_SIZE = 5000
+
+def months_ago(months: int, now: datetime = None) -> str:
+    """Timestamp ``months`` calendar months before now, in SQLite's text format"""
+    now = now or datetime.now()
+    month_index = now.year * 12 + now.month - 1 - months
+    year, month = divmod(month_index, 12)
+    day = min(now.day, 28)
+    return now.replace(year=year, month=month + 1, day=day).strftime('%Y-%m-%d %H:%M:%S')
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> List[str]:
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [row[1] for row in cursor.fetchall()]
+
+def move_to_archive(cursor: sqlite3.Cursor, table: str, ids: List[int], reason: str,
+                    archived_at: str = None) -> int:
+    """Copy rows to table's archive and delete them from table; returns rows moved.
+    
+    Runs on the caller's cursor so the move is part of the caller's transaction.
+    """
+    if not ids:
+        return 0
+    archive = ARCHIVE_TABLES[table]
+    columns = ', '.join(_columns(cursor, table))
+    archived_at = archived_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    placeholders = ', '.join('?' * len(ids))
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO {archive} ({columns}, archived_at, archive_reason)
+        SELECT {columns}, ?, ? FROM {table} WHERE id IN ({placeholders})
+    ''', [archived_at, reason] + list(ids))
+    cursor.execute(f'DELETE FROM {table} WHERE id IN ({placeholders})', ids)
+    return cursor.rowcount
+
+@retry_on_busy
+def _archive_batch(db, table: str, sql: str, reason: str, cutoff: str, batch_size: int) -> Tuple[int, int]:
+    """Move one batch of the rows ``sql`` selects in one transaction; returns (rows selected, rows moved)"""
+    with db.write_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, (cutoff, batch_size))
+        ids = [row[0] for row in cursor.fetchall()]
+        return len(ids), move_to_archive(cursor, table, ids, reason)
+
+def archive_old_records(db, months: int = DEFAULT_MONTHS, batch_size: int = DEFAULT_BATCH_SIZE,
+                        now: datetime = None) -> Dict[str, int]:
+    """Archive sales older than ``months`` and sold vehicles with no remaining hot sales.
+    
+    A sold vehicle is archived once it was registered before the cutoff
+    and none of its sales are left in the hot table. Returns the number of
+    rows moved per table.
+    """
+    cutoff = months_ago(months, now)
+    moved = {'sales': 0, 'vehicles': 0}
+    queries = {
+        'sales': ('SELECT id FROM sales WHERE sale_date < ? ORDER BY sale_date LIMIT ?', 'age'),
+        'vehicles': ('''
+            SELECT v.id FROM vehicles v
+            WHERE v.status = 'Sold' AND v.created_at < ?
+              AND NOT EXISTS (SELECT 1 FROM sales s WHERE s.vehicle_id = v.id)
+            LIMIT ?
+        ''', 'sold'),
+    }
+    # Sales first: a vehicle only becomes archivable once its sales have left
+    for table in ('sales', 'vehicles'):
+        sql, reason = queries[table]
+        while True:
+            selected, count = _archive_batch(db, table, sql, reason, cutoff, batch_size)
+            moved[table] += count
+            if selected < batch_size:
+                break
+    return moved
+
+@retry_on_busy
+def table_sizes(db) -> Dict[str, Dict]:
+    """Rows and bytes (tables plus their indexes) of the hot and archive tables"""
+    tables = list(ARCHIVE_TABLES) + list(ARCHIVE_TABLES.values())
+    # One snapshot: a batch being archived is counted in the hot or the archive table, never both
+    with db.read_transaction() as conn:
+        cursor = conn.cursor()
+        sizes = {}
+        for table in tables:
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            rows = cursor.fetchone()[0]
+            try:
+                cursor.execute('''
+                    SELECT SUM(pgsize) FROM dbstat
+                    WHERE name = ? OR name IN (SELECT name FROM sqlite_master
+                                               WHERE type = 'index' AND tbl_name = ?)
+                ''', (table, table))
+                size = cursor.fetchone()[0] or 0
+            except sqlite3.OperationalError:
+                # SQLite built without the dbstat table
+                size = None
+            sizes[table] = {'rows': rows, 'bytes': size}
+    return sizes
+
+class ArchiveScheduler(PeriodicTask):
+    """Archive old records every ``interval_hours``"""
+    
+    def __init__(self, db, months: int = DEFAULT_MONTHS, interval_hours: float = 24,
+                 on_archive=None, on_error=None):
+        self.db = db
+        self.months = months
+        self.on_archive = on_archive
+        super().__init__(interval_hours * 3600, self.archive, name='archive-scheduler',
+                         on_error=on_error, run_immediately=True)
+    
+    def archive(self) -> Dict[str, int]:
+        moved = archive_old_records(self.db, self.months)
+        if self.on_archive:
+            self.on_archive(moved)
+        return moved
@@ -0,0 +1,286 @@
+"""
+Online backup, snapshots and restore for the dealership database.
+
+Backups use ``sqlite3.Connection.backup()`` a few pages at a time, so the
+source database is only locked for the duration of each small step and
+writers are never blocked for long. Snapshots are verified with
+``PRAGMA integrity_check``, optionally gzip-compressed and described by a
+JSON manifest (checksum, size, timestamp) stored next to them.
+
+Usage (from the project root):
+    python main.py backup                 # one snapshot in data/backups
+    python main.py backup --every 60      # snapshot every 60 minutes
+    python main.py snapshots              # list snapshots
+    python main.py verify <snapshot>
+    python main.py restore <snapshot>
+    python main.py restore --at "2026-10-19 18:00"
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote
+
+from scheduling import PeriodicTask
+from settings import DATA_DIR
+
+DEFAULT_BACKUP_DIR = os.path.join(DATA_DIR, 'backups')
+
+# Pages copied per backup step; small steps keep each source lock short
+DEFAULT_PAGES_PER_STEP = 256
+
+# Pause between steps so writers can take the lock
+DEFAULT_STEP_SLEEP = 0.005
+
+TIMESTAMP_FORMAT = '%Y%m%d-%H%M%S'
+MANIFEST_SUFFIX = '.json'
+
+class BackupError(Exception):
+    """Raised when a backup, verification or restore fails"""
+
+class _TooManyRestarts(Exception):
+    pass
+
+def backup_database(src_path: str, dest_path: str, pages: int = DEFAULT_PAGES_PER_STEP,
+                    step_sleep: float = DEFAULT_STEP_SLEEP, max_restarts: int = 3,
+                    progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """Copy a live database to dest_path with the online backup API.
+    
+    In WAL mode the copy reads from one snapshot held for the whole backup,
+    so writers are never blocked. In rollback-journal mode the source is
+    only locked during each step, but a write by another connection makes
+    SQLite restart the copy; after ``max_restarts`` restarts the remaining
+    attempt copies everything in a single step.
+    
+    ``progress(copied_pages, total_pages)`` is called after every step.
+    Returns statistics: pages, bytes, seconds and restarts.
+    """
+    start = time.perf_counter()
+    src = sqlite3.connect(src_path, isolation_level=None)
+    dest = sqlite3.connect(dest_path)
+    try:
+        total_pages = 0
+        copied = 0
+        restarts = 0
+        
+        def on_step(status, remaining, total):
+            nonlocal total_pages, copied, restarts
+            total_pages = total
+            if total - remaining < copied:
+                restarts += 1
+                if restarts > max_restarts:
+                    raise _TooManyRestarts()
+            copied = total - remaining
+            if progress:
+                progress(copied, total)
+            if step_sleep and remaining:
+                time.sleep(step_sleep)
+        
+        wal = src.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        if wal:
+            # Pin a read snapshot: writers keep going and the copy never restarts
+            src.execute('BEGIN')
+            src.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        try:
+            src.backup(dest, pages=pages, progress=on_step)
+        except _TooManyRestarts:
+            src.backup(dest, pages=-1)
+        finally:
+            if wal:
+                src.execute('COMMIT')
+        
+        page_size = dest.execute('PRAGMA page_size').fetchone()[0]
+        total_pages = dest.execute('PRAGMA page_count').fetchone()[0]
+    finally:
+        dest.close()
+        src.close()
+    
+    return {
+        'pages': total_pages,
+        'bytes': total_pages * page_size,
+        'seconds': time.perf_counter() - start,
+        'restarts': restarts,
+    }
+
+def check_integrity(db_path: str) -> List[str]:
+    """Run PRAGMA integrity_check; returns the problems found (empty if healthy)"""
+    conn = sqlite3.connect(f'file:{quote(os.path.abspath(db_path))}?mode=ro', uri=True)
+    try:
+        rows = [row[0] for row in conn.execute('PRAGMA integrity_check').fetchall()]
+    finally:
+        conn.close()
+    return [] if rows == ['ok'] else rows
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _manifest_path(snapshot_path: str) -> str:
+    return snapshot_path + MANIFEST_SUFFIX
+
+def create_snapshot(db_path: str, backup_dir: str = DEFAULT_BACKUP_DIR, compress: bool = True,
+                    pages: int = DEFAULT_PAGES_PER_STEP,
+                    progress: Optional[Callable[[int, int], None]] = None) -> str:
+    """Take a verified snapshot of db_path into backup_dir; returns its path"""
+    os.makedirs(backup_dir, exist_ok=True)
+    created_at = datetime.now()
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    name = f"{stem}-{created_at.strftime(TIMESTAMP_FORMAT)}.db"
+    snapshot_path = os.path.join(backup_dir, name + ('.gz' if compress else ''))
+    suffix = 1
+    while os.path.exists(snapshot_path):
+        # Several snapshots within the same second
+        snapshot_path = os.path.join(backup_dir, f"{name[:-3]}-{suffix}.db" + ('.gz' if compress else ''))
+        suffix += 1
+    
+    fd, tmp_path = tempfile.mkstemp(suffix='.db', dir=backup_dir)
+    os.close(fd)
+    try:
+        stats = backup_database(db_path, tmp_path, pages=pages, progress=progress)
+        problems = check_integrity(tmp_path)
+        if problems:
+            raise BackupError(f"snapshot failed integrity check: {problems[:5]}")
+        
+        if compress:
+            with open(tmp_path, 'rb') as src, gzip.open(snapshot_path, 'wb', compresslevel=6) as dest:
+                shutil.copyfileobj(src, dest, 1024 * 1024)
+        else:
+            shutil.copyfile(tmp_path, snapshot_path)
+    finally:
+        os.remove(tmp_path)
+    
+    manifest = {
+        'snapshot': os.path.basename(snapshot_path),
+        'source': os.path.abspath(db_path),
+        'created_at': created_at.isoformat(timespec='seconds'),
+        'compressed': compress,
+        'database_bytes': stats['bytes'],
+        'snapshot_bytes': os.path.getsize(snapshot_path),
+        'sha256': _sha256(snapshot_path),
+        'backup_seconds': round(stats['seconds'], 3),
+    }
+    with open(_manifest_path(snapshot_path), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return snapshot_path
+
+def list_snapshots(backup_dir: str = DEFAULT_BACKUP_DIR) -> List[Dict]:
+    """Snapshots in backup_dir (oldest first), each with its manifest and path"""
+    if not os.path.isdir(backup_dir):
+        return []
+    snapshots = []
+    for name in os.listdir(backup_dir):
+        if not name.endswith(MANIFEST_SUFFIX):
+            continue
+        with open(os.path.join(backup_dir, name), encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest['path'] = os.path.join(backup_dir, manifest['snapshot'])
+        if os.path.exists(manifest['path']):
+            snapshots.append(manifest)
+    snapshots.sort(key=lambda manifest: manifest['created_at'])
+    return snapshots
+
+def prune_snapshots(backup_dir: str = DEFAULT_BACKUP_DIR, keep: int = 7) -> List[str]:
+    """Delete all but the newest ``keep`` snapshots; returns the deleted paths"""
+    snapshots = list_snapshots(backup_dir)
+    expired = snapshots[:-keep] if keep > 0 else snapshots
+    for manifest in expired:
+        os.remove(manifest['path'])
+        os.remove(_manifest_path(manifest['path']))
+    return [manifest['path'] for manifest in expired]
+
+def _extract(snapshot_path: str, dest_path: str):
+    if snapshot_path.endswith('.gz'):
+        with gzip.open(snapshot_path, 'rb') as src, open(dest_path, 'wb') as dest:
+            shutil.copyfileobj(src, dest, 1024 * 1024)
+    else:
+        shutil.copyfile(snapshot_path, dest_path)
+
+def verify_snapshot(snapshot_path: str) -> List[str]:
+    """Check a snapshot's checksum and integrity; returns the problems found"""
+    manifest_path = _manifest_path(snapshot_path)
+    if not os.path.exists(snapshot_path):
+        return [f"arquivo não encontrado: {snapshot_path}"]
+    
+    problems = []
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if _sha256(snapshot_path) != manifest['sha256']:
+            problems.append("checksum SHA-256 não confere com o manifesto")
+    else:
+        problems.append("manifesto ausente")
+    
+    fd, tmp_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        _extract(snapshot_path, tmp_path)
+        problems.extend(check_integrity(tmp_path))
+    except (OSError, sqlite3.DatabaseError) as e:
+        problems.append(f"snapshot ilegível: {e}")
+    finally:
+        os.remove(tmp_path)
+    return problems
+
+def restore_snapshot(snapshot_path: str, db_path: str, backup_dir: str = DEFAULT_BACKUP_DIR,
+                     safety_snapshot: bool = True, pages: int = DEFAULT_PAGES_PER_STEP) -> Optional[str]:
+    """Replace the contents of db_path with a verified snapshot.
+    
+    The copy goes through the backup API into the live database, so open
+    connections see either the old or the restored contents, never a
+    half-written file. Unless disabled, the current database is first
+    snapshotted; returns that safety snapshot's path.
+    """
+    problems = verify_snapshot(snapshot_path)
+    if problems:
+        raise BackupError(f"snapshot inválido: {problems[:5]}")
+    
+    safety_path = None
+    if safety_snapshot and os.path.exists(db_path):
+        safety_path = create_snapshot(db_path, backup_dir)
+    
+    fd, tmp_path = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(os.path.abspath(db_path)))
+    os.close(fd)
+    try:
+        _extract(snapshot_path, tmp_path)
+        backup_database(tmp_path, db_path, pages=pages, step_sleep=0)
+    finally:
+        os.remove(tmp_path)
+    return safety_path
+
+def find_snapshot_at(at: datetime, backup_dir: str = DEFAULT_BACKUP_DIR) -> Optional[Dict]:
+    """Newest snapshot taken at or before ``at`` (point-in-time restore target)"""
+    candidates = [manifest for manifest in list_snapshots(backup_dir)
+                  if manifest['created_at'] <= at.isoformat(timespec='seconds')]
+    return candidates[-1] if candidates else None
+
+class SnapshotScheduler(PeriodicTask):
+    """Take a snapshot every ``interval_minutes`` and keep the newest ``keep``"""
+    
+    def __init__(self, db_path: str, backup_dir: str = DEFAULT_BACKUP_DIR,
+                 interval_minutes: float = 60, keep: int = 24, compress: bool = True,
+                 on_snapshot: Optional[Callable[[str], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.compress = compress
+        self.on_snapshot = on_snapshot
+        super().__init__(interval_minutes * 60, self.take_snapshot, name='snapshot-scheduler',
+                         on_error=on_error, run_immediately=True)
+    
+    def take_snapshot(self) -> str:
+        path = create_snapshot(self.db_path, self.backup_dir, compress=self.compress)
+        prune_snapshots(self.backup_dir, self.keep)
+        if self.on_snapshot:
+            self.on_snapshot(path)
+        return path
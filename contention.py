@@ -0,0 +1,129 @@
+"""
+Write contention between processes sharing the database file.
+
+SQLite lets one writer at a time hold the file. Three layers keep
+several terminals and GUIs from failing with "database is locked":
+
+- every connection waits up to ``busy_timeout`` seconds for a lock
+  instead of failing at once;
+- DatabaseManager write methods, and the writes of the job queue,
+  archiving and shard setup, run in ``BEGIN IMMEDIATE`` transactions
+  (DatabaseManager.write_transaction), taking the write lock before their
+  first statement, so they cannot fail halfway through when another
+  writer got there first, nor deadlock upgrading a read lock. Reads that
+  need one snapshot use a deferred DatabaseManager.read_transaction and
+  leave the write lock to writers;
+- when the lock is still not available after the timeout, the whole
+  method runs again after a jittered exponential backoff (retry_on_busy),
+  so processes that collided do not collide again in lockstep.
+
+LockMetrics counts lock waits, hold times, retries and give-ups for one
+DatabaseManager (``db.lock_metrics``).
+
+Usage (from the project root):
+    python -m scripts.stress_contention --writers 4 --readers 4 --seconds 20
+"""
+
+import functools
+import random
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict
+
+from instrumentation import OperationStats
+
+DEFAULT_BUSY_TIMEOUT = 5.0
+DEFAULT_WRITE_RETRIES = 5
+
+# Backoff before retry n (from 0) is uniform in [0, min(MAX, BASE * 2**n)] seconds
+BACKOFF_BASE_DELAY = 0.05
+BACKOFF_MAX_DELAY = 2.0
+
+def is_busy(error: Exception) -> bool:
+    """Whether ``error`` means another connection holds a lock we need"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+def backoff_delay(attempt: int, base_delay: float = BACKOFF_BASE_DELAY,
+                  max_delay: float = BACKOFF_MAX_DELAY) -> float:
+    """Seconds to wait before retry ``attempt`` (0 for the first): full-jitter exponential backoff"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+class LockMetrics:
+    """Lock wait and hold times, retries and failures of one DatabaseManager"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.waits = OperationStats()
+            self.holds = OperationStats()
+            self.busy_errors = 0
+            self.retries = 0
+            self.gave_up = 0
+    
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.waits.record(seconds * 1000)
+    
+    def record_hold(self, seconds: float):
+        with self._lock:
+            self.holds.record(seconds * 1000)
+    
+    def record_busy(self, retrying: bool):
+        with self._lock:
+            self.busy_errors += 1
+            if retrying:
+                self.retries += 1
+            else:
+                self.gave_up += 1
+    
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {'transactions': self.holds.count, 'lock_wait': self.waits.to_dict(),
+                    'lock_hold': self.holds.to_dict(), 'busy_errors': self.busy_errors,
+                    'retries': self.retries, 'gave_up': self.gave_up}
+    
+    def format_report(self) -> str:
+        stats = self.to_dict()
+        wait, hold = stats['lock_wait'], stats['lock_hold']
+        return '\n'.join((
+            f"Transações de escrita: {stats['transactions']}",
+            f"Espera pelo lock: média {wait['avg_ms']:.2f} ms, máx {wait['max_ms']:.2f} ms",
+            f"Lock mantido: média {hold['avg_ms']:.2f} ms, máx {hold['max_ms']:.2f} ms",
+            f"Base ocupada: {stats['busy_errors']} vez(es), {stats['retries']} nova(s) tentativa(s), "
+            f"{stats['gave_up']} desistência(s)",
+        ))
+
+def retry_on_busy(method: Callable) -> Callable:
+    """Decorator for write methods: run again with backoff while the database is locked.
+    
+    The first argument is the DatabaseManager, or an object keeping it as
+    ``db`` (JobQueue, PricingEngine). A call made inside another write
+    transaction is part of it, and is retried with the outermost call
+    rather than on its own.
+    """
+    @functools.wraps(method)
+    def wrapper(owner, *args, **kwargs):
+        db = getattr(owner, 'db', owner)
+        if db.in_write_transaction():
+            return method(owner, *args, **kwargs)
+        attempt = 0
+        while True:
+            try:
+                return method(owner, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy(e):
+                    raise
+                retrying = attempt < db.write_retries
+                db.lock_metrics.record_busy(retrying)
+                if not retrying:
+                    raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+    return wrapper
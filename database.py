@@ -1,40 +1,374 @@
 import sqlite3
-from typing import List, Dict, Optional, Tuple
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional, Sequence, Tuple
 import os
+from urllib.parse import quote
+from contention import LockMetrics, retry_on_busy
+from normalization import digits_only, fold_text, format_cpf, phone_key, prefix_upper_bound
+from settings import Settings, get_settings
+from statements import update_parameters
+from validation import SCHEMAS, UNIQUE_COLUMNS, validate, validate_batch
+
+def _decode_change(row: sqlite3.Row) -> Dict:
+    """change_log row as a dict with the JSON row images decoded"""
+    change = dict(row)
+    for key in ('old_values', 'new_values'):
+        if change[key] is not None:
+            change[key] = json.loads(change[key])
+    return change
 
 class DatabaseManager:
-    def __init__(self, db_path: str = 'data/dealership.db'):
-        self.db_path = db_path
+    # Columns that can be faceted (equality filters with per-value counts)
+    VEHICLE_FACETS = ('fuel_type', 'transmission', 'status', 'brand')
+    
+    # Vehicle search sort columns -> index ordered by (column, rowid), if any
+    VEHICLE_SORT_INDEXES = {
+        'created_at': 'idx_vehicles_created_at', 'price': 'idx_vehicles_price',
+        'brand': 'idx_vehicles_brand', 'model': 'idx_vehicles_model', 'year': 'idx_vehicles_year',
+        'mileage': 'idx_vehicles_mileage', 'id': None, 'color': None, 'fuel_type': None,
+        'transmission': None, 'status': None,
+    }
+    
+    # Metrics a sales leaderboard can rank by (columns of employee_sales_stats)
+    LEADERBOARD_METRICS = ('revenue', 'units', 'commission')
+    
+    # Tables import_rows accepts
+    IMPORT_TABLES = ('vehicles', 'customers', 'employees')
+    
+    # Prepared statements kept per connection; the default of 128 is too few
+    # for the canonical UPDATE variants plus every query in this class
+    CACHED_STATEMENTS = 512
+    
+    # Plumbing that is not timed as a method when instrumentation is on
+    UNINSTRUMENTED_METHODS = ('get_connection', 'get_read_connection', 'close', 'ensure_database_exists',
+                              'upgrade_schema', 'enable_instrumentation', 'disable_instrumentation',
+                              'enable_read_replica', 'disable_read_replica', 'configure_storage',
+                              'enable_offline_mode', 'disable_offline_mode', 'write_transaction',
+                              'in_write_transaction', 'read_transaction', 'set_journal_mode',
+                              'schema_version')
+    
+    def __init__(self, db_path: str = None, mmap_size: int = None, cache_size: int = None,
+                 busy_timeout: float = None, write_retries: int = None, settings: Settings = None):
+        """Open ``db_path``; arguments left as None come from ``settings`` (default: get_settings())"""
+        settings = settings or get_settings()
+        self.db_path = db_path or settings.db_path
+        # Seconds a statement waits for a lock held by another connection, and
+        # how many times a write method runs again after that (see contention.py)
+        self.busy_timeout = settings.busy_timeout if busy_timeout is None else busy_timeout
+        self.write_retries = settings.write_retries if write_retries is None else write_retries
+        self.lock_metrics = LockMetrics()
+        # Memory-mapped I/O and page cache size in bytes (None: SQLite default), see storage.py
+        self.storage_settings = (settings.mmap_size if mmap_size is None else mmap_size,
+                                 settings.cache_size if cache_size is None else cache_size)
+        self.cached_statements = settings.statement_cache or self.CACHED_STATEMENTS
+        # Per-connection PRAGMAs of the profile; its journal_mode is set once, below
+        self.pragmas = {name: value for name, value in settings.pragmas.items() if name != 'journal_mode'}
+        self.journal_mode = settings.pragmas.get('journal_mode')
+        self.page_size = settings.page_size
+        self.instrumentation = None
+        self.replica = None
+        self.replica_refresher = None
+        self.replica_read_your_writes = True
+        self.offline = None
+        # One connection per thread, reused so its statement cache stays warm
+        self._local = threading.local()
         self.ensure_database_exists()
     
     def ensure_database_exists(self):
-        """Ensure the database and tables exist"""
+        """Ensure the database and tables exist, upgrading a database left at an older schema version"""
+        from scripts.create_database import SCHEMA_VERSION, create_database
         if not os.path.exists(self.db_path):
-            from scripts.create_database import create_database
-            create_database()
+            create_database(self.db_path, self.page_size)
+        if self.schema_version() < SCHEMA_VERSION:
+            self.upgrade_schema()
+        if self.journal_mode:
+            self.set_journal_mode(self.journal_mode)
+    
+    @retry_on_busy
+    def set_journal_mode(self, mode: str) -> str:
+        """Switch the database file's journal mode (stored in the file); returns the mode in effect"""
+        conn = self.get_connection()
+        current = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        if current != mode.lower():
+            current = conn.execute(f'PRAGMA journal_mode = {mode}').fetchone()[0]
+        return current
+    
+    def schema_version(self) -> int:
+        """Schema version stored in the file (PRAGMA user_version, set by apply_schema)"""
+        return self.get_connection().execute('PRAGMA user_version').fetchone()[0]
+    
+    @retry_on_busy
+    def upgrade_schema(self):
+        """Bring an existing database up to the current schema and fill derived columns"""
+        from scripts.create_database import apply_schema
+        with self.get_connection() as conn:
+            apply_schema(conn)
+            cursor = conn.cursor()
+            # Rows inserted before the lookup keys existed lack them
+            cursor.execute('SELECT id, name, phone FROM customers WHERE name_key IS NULL OR phone_digits IS NULL')
+            missing = [(fold_text(row['name']), phone_key(row['phone']), row['id'])
+                       for row in cursor.fetchall()]
+            if missing:
+                cursor.executemany('UPDATE customers SET name_key = ?, phone_digits = ? WHERE id = ?', missing)
     
     def get_connection(self) -> sqlite3.Connection:
-        """Get a database connection"""
-        conn = sqlite3.connect(self.db_path)
+        """Get this thread's database connection (opened on first use)"""
+        if self.replica is not None:
+            # Anything opened on the file may write; reads catch up afterwards
+            self.replica.dirty = True
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.instrumentation is self.instrumentation:
+            if self._local.storage_settings is not self.storage_settings:
+                self._apply_storage_settings(conn)
+            return conn
+        if conn is not None:
+            conn.close()
+        
+        target, uri = self.db_path, False
+        if self.offline is not None:
+            # Never create an empty database where an unreachable one should be
+            target, uri = f'file:{quote(os.path.abspath(self.db_path))}?mode=rw', True
+        if self.instrumentation:
+            from instrumentation import InstrumentedConnection
+            conn = sqlite3.connect(target, timeout=self.busy_timeout, factory=InstrumentedConnection,
+                                   cached_statements=self.cached_statements, uri=uri)
+            conn.attach(self.instrumentation)
+        else:
+            conn = sqlite3.connect(target, timeout=self.busy_timeout, cached_statements=self.cached_statements,
+                                   uri=uri)
         conn.row_factory = sqlite3.Row  # Enable column access by name
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        self._apply_storage_settings(conn)
+        self._local.conn = conn
+        self._local.instrumentation = self.instrumentation
+        return conn
+    
+    @contextmanager
+    def write_transaction(self) -> Iterator[sqlite3.Connection]:
+        """This thread's connection inside a BEGIN IMMEDIATE transaction.
+        
+        The write lock is taken before the first statement (waiting up to
+        busy_timeout), so the transaction cannot fail halfway on a lock
+        another writer holds. Commits on success and rolls back on error;
+        a nested call joins the outer transaction.
+        """
+        conn = self.get_connection()
+        if self.in_write_transaction():
+            self._local.write_depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.write_depth -= 1
+            return
+        if conn.in_transaction:
+            conn.commit()
+        start = time.perf_counter()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+        finally:
+            self.lock_metrics.record_wait(time.perf_counter() - start)
+        locked_at = time.perf_counter()
+        self._local.write_depth = 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.write_depth = 0
+            self.lock_metrics.record_hold(time.perf_counter() - locked_at)
+    
+    def in_write_transaction(self) -> bool:
+        """Whether the calling thread is inside write_transaction()"""
+        return getattr(self._local, 'write_depth', 0) > 0
+    
+    @contextmanager
+    def read_transaction(self) -> Iterator[sqlite3.Connection]:
+        """This thread's connection inside a deferred transaction: one snapshot for several reads.
+        
+        BEGIN takes no lock up front and the SELECTs only a shared one, so
+        other processes keep writing (in WAL mode even committing) while
+        the reads run. Inside an open transaction, joins it.
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+    
+    def _apply_storage_settings(self, conn: sqlite3.Connection):
+        from storage import DEFAULT_CACHE_SIZE, DEFAULT_MMAP_SIZE, apply_connection_settings
+        mmap_size, cache_size = self.storage_settings
+        apply_connection_settings(conn, DEFAULT_MMAP_SIZE if mmap_size is None else mmap_size,
+                                  DEFAULT_CACHE_SIZE if cache_size is None else cache_size)
+        self._local.storage_settings = self.storage_settings
+    
+    @property
+    def mmap_size(self) -> Optional[int]:
+        return self.storage_settings[0]
+    
+    def configure_storage(self, mmap_size: int = None, cache_size: int = None):
+        """Change memory-mapped I/O and page cache size (bytes) of every connection.
+        
+        Each thread's connection picks the settings up on its next use;
+        None restores SQLite's default.
+        """
+        self.storage_settings = (mmap_size, cache_size)
+    
+    def close(self):
+        """Close the calling thread's connections (reopened on next use)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        self._close_replica_connection()
+    
+    def _close_replica_connection(self):
+        conn = getattr(self._local, 'replica_conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.replica_conn = None
+            self._local.replica_key = None
+    
+    def get_read_connection(self) -> sqlite3.Connection:
+        """Connection for read-only methods: the in-memory replica when enabled.
+        
+        Like get_connection, one replica connection per thread, reopened
+        when the replica has been refreshed (the copy was swapped).
+        """
+        replica = self.replica
+        if replica is None:
+            # Let go of a copy the replica dropped when it was disabled
+            self._close_replica_connection()
+            return self.get_connection()
+        if replica.dirty and self.replica_read_your_writes:
+            replica.refresh_if_stale()
+        # Taken before connecting: a refresh in between only costs a reconnect next time
+        key = (replica, replica.refreshes, self.instrumentation)
+        conn = getattr(self._local, 'replica_conn', None)
+        if conn is not None and self._local.replica_key == key:
+            return conn
+        self._close_replica_connection()
+        if self.instrumentation:
+            from instrumentation import InstrumentedConnection
+            conn = replica.connect(factory=InstrumentedConnection)
+            conn.attach(self.instrumentation)
+        else:
+            conn = replica.connect()
+        conn.row_factory = sqlite3.Row
+        self._local.replica_conn, self._local.replica_key = conn, key
         return conn
     
+    def enable_read_replica(self, refresh_interval: float = 5.0, read_your_writes: bool = True):
+        """Serve read-only methods from an in-memory copy of the database.
+        
+        Writes still go to the file. The copy is refreshed every
+        ``refresh_interval`` seconds when the file's change log has moved
+        (None disables the background refresh) and, with ``read_your_writes``,
+        before the first read after a write made through this manager.
+        Returns the MemoryReplica (see replication.py).
+        """
+        from replication import MemoryReplica, ReplicaRefresher
+        if self.replica is None:
+            self.replica = MemoryReplica(self.db_path)
+        self.replica_read_your_writes = read_your_writes
+        if self.replica_refresher is not None:
+            self.replica_refresher.stop()
+            self.replica_refresher = None
+        if refresh_interval:
+            self.replica_refresher = ReplicaRefresher(self.replica, refresh_interval)
+            self.replica_refresher.start()
+        return self.replica
+    
+    def disable_read_replica(self):
+        """Send reads back to the database file"""
+        if self.replica_refresher is not None:
+            self.replica_refresher.stop()
+            self.replica_refresher = None
+        if self.replica is not None:
+            self.replica.close()
+            self.replica = None
+    
+    def refresh_read_replica(self):
+        """Bring the in-memory replica up to date now"""
+        if self.replica is not None:
+            self.replica.refresh()
+    
+    def enable_instrumentation(self, slow_threshold_ms: float = 100.0):
+        """Start recording per-method and per-statement statistics.
+        
+        Returns the QueryInstrumentation collecting them (see instrumentation.py).
+        """
+        if self.instrumentation is None:
+            from instrumentation import QueryInstrumentation, instrument_methods
+            self.instrumentation = QueryInstrumentation(slow_threshold_ms)
+            instrument_methods(self, self.instrumentation, exclude=self.UNINSTRUMENTED_METHODS)
+        else:
+            self.instrumentation.slow_threshold_ms = slow_threshold_ms
+        return self.instrumentation
+    
+    def disable_instrumentation(self):
+        """Stop recording statistics"""
+        if self.instrumentation is not None:
+            from instrumentation import uninstrument_methods
+            uninstrument_methods(self)
+            self.instrumentation = None
+    
+    def enable_offline_mode(self, journal_path: str = None, probe_interval: float = 5.0,
+                            sync_interval: float = 0.05):
+        """Keep add_vehicle, add_customer and add_sale working while the database is unreachable.
+        
+        Those writes go to a local journal during an outage and are replayed
+        once the database answers again (probed every ``probe_interval``
+        seconds). Returns the OfflineWriter (see offline.py).
+        """
+        from offline import DEFAULT_JOURNAL_PATH, OfflineJournal, OfflineWriter
+        if self.offline is None:
+            journal = OfflineJournal(journal_path or DEFAULT_JOURNAL_PATH, sync_interval=sync_interval)
+            self.offline = OfflineWriter(self, journal, probe_interval=probe_interval)
+            self.offline.start()
+        return self.offline
+    
+    def disable_offline_mode(self):
+        """Write straight to the database again; pending journal entries stay for the next replay"""
+        if self.offline is not None:
+            self.offline.stop()
+            self.offline = None
+    
     # Vehicle operations
+    @retry_on_busy
     def add_vehicle(self, brand: str, model: str, year: int, color: str, 
                    price: float, mileage: int = 0, fuel_type: str = 'Gasoline',
                    transmission: str = 'Manual') -> int:
-        """Add a new vehicle to the database"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO vehicles (brand, model, year, color, price, mileage, fuel_type, transmission)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (brand, model, year, color, price, mileage, fuel_type, transmission))
-            return cursor.lastrowid
+        """Add a new vehicle to the database (raises ValidationError on invalid data)"""
+        vehicle = validate('vehicles', dict(brand=brand, model=model, year=year, color=color, price=price,
+                                            mileage=mileage, fuel_type=fuel_type, transmission=transmission))
+        if self.offline is not None:
+            return self.offline.write('add_vehicle', vehicle)
+        with self.write_transaction() as conn:
+            return self._insert_vehicle(conn.cursor(), vehicle)
+    
+    @staticmethod
+    def _insert_vehicle(cursor: sqlite3.Cursor, vehicle: Dict) -> int:
+        cursor.execute('''
+            INSERT INTO vehicles (brand, model, year, color, price, mileage, fuel_type, transmission)
+            VALUES (:brand, :model, :year, :color, :price, :mileage, :fuel_type, :transmission)
+        ''', vehicle)
+        return cursor.lastrowid
     
     def get_vehicles(self, status: str = None) -> List[Dict]:
         """Get all vehicles, optionally filtered by status"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             if status:
                 cursor.execute('SELECT * FROM vehicles WHERE status = ? ORDER BY created_at DESC', (status,))
@@ -42,119 +376,314 @@ class DatabaseManager:
                 cursor.execute('SELECT * FROM vehicles ORDER BY created_at DESC')
             return [dict(row) for row in cursor.fetchall()]
     
-    def get_vehicle_by_id(self, vehicle_id: int) -> Optional[Dict]:
-        """Get a vehicle by ID"""
-        with self.get_connection() as conn:
+    def get_vehicle_by_id(self, vehicle_id: int, include_archive: bool = False) -> Optional[Dict]:
+        """Get a vehicle by ID, optionally looking in the archive too"""
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM vehicles WHERE id = ?', (vehicle_id,))
             row = cursor.fetchone()
+            if row is None and include_archive:
+                cursor.execute('SELECT * FROM vehicles_archive WHERE id = ?', (vehicle_id,))
+                row = cursor.fetchone()
             return dict(row) if row else None
     
+    @retry_on_busy
     def update_vehicle(self, vehicle_id: int, **kwargs) -> bool:
-        """Update vehicle information"""
+        """Update vehicle information (raises ValidationError on invalid data)"""
         if not kwargs:
             return False
         
-        set_clause = ', '.join([f"{key} = ?" for key in kwargs.keys()])
-        values = list(kwargs.values()) + [vehicle_id]
+        kwargs = validate('vehicles', kwargs, partial=True)
+        sql, params = update_parameters('vehicles', vehicle_id, kwargs)
         
-        with self.get_connection() as conn:
+        with self.write_transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute(f'UPDATE vehicles SET {set_clause} WHERE id = ?', values)
+            cursor.execute(sql, params)
             return cursor.rowcount > 0
     
+    @retry_on_busy
     def delete_vehicle(self, vehicle_id: int) -> bool:
-        """Delete a vehicle"""
-        with self.get_connection() as conn:
+        """Delete a vehicle.
+        
+        A vehicle that sales still reference is moved to vehicles_archive
+        instead, so the sales history keeps its vehicle details.
+        """
+        from archive import move_to_archive
+        with self.write_transaction() as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT EXISTS (SELECT 1 FROM sales WHERE vehicle_id = ?)
+                    OR EXISTS (SELECT 1 FROM sales_archive WHERE vehicle_id = ?)
+            ''', (vehicle_id, vehicle_id))
+            if cursor.fetchone()[0]:
+                return move_to_archive(cursor, 'vehicles', [vehicle_id], 'deleted') > 0
             cursor.execute('DELETE FROM vehicles WHERE id = ?', (vehicle_id,))
             return cursor.rowcount > 0
     
     # Customer operations
+    @retry_on_busy
     def add_customer(self, name: str, email: str, phone: str, 
                     address: str = '', cpf: str = '') -> int:
-        """Add a new customer"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO customers (name, email, phone, address, cpf)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (name, email, phone, address, cpf))
-            return cursor.lastrowid
+        """Add a new customer (raises ValidationError on invalid data; an empty CPF is stored as NULL)"""
+        customer = validate('customers', dict(name=name, email=email, phone=phone, address=address, cpf=cpf))
+        if self.offline is not None:
+            return self.offline.write('add_customer', customer)
+        with self.write_transaction() as conn:
+            return self._insert_customer(conn.cursor(), customer)
+    
+    @staticmethod
+    def _insert_customer(cursor: sqlite3.Cursor, customer: Dict) -> int:
+        cursor.execute('''
+            INSERT INTO customers (name, email, phone, address, cpf, phone_digits, name_key)
+            VALUES (:name, :email, :phone, :address, :cpf, :phone_digits, :name_key)
+        ''', dict(customer, phone_digits=phone_key(customer['phone']), name_key=fold_text(customer['name'])))
+        return cursor.lastrowid
     
     def get_customers(self) -> List[Dict]:
         """Get all customers"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM customers ORDER BY name')
             return [dict(row) for row in cursor.fetchall()]
     
     def get_customer_by_id(self, customer_id: int) -> Optional[Dict]:
         """Get a customer by ID"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM customers WHERE id = ?', (customer_id,))
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    @retry_on_busy
     def update_customer(self, customer_id: int, **kwargs) -> bool:
-        """Update customer information"""
+        """Update customer information (raises ValidationError on invalid data)"""
         if not kwargs:
             return False
         
-        set_clause = ', '.join([f"{key} = ?" for key in kwargs.keys()])
-        values = list(kwargs.values()) + [customer_id]
+        kwargs = validate('customers', kwargs, partial=True)
+        # Keep lookup keys in sync with the columns they are derived from
+        if 'name' in kwargs:
+            kwargs['name_key'] = fold_text(kwargs['name'])
+        if 'phone' in kwargs:
+            kwargs['phone_digits'] = phone_key(kwargs['phone'])
         
-        with self.get_connection() as conn:
+        sql, params = update_parameters('customers', customer_id, kwargs)
+        
+        with self.write_transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute(f'UPDATE customers SET {set_clause} WHERE id = ?', values)
+            cursor.execute(sql, params)
             return cursor.rowcount > 0
     
+    def find_customers(self, cpf: str = None, email: str = None, phone: str = None,
+                       name_prefix: str = None, limit: int = 50) -> List[Dict]:
+        """Find customers by CPF, email, phone and/or name prefix.
+        
+        Criteria are combined with AND. Every criterion is answered from an
+        index: CPF and email use their UNIQUE indexes, phone uses the
+        normalized digits and names are matched accent- and case-insensitively
+        ("joao" finds "João Silva").
+        """
+        conditions = []
+        params = []
+        
+        if cpf:
+            # CPFs may be stored with or without punctuation
+            conditions.append('cpf IN (?, ?, ?)')
+            params.extend([cpf.strip(), digits_only(cpf), format_cpf(cpf)])
+        if email:
+            conditions.append('email IN (?, ?)')
+            params.extend([email.strip(), email.strip().lower()])
+        if phone:
+            conditions.append('phone_digits = ?')
+            params.append(phone_key(phone))
+        if name_prefix:
+            key = fold_text(name_prefix)
+            conditions.append('name_key >= ? AND name_key < ?')
+            params.extend([key, prefix_upper_bound(key)])
+        
+        if not conditions:
+            return []
+        
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT * FROM customers
+                WHERE {' AND '.join(conditions)}
+                ORDER BY name_key
+                LIMIT ?
+            ''', params + [limit])
+            return [dict(row) for row in cursor.fetchall()]
+    
+    @retry_on_busy
     def delete_customer(self, customer_id: int) -> bool:
         """Delete a customer"""
-        with self.get_connection() as conn:
+        with self.write_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM customers WHERE id = ?', (customer_id,))
             return cursor.rowcount > 0
     
-    # Sales operations
-    def add_sale(self, customer_id: int, vehicle_id: int, sale_price: float,
-                payment_method: str = 'Cash', notes: str = '') -> int:
-        """Add a new sale"""
-        with self.get_connection() as conn:
+    @retry_on_busy
+    def merge_customers(self, keep_id: int, duplicate_ids: List[int]) -> int:
+        """Merge duplicate customers into keep_id; returns the number of sales moved.
+        
+        Sales (hot and archived) of the duplicates are re-pointed to keep_id,
+        the address and CPF keep_id lacks are taken from a duplicate, and
+        the duplicates are deleted, all in one transaction. Raises
+        ValueError if any customer does not exist, or if two of them have
+        different CPFs (they are different people).
+        """
+        duplicate_ids = [customer_id for customer_id in dict.fromkeys(duplicate_ids) if customer_id != keep_id]
+        if not duplicate_ids:
+            return 0
+        ids = [keep_id] + duplicate_ids
+        placeholders = ', '.join('?' * len(duplicate_ids))
+        with self.write_transaction() as conn:
             cursor = conn.cursor()
-            # Add the sale
-            cursor.execute('''
-                INSERT INTO sales (customer_id, vehicle_id, sale_price, payment_method, notes)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (customer_id, vehicle_id, sale_price, payment_method, notes))
+            cursor.execute(f"SELECT * FROM customers WHERE id IN ({', '.join('?' * len(ids))})", ids)
+            customers = {row['id']: dict(row) for row in cursor.fetchall()}
+            missing = [customer_id for customer_id in ids if customer_id not in customers]
+            if missing:
+                raise ValueError(f"cliente(s) não encontrado(s): {', '.join(map(str, missing))}")
+            cpfs = {digits_only(customer['cpf']) for customer in customers.values() if customer['cpf']}
+            if len(cpfs) > 1:
+                raise ValueError("clientes com CPFs diferentes não podem ser unidos")
             
-            # Update vehicle status to sold
-            cursor.execute('UPDATE vehicles SET status = ? WHERE id = ?', ('Sold', vehicle_id))
+            moved = 0
+            for table in ('sales', 'sales_archive'):
+                cursor.execute(f'UPDATE {table} SET customer_id = ? WHERE customer_id IN ({placeholders})',
+                               [keep_id] + duplicate_ids)
+                moved += cursor.rowcount
             
-            return cursor.lastrowid
+            # Deleted first: the CPF moving to keep_id is UNIQUE
+            cursor.execute(f'DELETE FROM customers WHERE id IN ({placeholders})', duplicate_ids)
+            kept = customers[keep_id]
+            updates = {}
+            for column in ('address', 'cpf'):
+                if not kept[column]:
+                    value = next((customers[customer_id][column] for customer_id in duplicate_ids
+                                  if customers[customer_id][column]), None)
+                    if value:
+                        updates[column] = value
+            if updates:
+                cursor.execute(*update_parameters('customers', keep_id, updates))
+            
+            # Archived sales have no triggers; recompute the lifetime figures
+            cursor.execute('DELETE FROM customer_stats WHERE customer_id = ?', (keep_id,))
+            cursor.execute('''
+                INSERT INTO customer_stats (customer_id, purchase_count, lifetime_spend, last_purchase_date)
+                SELECT customer_id, COUNT(*), SUM(sale_price), MAX(sale_date)
+                FROM (SELECT customer_id, sale_price, sale_date FROM sales WHERE customer_id = ?
+                      UNION ALL
+                      SELECT customer_id, sale_price, sale_date FROM sales_archive WHERE customer_id = ?)
+                GROUP BY customer_id
+            ''', (keep_id, keep_id))
+            return moved
     
-    def get_sales(self) -> List[Dict]:
-        """Get all sales with customer and vehicle information"""
-        with self.get_connection() as conn:
+    # Sales operations
+    @retry_on_busy
+    def add_sale(self, customer_id: int, vehicle_id: int, sale_price: float,
+                payment_method: str = 'Cash', notes: str = '', employee_id: int = None) -> int:
+        """Add a new sale, credited to employee_id (with its commission) when given"""
+        sale = validate('sales', dict(sale_price=sale_price, payment_method=payment_method, notes=notes,
+                                      customer_id=customer_id, vehicle_id=vehicle_id, employee_id=employee_id))
+        if self.offline is not None:
+            return self.offline.write('add_sale', sale)
+        with self.write_transaction() as conn:
+            return self._insert_sale(conn.cursor(), sale)
+    
+    @classmethod
+    def _insert_sale(cls, cursor: sqlite3.Cursor, sale: Dict) -> int:
+        commission = cls._commission(cursor, sale['employee_id'], sale['sale_price'])
+        # Add the sale
+        cursor.execute('''
+            INSERT INTO sales (customer_id, vehicle_id, sale_price, payment_method, notes,
+                               employee_id, commission)
+            VALUES (:customer_id, :vehicle_id, :sale_price, :payment_method, :notes, :employee_id, :commission)
+        ''', dict(sale, commission=commission))
+        sale_id = cursor.lastrowid
+        
+        # Update vehicle status to sold
+        cursor.execute('UPDATE vehicles SET status = ? WHERE id = ?', ('Sold', sale['vehicle_id']))
+        
+        return sale_id
+    
+    @staticmethod
+    def _sale_rows(cursor: sqlite3.Cursor, include_archive: bool, extra_columns: str = '',
+                   joins: str = '', where: str = '1', params=(), limit: int = None) -> List[Dict]:
+        """Sales with their vehicle details, most recent first.
+        
+        The vehicle may be in either vehicle table (it is archived once sold
+        long enough, or when deleted), and with include_archive the
+        archived sales are merged in.
+        """
+        sales = []
+        for table in ('sales', 'sales_archive') if include_archive else ('sales',):
+            cursor.execute(f'''
+                SELECT s.*{extra_columns},
+                       COALESCE(v.brand, va.brand) AS brand, COALESCE(v.model, va.model) AS model,
+                       COALESCE(v.year, va.year) AS year, COALESCE(v.color, va.color) AS color
+                FROM {table} s
+                {joins}
+                LEFT JOIN vehicles v ON s.vehicle_id = v.id
+                LEFT JOIN vehicles_archive va ON s.vehicle_id = va.id
+                WHERE ({where}) AND (v.id IS NOT NULL OR va.id IS NOT NULL)
+                ORDER BY s.sale_date DESC
+                LIMIT ?
+            ''', list(params) + [-1 if limit is None else limit])
+            sales.extend(dict(row) for row in cursor.fetchall())
+        if include_archive:
+            sales.sort(key=lambda sale: sale['sale_date'] or '', reverse=True)
+            if limit is not None:
+                sales = sales[:limit]
+        return sales
+    
+    def get_sales(self, include_archive: bool = False) -> List[Dict]:
+        """Get all sales with customer and vehicle information (archived sales on request).
+        
+        Hot sales are read from sales_view, which holds them already joined
+        to their customer, vehicle and salesperson; the archive is joined
+        on the fly.
+        """
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
+            if include_archive:
+                return self._sale_rows(cursor, include_archive,
+                                       extra_columns=', c.name as customer_name, c.email as customer_email',
+                                       joins='JOIN customers c ON s.customer_id = c.id')
+            # Sales whose customer or vehicle row is gone are left out, as by the join
             cursor.execute('''
-                SELECT s.*, c.name as customer_name, c.email as customer_email,
-                       v.brand, v.model, v.year, v.color
-                FROM sales s
-                JOIN customers c ON s.customer_id = c.id
-                JOIN vehicles v ON s.vehicle_id = v.id
-                ORDER BY s.sale_date DESC
+                SELECT * FROM sales_view
+                WHERE customer_name IS NOT NULL AND brand IS NOT NULL
+                ORDER BY sale_date DESC
             ''')
             return [dict(row) for row in cursor.fetchall()]
     
+    @retry_on_busy
+    def rebuild_sales_view(self) -> int:
+        """Recompute sales_view from the source tables; returns the number of rows"""
+        from scripts.create_database import rebuild_sales_view
+        with self.write_transaction() as conn:
+            return rebuild_sales_view(conn.cursor())
+    
+    def check_sales_view(self) -> int:
+        """Number of sales_view rows that differ from the source tables (0 if in sync)"""
+        from scripts.create_database import sales_view_differences
+        with self.get_connection() as conn:
+            return sales_view_differences(conn.cursor())
+    
     def get_sales_summary(self) -> Dict:
         """Get sales summary statistics"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             
-            # Total sales
-            cursor.execute('SELECT COUNT(*) as total_sales, SUM(sale_price) as total_revenue FROM sales')
+            # Total sales, archived ones included
+            cursor.execute('''
+                SELECT SUM(n) as total_sales, SUM(revenue) as total_revenue FROM (
+                    SELECT COUNT(*) AS n, SUM(sale_price) AS revenue FROM sales
+                    UNION ALL
+                    SELECT COUNT(*), SUM(sale_price) FROM sales_archive
+                )
+            ''')
             summary = dict(cursor.fetchone())
             
             # Available vehicles
@@ -167,27 +696,213 @@ class DatabaseManager:
             
             return summary
     
+    def get_customer_history(self, customer_id: int, limit: int = None,
+                             include_archive: bool = False) -> Optional[Dict]:
+        """Get a customer's purchase history and lifetime statistics.
+        
+        Returns a dict with ``customer``, ``stats`` (purchase_count,
+        lifetime_spend, last_purchase_date) and ``sales`` (most recent
+        first, at most ``limit`` rows), or None if the customer does not exist.
+        The stats always cover archived sales; ``sales`` lists them only
+        with include_archive.
+        """
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM customers WHERE id = ?', (customer_id,))
+            customer = cursor.fetchone()
+            if not customer:
+                return None
+            
+            cursor.execute('''
+                SELECT purchase_count, lifetime_spend, last_purchase_date
+                FROM customer_stats WHERE customer_id = ?
+            ''', (customer_id,))
+            row = cursor.fetchone()
+            stats = dict(row) if row else {'purchase_count': 0, 'lifetime_spend': 0.0,
+                                           'last_purchase_date': None}
+            
+            sales = self._sale_rows(cursor, include_archive, where='s.customer_id = ?',
+                                    params=(customer_id,), limit=limit)
+        
+        return {'customer': dict(customer), 'stats': stats, 'sales': sales}
+    
     # Employee operations
+    @retry_on_busy
     def add_employee(self, name: str, email: str, position: str, salary: float = 0.0) -> int:
-        """Add a new employee"""
-        with self.get_connection() as conn:
+        """Add a new employee (raises ValidationError on invalid data)"""
+        employee = validate('employees', dict(name=name, email=email, position=position, salary=salary))
+        with self.write_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO employees (name, email, position, salary)
-                VALUES (?, ?, ?, ?)
-            ''', (name, email, position, salary))
+                VALUES (:name, :email, :position, :salary)
+            ''', employee)
             return cursor.lastrowid
     
     def get_employees(self) -> List[Dict]:
         """Get all employees"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM employees ORDER BY name')
             return [dict(row) for row in cursor.fetchall()]
     
+    # Batch import
+    @retry_on_busy
+    def import_rows(self, table: str, columns: Sequence[str], rows: Sequence[Sequence]) -> Dict:
+        """Validate and insert many rows of vehicles, customers or employees in one transaction.
+        
+        Rows are sequences in ``columns`` order. Invalid rows are skipped,
+        as are rows whose UNIQUE values (emails, CPFs) are already stored;
+        the rest are inserted. Returns ``inserted`` (a count) and ``errors``
+        as (row index, column, message) tuples in row order.
+        """
+        if table not in self.IMPORT_TABLES:
+            raise ValueError(f"importação não suportada: {table}")
+        columns = list(columns)
+        unknown = [column for column in columns if column not in SCHEMAS[table]]
+        if unknown:
+            raise ValueError(f"colunas desconhecidas: {', '.join(unknown)}")
+        valid, indexes, errors = validate_batch(table, columns, rows)
+        
+        with self.write_transaction() as conn:
+            cursor = conn.cursor()
+            taken = set()
+            for column in UNIQUE_COLUMNS.get(table, ()):
+                if column not in columns:
+                    continue
+                position = columns.index(column)
+                values = {row[position]: index for row, index in zip(valid, indexes) if row[position] is not None}
+                keys = list(values)
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    cursor.execute(f"SELECT {column} FROM {table} WHERE {column} IN ({', '.join('?' * len(chunk))})",
+                                   chunk)
+                    for (value,) in cursor.fetchall():
+                        taken.add(values[value])
+                        errors.append((values[value], column, f"{column} já cadastrado: {value}"))
+            if taken:
+                errors.sort(key=lambda error: error[0])
+                valid = [row for row, index in zip(valid, indexes) if index not in taken]
+            
+            if table == 'customers':
+                # Lookup keys, as add_customer fills them in
+                name, phone = columns.index('name'), columns.index('phone')
+                columns += ['name_key', 'phone_digits']
+                valid = [row + (fold_text(row[name]), phone_key(row[phone])) for row in valid]
+            cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) "
+                               f"VALUES ({', '.join('?' * len(columns))})", valid)
+        return {'inserted': len(valid), 'errors': errors}
+    
+    # Commission and sales performance
+    @staticmethod
+    def _commission(cursor: sqlite3.Cursor, employee_id: Optional[int], sale_price: float) -> Optional[float]:
+        """Commission earned by employee_id on a sale (None without an employee)"""
+        if employee_id is None:
+            return None
+        cursor.execute('''
+            SELECT rate FROM commission_rules
+            WHERE min_sale_price <= ?
+              AND (position IS NULL OR position = (SELECT position FROM employees WHERE id = ?))
+            ORDER BY position IS NULL, min_sale_price DESC
+            LIMIT 1
+        ''', (sale_price, employee_id))
+        row = cursor.fetchone()
+        return round(sale_price * row[0], 2) if row else 0.0
+    
+    @retry_on_busy
+    def assign_sale_employee(self, sale_id: int, employee_id: Optional[int]) -> bool:
+        """Credit an existing sale to employee_id (None removes the credit), recomputing its commission"""
+        with self.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT sale_price FROM sales WHERE id = ?', (sale_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            cursor.execute('UPDATE sales SET employee_id = ?, commission = ? WHERE id = ?',
+                           (employee_id, self._commission(cursor, employee_id, row[0]), sale_id))
+            return True
+    
+    def get_commission_rules(self) -> List[Dict]:
+        """Commission rules, position-specific first, then by minimum sale price"""
+        # From the file, not the replica: commission_rules is not in the change
+        # log, so a new rule would not mark the replica stale
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM commission_rules
+                ORDER BY position IS NULL, position, min_sale_price
+            ''')
+            return [dict(row) for row in cursor.fetchall()]
+    
+    @retry_on_busy
+    def add_commission_rule(self, rate: float, min_sale_price: float = 0.0, position: str = None) -> int:
+        """Add a commission rule; rate is a fraction of the sale price (0.02 = 2%).
+        
+        Rules apply to sales recorded from now on; past commissions are kept.
+        """
+        if not 0 <= rate <= 1:
+            raise ValueError("a taxa de comissão deve estar entre 0 e 1")
+        with self.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('INSERT INTO commission_rules (position, min_sale_price, rate) VALUES (?, ?, ?)',
+                           (position or None, min_sale_price, rate))
+            return cursor.lastrowid
+    
+    @retry_on_busy
+    def delete_commission_rule(self, rule_id: int) -> bool:
+        """Delete a commission rule"""
+        with self.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM commission_rules WHERE id = ?', (rule_id,))
+            return cursor.rowcount > 0
+    
+    def get_leaderboard(self, period: str = None, metric: str = 'revenue', limit: int = 10) -> List[Dict]:
+        """Top sellers of a month ('YYYY-MM', default: the current month) or a year ('YYYY').
+        
+        Reads the employee_sales_stats aggregates: a month is answered from
+        the (period, metric) index by reading only the top ``limit`` rows;
+        a year sums the twelve monthly rows of each employee. Archived
+        sales are included.
+        """
+        if metric not in self.LEADERBOARD_METRICS:
+            raise ValueError(f"métrica inválida: {metric}")
+        period = period or datetime.now().strftime('%Y-%m')
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            if len(period) == 4:
+                cursor.execute(f'''
+                    SELECT st.employee_id, e.name, e.position, SUM(st.units) AS units,
+                           SUM(st.revenue) AS revenue, SUM(st.commission) AS commission
+                    FROM employee_sales_stats st JOIN employees e ON e.id = st.employee_id
+                    WHERE st.period BETWEEN ? AND ?
+                    GROUP BY st.employee_id
+                    ORDER BY {metric} DESC
+                    LIMIT ?
+                ''', (f'{period}-01', f'{period}-12', limit))
+            else:
+                cursor.execute(f'''
+                    SELECT st.employee_id, e.name, e.position, st.units, st.revenue, st.commission
+                    FROM employee_sales_stats st JOIN employees e ON e.id = st.employee_id
+                    WHERE st.period = ?
+                    ORDER BY st.{metric} DESC
+                    LIMIT ?
+                ''', (period, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_employee_performance(self, employee_id: int) -> List[Dict]:
+        """Monthly units, revenue and commission of one employee, most recent first"""
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT period, units, revenue, commission FROM employee_sales_stats
+                WHERE employee_id = ?
+                ORDER BY period DESC
+            ''', (employee_id,))
+            return [dict(row) for row in cursor.fetchall()]
+    
     def search_vehicles(self, query: str) -> List[Dict]:
         """Search vehicles by brand, model, or color"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             search_query = f"%{query}%"
             cursor.execute('''
@@ -196,3 +911,182 @@ class DatabaseManager:
                 ORDER BY created_at DESC
             ''', (search_query, search_query, search_query))
             return [dict(row) for row in cursor.fetchall()]
+    
+    def search_vehicles_faceted(self, query: str = None,
+                                year_min: int = None, year_max: int = None,
+                                price_min: float = None, price_max: float = None,
+                                mileage_min: int = None, mileage_max: int = None,
+                                fuel_type=None, transmission=None, status=None, brand=None,
+                                limit: int = 100, offset: int = 0,
+                                sort: str = 'created_at', descending: bool = True) -> Dict:
+        """Multi-criteria vehicle search with facet counts.
+        
+        Ranges apply to year, price and mileage (inclusive bounds); fuel_type,
+        transmission, status and brand take a value or a list of values.
+        The page is ordered by ``sort`` (a vehicle column, ties broken by id).
+        Returns a dict with the requested page of ``vehicles``, the ``total``
+        number of matches and ``facets``: for each facet column a
+        ``{value: count}`` map over the vehicles matching every other
+        criterion. A facet's own filter is left out of its counts, so the
+        values not selected show how many vehicles choosing them would find.
+        """
+        # (SQL, parameters) of the range and text criteria
+        conditions = []
+        for column, low, high in (('year', year_min, year_max),
+                                  ('price', price_min, price_max),
+                                  ('mileage', mileage_min, mileage_max)):
+            if low is not None:
+                conditions.append((f'{column} >= ?', [low]))
+            if high is not None:
+                conditions.append((f'{column} <= ?', [high]))
+        
+        if query:
+            search_query = f"%{query}%"
+            conditions.append(('(brand LIKE ? OR model LIKE ? OR color LIKE ?)', [search_query] * 3))
+        
+        # Facet filters are kept apart: each one is dropped from its own facet's counts
+        facet_filters = {}
+        for column, value in zip(self.VEHICLE_FACETS, (fuel_type, transmission, status, brand)):
+            if value is None or value == '':
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            if not values:
+                continue
+            facet_filters[column] = (f"{column} IN ({', '.join('?' * len(values))})", values)
+        
+        def where_clause(skip: str = None) -> Tuple[str, List]:
+            """WHERE clause and parameters of every criterion except the facet filter on ``skip``"""
+            selected = conditions + [condition for column, condition in facet_filters.items() if column != skip]
+            sql = f"WHERE {' AND '.join(sql for sql, _ in selected)}" if selected else ''
+            return sql, [param for _, values in selected for param in values]
+        
+        if sort not in self.VEHICLE_SORT_INDEXES:
+            raise ValueError(f"coluna de ordenação inválida: {sort}")
+        direction = 'DESC' if descending else 'ASC'
+        
+        where, params = where_clause()
+        facet_columns = ', '.join(self.VEHICLE_FACETS)
+        
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            
+            # One grouped pass over the matches yields every facet and the total
+            cursor.execute(f'''
+                SELECT {facet_columns}, COUNT(*) AS n FROM vehicles
+                {where}
+                GROUP BY {facet_columns}
+            ''', params)
+            facets = {column: {} for column in self.VEHICLE_FACETS}
+            total = 0
+            for row in cursor.fetchall():
+                count = row['n']
+                total += count
+                for column in self.VEHICLE_FACETS:
+                    counts = facets[column]
+                    counts[row[column]] = counts.get(row[column], 0) + count
+            
+            # A filtered facet is counted again without its own filter
+            for column in facet_filters:
+                facet_where, facet_params = where_clause(skip=column)
+                cursor.execute(f'''
+                    SELECT {column}, COUNT(*) AS n FROM vehicles
+                    {facet_where}
+                    GROUP BY {column}
+                ''', facet_params)
+                facets[column] = {row[column]: row['n'] for row in cursor.fetchall()}
+            
+            # When matches are common, walking the sort column's index in order
+            # finds a page after a few hundred rows; sorting every match would
+            # cost far more
+            cursor.execute('SELECT MAX(id) FROM vehicles')
+            table_size = cursor.fetchone()[0] or 0
+            index = self.VEHICLE_SORT_INDEXES[sort]
+            indexed_by = f'INDEXED BY {index}' if index and total * 50 >= table_size else ''
+            
+            cursor.execute(f'''
+                SELECT * FROM vehicles {indexed_by}
+                {where}
+                ORDER BY {sort} {direction}, id {direction}
+                LIMIT ? OFFSET ?
+            ''', params + [limit, offset])
+            vehicles = [dict(row) for row in cursor.fetchall()]
+        
+        return {'vehicles': vehicles, 'total': total, 'facets': facets}
+    
+    # Change log operations
+    def latest_change_seq(self) -> int:
+        """Sequence number of the most recent change (0 if none)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(seq) FROM change_log')
+            return cursor.fetchone()[0] or 0
+    
+    def changes_since(self, seq: int = 0, batch_size: int = 1000, tables=None) -> Iterator[Dict]:
+        """Stream changes with a sequence number greater than seq, oldest first.
+        
+        Each change is a dict with seq, table_name, row_id, operation
+        (INSERT/UPDATE/DELETE), old_values/new_values (dicts or None) and
+        changed_at. Rows are read in batches of batch_size, so a consumer
+        can tail a large log without loading it all.
+        """
+        table_filter = ''
+        table_params = []
+        if tables:
+            table_filter = f"AND table_name IN ({', '.join('?' * len(tables))})"
+            table_params = list(tables)
+        
+        while True:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT * FROM change_log
+                    WHERE seq > ? {table_filter}
+                    ORDER BY seq
+                    LIMIT ?
+                ''', [seq] + table_params + [batch_size])
+                rows = cursor.fetchall()
+            
+            for row in rows:
+                yield _decode_change(row)
+            
+            if len(rows) < batch_size:
+                return
+            seq = rows[-1]['seq']
+    
+    def get_change_history(self, table_name: str, row_id: int) -> List[Dict]:
+        """All recorded changes of one row, oldest first (e.g. a vehicle's price edits)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM change_log
+                WHERE table_name = ? AND row_id = ?
+                ORDER BY seq
+            ''', (table_name, row_id))
+            return [_decode_change(row) for row in cursor.fetchall()]
+    
+    @retry_on_busy
+    def compact_change_log(self, up_to_seq: int = None, retain: int = 0) -> int:
+        """Compact the change log; returns the number of entries removed.
+        
+        ``up_to_seq`` is the oldest checkpoint among the log's consumers
+        (default: all but the newest ``retain`` entries, for consumers kept
+        within that window). Among entries with seq <= up_to_seq only the
+        latest change of each row is kept, and DELETE tombstones are dropped:
+        every consumer has applied them already, and a reader starting from
+        0 never sees the row. Either way readers reconstruct the same final
+        state, since INSERT/UPDATE entries carry the full row.
+        """
+        with self.write_transaction() as conn:
+            cursor = conn.cursor()
+            if up_to_seq is None:
+                cursor.execute('SELECT MAX(seq) FROM change_log')
+                up_to_seq = (cursor.fetchone()[0] or 0) - retain
+            cursor.execute('''
+                DELETE FROM change_log
+                WHERE seq <= ? AND (operation = 'DELETE' OR seq NOT IN (
+                    SELECT MAX(seq) FROM change_log
+                    WHERE seq <= ?
+                    GROUP BY table_name, row_id
+                ))
+            ''', (up_to_seq, up_to_seq))
+            return cursor.rowcount
@@ -0,0 +1,222 @@
+"""
+Duplicate customer detection.
+
+Comparing every customer with every other is O(n²), so candidates come
+from blocking: each customer gets a few keys (phone digits, CPF digits,
+canonical email, a Portuguese phonetic key of the name) and only
+customers sharing a key are compared. Blocks larger than
+``max_block_size`` (a phone shared by a call center, a very common name)
+are skipped, as they would bring back the quadratic cost while saying
+little about identity.
+
+Each candidate pair is scored from 0 to 1 on the agreement of name,
+email, phone and CPF; pairs at or above the threshold are joined into
+groups, each to be merged into its oldest customer with
+DatabaseManager.merge_customers.
+
+Usage (from the project root):
+    python main.py dedup                        # list likely duplicates
+    python main.py dedup --merge 12 40 41       # merge 40 and 41 into 12
+    python -m scripts.benchmark_dedup --customers 500000
+"""
+
+import re
+import time
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+from normalization import digits_only, fold_text
+
+DEFAULT_THRESHOLD = 0.75
+MAX_BLOCK_SIZE = 50
+
+# Name particles ignored by the phonetic key ("João da Silva" = "João Silva")
+NAME_PARTICLES = frozenset(('da', 'de', 'do', 'das', 'dos', 'e'))
+
+# Score weights of each kind of evidence. They add up to more than 1: one
+# CPF, or a matching name plus a phone or email, reaches the threshold.
+WEIGHTS = {'cpf': 0.75, 'email': 0.4, 'phone': 0.4, 'name': 0.4}
+
+# Portuguese spelling variants mapped to one sound, applied in order to a
+# folded (lower case, unaccented) word
+_PHONETIC_RULES = [(re.compile(pattern), replacement) for pattern, replacement in (
+    (r'[^a-z]', ''),
+    (r'ph', 'f'),
+    (r'th', 't'),
+    (r'[cs]ch|sh|ch', 'x'),
+    (r'lh', 'l'),
+    (r'nh', 'n'),
+    (r'qu(?=[ei])', 'k'),
+    (r'gu(?=[ei])', 'g'),
+    (r'q', 'k'),
+    (r'sc(?=[eiy])|c(?=[eiy])', 's'),
+    (r'c', 'k'),
+    (r'g(?=[eiy])', 'j'),
+    (r'z', 's'),
+    (r'y', 'i'),
+    (r'w', 'v'),
+    (r'h', ''),
+    (r'm$', 'n'),
+    (r'(?<=.)[aeiou]', ''),
+    (r'(.)\1+', r'\1'),
+)]
+
+# Names repeat a lot, so each distinct word is converted once
+@lru_cache(maxsize=65536)
+def phonetic_word(word: str) -> str:
+    """Sound key of one folded word: 'sousa' and 'souza', 'felipe' and 'phelippe' agree"""
+    for pattern, replacement in _PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    return word
+
+def phonetic_key(name: str) -> str:
+    """Sound key of a full name, ignoring accents, case and particles"""
+    return ' '.join(phonetic_word(word) for word in fold_text(name).split() if word not in NAME_PARTICLES)
+
+def email_key(email: str) -> str:
+    """Email with the local part's dots and +tag removed ('jo.ao+loja@x.com' -> 'joao@x.com')"""
+    local, _, domain = (email or '').strip().lower().partition('@')
+    return f"{local.split('+', 1)[0].replace('.', '')}@{domain}" if domain else ''
+
+def customer_record(row) -> Tuple:
+    """(id, folded name, phonetic key, email key, phone digits, CPF digits) of a customers row"""
+    name = row['name_key'] or fold_text(row['name'])
+    return (row['id'], name, phonetic_key(name), email_key(row['email']), row['phone_digits'] or '',
+            digits_only(row['cpf']))
+
+def blocking_keys(record: Tuple) -> List[Tuple[str, str]]:
+    """(kind, value) keys under which a record is compared with others"""
+    _, _, phonetic, email, phone, cpf = record
+    keys = []
+    if len(cpf) == 11:
+        keys.append(('cpf', cpf))
+    if email:
+        keys.append(('email', email))
+    if len(phone) >= 10:
+        keys.append(('phone', phone))
+    if phonetic:
+        keys.append(('name', phonetic))
+    return keys
+
+def score_pair(a: Tuple, b: Tuple) -> Tuple[float, List[str]]:
+    """Likelihood (0 to 1) that two customer records are one person, and the fields that agree.
+    
+    Two different CPFs mean two people, whatever else agrees.
+    """
+    _, name_a, phonetic_a, email_a, phone_a, cpf_a = a
+    _, name_b, phonetic_b, email_b, phone_b, cpf_b = b
+    if cpf_a and cpf_b and cpf_a != cpf_b:
+        return 0.0, []
+    score = 0.0
+    reasons = []
+    if cpf_a and cpf_a == cpf_b:
+        score += WEIGHTS['cpf']
+        reasons.append('cpf')
+    if phone_a and phone_a == phone_b:
+        score += WEIGHTS['phone']
+        reasons.append('phone')
+    # Emails differing in a number ('ana.silva1@', 'ana.silva2@') belong to different people
+    if email_a and email_b and (email_a == email_b or digits_only(email_a) == digits_only(email_b)):
+        similarity = 1.0 if email_a == email_b else SequenceMatcher(None, email_a, email_b).ratio()
+        if similarity >= 0.85:
+            score += WEIGHTS['email'] * similarity
+            reasons.append('email')
+    similarity = 1.0 if name_a == name_b else SequenceMatcher(None, name_a, name_b).ratio()
+    if phonetic_a == phonetic_b:
+        # Spelling variants of the same sounds ('Luiz Souza', 'Luis Sousa')
+        similarity = max(similarity, 0.9)
+    if similarity >= 0.8:
+        score += WEIGHTS['name'] * similarity
+        reasons.append('name')
+    elif similarity < 0.5:
+        # Clearly different names weigh against a shared phone or email
+        score -= WEIGHTS['name'] / 2
+    return max(0.0, min(1.0, score)), reasons
+
+def _groups(pairs: List[Dict], cpfs: Dict[int, str]) -> List[List[int]]:
+    """Connected customer ids of the pairs (union-find), each sorted, largest groups first.
+    
+    Pairs are joined best first, and never into a group holding another
+    CPF: A ~ B and B ~ C must not merge A and C when their CPFs differ.
+    """
+    parent = {}
+    # Root -> the CPF of its group ('' while none of its members has one)
+    group_cpf = {}
+    
+    def find(node):
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    
+    for pair in pairs:
+        first, second = find(pair['ids'][0]), find(pair['ids'][1])
+        if first == second:
+            continue
+        cpf_first = group_cpf.get(first, cpfs.get(first, ''))
+        cpf_second = group_cpf.get(second, cpfs.get(second, ''))
+        if cpf_first and cpf_second and cpf_first != cpf_second:
+            continue
+        root = min(first, second)
+        parent[max(first, second)] = root
+        group_cpf[root] = cpf_first or cpf_second
+    groups = {}
+    for node in parent:
+        groups.setdefault(find(node), []).append(node)
+    # A customer whose every pair was refused is left on its own: no group
+    return sorted((sorted(members) for members in groups.values() if len(members) > 1),
+                  key=lambda members: (-len(members), members))
+
+def find_duplicates(db, threshold: float = DEFAULT_THRESHOLD, max_block_size: int = MAX_BLOCK_SIZE,
+                    progress: Callable[[float, str], None] = None) -> Dict:
+    """Likely duplicate customers of ``db``.
+    
+    Returns ``pairs`` (ids, score and agreeing fields, best first),
+    ``groups`` (sorted id lists, the first being the customer to keep) and
+    ``stats`` (customers, blocks, skipped blocks, pairs compared, seconds).
+    ``progress(fraction, message)`` is called while comparing.
+    """
+    start = time.perf_counter()
+    records = {}
+    blocks: Dict[Tuple[str, str], List[int]] = {}
+    with db.get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, name, name_key, email, phone_digits, cpf FROM customers')
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for row in rows:
+                record = customer_record(row)
+                records[record[0]] = record
+                for key in blocking_keys(record):
+                    blocks.setdefault(key, []).append(record[0])
+    
+    compared = set()
+    pairs = []
+    skipped = 0
+    candidate_blocks = [ids for ids in blocks.values() if len(ids) > 1]
+    for number, ids in enumerate(candidate_blocks):
+        if len(ids) > max_block_size:
+            skipped += 1
+            continue
+        for i, first in enumerate(ids):
+            for second in ids[i + 1:]:
+                pair = (first, second) if first < second else (second, first)
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                score, reasons = score_pair(records[pair[0]], records[pair[1]])
+                if score >= threshold:
+                    pairs.append({'ids': pair, 'score': round(score, 3), 'reasons': reasons})
+        if progress and number % 1000 == 0:
+            progress(number / len(candidate_blocks), "Comparando candidatos")
+    
+    pairs.sort(key=lambda pair: (-pair['score'], pair['ids']))
+    return {
+        'pairs': pairs,
+        'groups': _groups(pairs, {customer_id: record[5] for customer_id, record in records.items()}),
+        'stats': {'customers': len(records), 'blocks': len(candidate_blocks), 'skipped_blocks': skipped,
+                  'compared': len(compared), 'seconds': round(time.perf_counter() - start, 2)},
+    }
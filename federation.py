@@ -0,0 +1,228 @@
+"""
+Federated queries over several store databases.
+
+Each branch keeps its own dealership.db for fast local writes; head office
+opens them all through a FederatedDatabase, which runs the same query on
+every store in parallel threads (sqlite3 releases the GIL while a query
+runs) and merges the results in Python. Rows returned by federated queries
+carry a ``store`` key naming the database they came from.
+
+Ids are made globally unique by giving every store its own id range: store
+``k`` allocates ids from ``k << SHARD_ID_BITS`` upwards, so the owning store
+of any row can be read from its id.
+
+Usage (from the project root):
+    python main.py stores --store centro=data/centro.db --store norte=data/norte.db summary
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+
+from contention import retry_on_busy
+from database import DatabaseManager
+from settings import get_settings
+
+# Ids below 2**40 per store: room for a trillion rows per table and
+# millions of stores within SQLite's 64-bit integer keys
+SHARD_ID_BITS = 40
+
+SHARDED_TABLES = ('vehicles', 'customers', 'sales', 'employees')
+
+class FederationError(Exception):
+    """Raised when a federated query fails on every store"""
+
+def shard_of(row_id: int) -> int:
+    """Store index that allocated ``row_id`` (0 for ids from before sharding)"""
+    return row_id >> SHARD_ID_BITS
+
+def get_shard_index(db: DatabaseManager) -> Optional[int]:
+    """Id range a store database allocates from, or None if not configured"""
+    # No commit: inside configure_shard this read is part of its write transaction
+    cursor = db.get_connection().cursor()
+    cursor.execute(f'''
+        SELECT MAX(seq) FROM sqlite_sequence
+        WHERE name IN ({', '.join('?' * len(SHARDED_TABLES))})
+    ''', SHARDED_TABLES)
+    seq = cursor.fetchone()[0] or 0
+    index = shard_of(seq)
+    return index or None
+
+@retry_on_busy
+def configure_shard(db: DatabaseManager, shard_index: int):
+    """Make a store allocate new ids from its own range.
+    
+    AUTOINCREMENT continues from sqlite_sequence, so raising it to the start
+    of the range is enough; ids already in use are left as they are. The
+    check and the update share one write transaction.
+    """
+    if shard_index < 1:
+        raise ValueError("shard_index deve ser maior que zero")
+    start = shard_index << SHARD_ID_BITS
+    with db.write_transaction() as conn:
+        current = get_shard_index(db)
+        if current is not None and current != shard_index:
+            raise ValueError(f"a base {db.db_path} já usa a faixa de ids {current}")
+        cursor = conn.cursor()
+        for table in SHARDED_TABLES:
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,))
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table, start))
+            elif row[0] < start:
+                cursor.execute('UPDATE sqlite_sequence SET seq = ? WHERE name = ?', (start, table))
+
+class FederatedDatabase:
+    """Read-only view over several store databases queried in parallel"""
+    
+    def __init__(self, stores: Dict[str, Union[str, DatabaseManager]], max_workers: int = None):
+        if not stores:
+            raise ValueError("informe ao menos uma loja")
+        self.stores = {}
+        # Stores whose file is missing (mistyped path, unmounted share): never
+        # created empty, left out of every query and reported in last_errors
+        self.unavailable: Dict[str, Exception] = {}
+        for name, db in stores.items():
+            if isinstance(db, DatabaseManager):
+                self.stores[name] = db
+            elif os.path.exists(db):
+                self.stores[name] = DatabaseManager(db)
+            else:
+                self.unavailable[name] = FileNotFoundError(f"base de dados não encontrada: {db}")
+        if not self.stores:
+            name, error = next(iter(self.unavailable.items()))
+            raise FederationError(f"nenhuma loja disponível ({name}: {error})")
+        workers = max_workers or get_settings().store_workers or len(self.stores)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='federation')
+        # Stores that failed during the last federated call (or are unavailable), with the error
+        self.last_errors: Dict[str, Exception] = dict(self.unavailable)
+    
+    def close(self):
+        self.executor.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _map(self, func: Callable[[DatabaseManager], object], stores=None) -> Dict[str, object]:
+        """Run func on every store in parallel; returns {store: result}.
+        
+        A store that fails is left out of the result and recorded in
+        ``last_errors``, so one unreachable branch does not hide the others.
+        """
+        names = list(stores or self.stores)
+        futures = {name: self.executor.submit(func, self.stores[name]) for name in names}
+        results = {}
+        self.last_errors = dict(self.unavailable)
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                self.last_errors[name] = e
+        if not results and self.last_errors:
+            name, error = next(iter(self.last_errors.items()))
+            raise FederationError(f"consulta falhou em todas as lojas ({name}: {error})") from error
+        return results
+    
+    @staticmethod
+    def _tag(rows: List[Dict], store: str) -> List[Dict]:
+        for row in rows:
+            row['store'] = store
+        return rows
+    
+    # Id ranges
+    def configure_id_ranges(self) -> Dict[str, int]:
+        """Give every store without an id range the lowest free one; returns {store: index}"""
+        indexes = {name: get_shard_index(db) for name, db in self.stores.items()}
+        used = {index for index in indexes.values() if index is not None}
+        next_index = 1
+        for name, index in indexes.items():
+            if index is None:
+                while next_index in used:
+                    next_index += 1
+                configure_shard(self.stores[name], next_index)
+                indexes[name] = next_index
+                used.add(next_index)
+        return indexes
+    
+    def store_for_id(self, row_id: int) -> Optional[str]:
+        """Name of the store whose id range contains row_id, if known"""
+        index = shard_of(row_id)
+        if index == 0:
+            return None
+        for name, db in self.stores.items():
+            if get_shard_index(db) == index:
+                return name
+        return None
+    
+    # Vehicles
+    def get_vehicles(self, status: str = None) -> List[Dict]:
+        results = self._map(lambda db: db.get_vehicles(status))
+        return [row for name, rows in results.items() for row in self._tag(rows, name)]
+    
+    def get_vehicle(self, vehicle_id: int, store: str = None) -> Optional[Dict]:
+        """Look a vehicle up by id in its owning store, or in every store if unknown"""
+        store = store or self.store_for_id(vehicle_id)
+        results = self._map(lambda db: db.get_vehicle_by_id(vehicle_id),
+                            stores=[store] if store else None)
+        for name, vehicle in results.items():
+            if vehicle:
+                vehicle['store'] = name
+                return vehicle
+        return None
+    
+    def find_vehicle_everywhere(self, vehicle_id: int) -> List[Dict]:
+        """Every store's vehicle with this id (ids from before sharding may repeat)"""
+        results = self._map(lambda db: db.get_vehicle_by_id(vehicle_id))
+        return [dict(vehicle, store=name) for name, vehicle in results.items() if vehicle]
+    
+    def search_vehicles(self, query: str) -> List[Dict]:
+        results = self._map(lambda db: db.search_vehicles(query))
+        return [row for name, rows in results.items() for row in self._tag(rows, name)]
+    
+    def search_vehicles_faceted(self, limit: int = 100, offset: int = 0, **filters) -> Dict:
+        """search_vehicles_faceted across all stores.
+        
+        Totals and facet counts are summed; the page is taken from the
+        newest vehicles of all stores combined. ``by_store`` holds each
+        store's total.
+        """
+        results = self._map(lambda db: db.search_vehicles_faceted(limit=limit + offset, offset=0, **filters))
+        
+        total = 0
+        facets = {column: {} for column in DatabaseManager.VEHICLE_FACETS}
+        vehicles = []
+        for name, result in results.items():
+            total += result['total']
+            for column, counts in result['facets'].items():
+                merged = facets[column]
+                for value, count in counts.items():
+                    merged[value] = merged.get(value, 0) + count
+            vehicles.extend(self._tag(result['vehicles'], name))
+        
+        vehicles.sort(key=lambda vehicle: vehicle['created_at'] or '', reverse=True)
+        return {
+            'vehicles': vehicles[offset:offset + limit],
+            'total': total,
+            'facets': facets,
+            'by_store': {name: result['total'] for name, result in results.items()},
+        }
+    
+    # Sales and summaries
+    def get_sales(self) -> List[Dict]:
+        results = self._map(lambda db: db.get_sales())
+        sales = [row for name, rows in results.items() for row in self._tag(rows, name)]
+        sales.sort(key=lambda sale: sale['sale_date'] or '', reverse=True)
+        return sales
+    
+    def get_sales_summary(self) -> Dict:
+        """get_sales_summary() summed over all stores, with the per-store figures under ``by_store``"""
+        results = self._map(lambda db: db.get_sales_summary())
+        summary = {'total_sales': 0, 'total_revenue': 0.0, 'available_vehicles': 0, 'total_customers': 0}
+        for result in results.values():
+            for key in summary:
+                summary[key] += result.get(key) or 0
+        summary['by_store'] = results
+        return summary
@@ -1,11 +1,41 @@
+import sqlite3
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from database import DatabaseManager
+from jobs import JOB_TYPES, STATUS_LABELS, JobQueue, JobRunner
+from offline import OFFLINE_NOTICE
+from paging import PagedSource
+from validation import FUEL_TYPES, PAYMENT_METHODS, TRANSMISSIONS, ValidationError, validate
 import threading
 
 class GUIInterface:
-    def __init__(self):
-        self.db = DatabaseManager()
+    CUSTOMER_SEARCH_MODES = {
+        "Nome": 'name_prefix',
+        "CPF": 'cpf',
+        "Email": 'email',
+        "Telefone": 'phone'
+    }
+    
+    # Revenue report dimensions as typed by the user -> reports.REPORT_DIMENSIONS key
+    REPORT_DIMENSION_LABELS = {'marca': 'brand', 'modelo': 'model', 'ano': 'year',
+                               'mes': 'month', 'pagamento': 'payment_method'}
+    
+    # Listings that can be exported -> paging.SOURCES name
+    EXPORT_SOURCES = {"Veículos": 'vehicles', "Clientes": 'customers', "Vendas": 'sales',
+                      "Funcionários": 'employees'}
+    
+    # How often the jobs screen re-reads the queue
+    JOBS_REFRESH_MS = 1000
+    
+    def __init__(self, db: DatabaseManager = None):
+        self.db = db or DatabaseManager()
+        # Heavy work runs in background jobs so the Tk loop never blocks
+        self.job_queue = JobQueue(self.db)
+        self.job_runner = JobRunner(self.db)
+        self.job_runner.start()
+        # Created on first use, then only refreshed when sales changed
+        self.pricing = None
         self.root = tk.Tk()
         self.root.title("Sistema de Concessionária")
         self.root.geometry("1200x800")
@@ -45,7 +75,8 @@ class GUIInterface:
             ("Vendas", self.show_sales),
             ("Funcionários", self.show_employees),
             ("Relatórios", self.show_reports),
-            ("Buscar", self.show_search)
+            ("Buscar", self.show_search),
+            ("Tarefas", self.show_jobs)
         ]
         
         for i, (text, command) in enumerate(buttons, 1):
@@ -88,45 +119,37 @@ class GUIInterface:
         ttk.Button(btn_frame, text="Remover Selecionado", 
                   command=self.delete_vehicle_dialog).pack(side=tk.LEFT)
         
-        # Treeview for vehicles
-        columns = ('ID', 'Marca', 'Modelo', 'Ano', 'Cor', 'Preço', 'Status')
-        self.vehicles_tree = ttk.Treeview(self.content_frame, columns=columns, show='headings')
-        
-        for col in columns:
-            self.vehicles_tree.heading(col, text=col)
-            self.vehicles_tree.column(col, width=100)
-        
-        self.vehicles_tree.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, 
-                                 command=self.vehicles_tree.yview)
-        scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S))
-        self.vehicles_tree.configure(yscrollcommand=scrollbar.set)
+        # Treeview for vehicles, paged and sorted in SQL
+        columns = (('id', 'ID'), ('brand', 'Marca'), ('model', 'Modelo'), ('year', 'Ano'),
+                   ('color', 'Cor'), ('price', 'Preço'), ('status', 'Status'))
+        self.vehicles_pager = PagedTree(
+            self.content_frame, PagedSource(self.db, 'vehicles', PagedTree.PAGE_SIZE), columns,
+            lambda vehicle: (vehicle['id'], vehicle['brand'], vehicle['model'],
+                             vehicle['year'], vehicle['color'], f"R${vehicle['price']:.2f}",
+                             vehicle['status']),
+            row=2, width=100)
+        self.vehicles_tree = self.vehicles_pager.tree
         
         self.refresh_vehicles()
     
+    def saved_offline(self, row_id: int) -> bool:
+        """Tell the user a write went to the offline journal (provisional negative id)"""
+        if row_id is not None and row_id < 0:
+            messagebox.showinfo("Modo offline", f"{OFFLINE_NOTICE}\nID provisório: {row_id}")
+            return True
+        return False
+    
     def refresh_vehicles(self):
         """Refresh vehicles list"""
-        # Clear existing items
-        for item in self.vehicles_tree.get_children():
-            self.vehicles_tree.delete(item)
-        
-        # Load vehicles
-        vehicles = self.db.get_vehicles()
-        for vehicle in vehicles:
-            self.vehicles_tree.insert('', tk.END, values=(
-                vehicle['id'], vehicle['brand'], vehicle['model'], 
-                vehicle['year'], vehicle['color'], f"R${vehicle['price']:.2f}", 
-                vehicle['status']
-            ))
+        self.vehicles_pager.refresh()
     
     def add_vehicle_dialog(self):
         """Show add vehicle dialog"""
         dialog = VehicleDialog(self.root, "Adicionar Veículo")
         if dialog.result:
             try:
-                self.db.add_vehicle(**dialog.result)
+                if self.saved_offline(self.db.add_vehicle(**dialog.result)):
+                    return
                 messagebox.showinfo("Sucesso", "Veículo adicionado com sucesso!")
                 self.refresh_vehicles()
             except Exception as e:
@@ -195,46 +218,63 @@ class GUIInterface:
         ttk.Button(btn_frame, text="Editar Selecionado", 
                   command=self.edit_customer_dialog).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(btn_frame, text="Remover Selecionado", 
-                  command=self.delete_customer_dialog).pack(side=tk.LEFT)
-        
-        # Treeview for customers
-        columns = ('ID', 'Nome', 'Email', 'Telefone', 'CPF')
-        self.customers_tree = ttk.Treeview(self.content_frame, columns=columns, show='headings')
-        
-        for col in columns:
-            self.customers_tree.heading(col, text=col)
-            self.customers_tree.column(col, width=150)
-        
-        self.customers_tree.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, 
-                                 command=self.customers_tree.yview)
-        scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S))
-        self.customers_tree.configure(yscrollcommand=scrollbar.set)
+                  command=self.delete_customer_dialog).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(btn_frame, text="Histórico", 
+                  command=self.customer_history_dialog).pack(side=tk.LEFT)
+        
+        # Customer search (name prefix, CPF, email or phone)
+        ttk.Button(btn_frame, text="Buscar", 
+                  command=self.perform_customer_search).pack(side=tk.RIGHT)
+        self.customer_search_var = tk.StringVar()
+        search_entry = ttk.Entry(btn_frame, textvariable=self.customer_search_var, width=20)
+        search_entry.pack(side=tk.RIGHT, padx=(0, 5))
+        search_entry.bind('<Return>', lambda e: self.perform_customer_search())
+        self.customer_search_mode = ttk.Combobox(btn_frame, values=list(self.CUSTOMER_SEARCH_MODES),
+                                                 width=10, state="readonly")
+        self.customer_search_mode.set("Nome")
+        self.customer_search_mode.pack(side=tk.RIGHT, padx=(0, 5))
+        
+        # Treeview for customers, paged and sorted in SQL
+        columns = (('id', 'ID'), ('name', 'Nome'), ('email', 'Email'), ('phone', 'Telefone'), ('cpf', 'CPF'))
+        self.customers_pager = PagedTree(
+            self.content_frame, PagedSource(self.db, 'customers', PagedTree.PAGE_SIZE), columns,
+            self.customer_values, row=2, width=150)
+        self.customers_tree = self.customers_pager.tree
         
         self.refresh_customers()
     
+    @staticmethod
+    def customer_values(customer):
+        return (customer['id'], customer['name'], customer['email'],
+                customer['phone'], customer.get('cpf') or '')
+    
     def refresh_customers(self):
         """Refresh customers list"""
-        # Clear existing items
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
+        self.customers_pager.refresh()
+    
+    def perform_customer_search(self):
+        """Search customers using the selected mode"""
+        term = self.customer_search_var.get().strip()
+        if not term:
+            self.refresh_customers()
+            return
         
-        # Load customers
-        customers = self.db.get_customers()
-        for customer in customers:
-            self.customers_tree.insert('', tk.END, values=(
-                customer['id'], customer['name'], customer['email'], 
-                customer['phone'], customer.get('cpf', '')
-            ))
+        mode = self.CUSTOMER_SEARCH_MODES[self.customer_search_mode.get()]
+        customers = self.db.find_customers(**{mode: term})
+        
+        # Search results replace the page until a heading or "Atualizar" is clicked
+        self.customers_pager.show_rows(customers, f"{len(customers)} cliente(s) encontrado(s)")
+        
+        if not customers:
+            messagebox.showinfo("Resultado", "Nenhum cliente encontrado.")
     
     def add_customer_dialog(self):
         """Show add customer dialog"""
         dialog = CustomerDialog(self.root, "Adicionar Cliente")
         if dialog.result:
             try:
-                self.db.add_customer(**dialog.result)
+                if self.saved_offline(self.db.add_customer(**dialog.result)):
+                    return
                 messagebox.showinfo("Sucesso", "Cliente adicionado com sucesso!")
                 self.refresh_customers()
             except Exception as e:
@@ -283,6 +323,22 @@ class GUIInterface:
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao remover cliente: {e}")
     
+    def customer_history_dialog(self):
+        """Show purchase history of the selected customer"""
+        selection = self.customers_tree.selection()
+        if not selection:
+            messagebox.showwarning("Aviso", "Selecione um cliente para ver o histórico.")
+            return
+        
+        item = self.customers_tree.item(selection[0])
+        history = self.db.get_customer_history(item['values'][0], include_archive=True)
+        
+        if not history:
+            messagebox.showerror("Erro", "Cliente não encontrado!")
+            return
+        
+        CustomerHistoryDialog(self.root, history)
+    
     def show_sales(self):
         """Show sales management interface"""
         self.clear_content()
@@ -301,50 +357,42 @@ class GUIInterface:
         ttk.Button(btn_frame, text="Atualizar", 
                   command=self.refresh_sales).pack(side=tk.LEFT)
         
-        # Treeview for sales
-        columns = ('ID', 'Cliente', 'Veículo', 'Preço', 'Data', 'Pagamento')
-        self.sales_tree = ttk.Treeview(self.content_frame, columns=columns, show='headings')
-        
-        for col in columns:
-            self.sales_tree.heading(col, text=col)
-            self.sales_tree.column(col, width=150)
-        
-        self.sales_tree.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, 
-                                 command=self.sales_tree.yview)
-        scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S))
-        self.sales_tree.configure(yscrollcommand=scrollbar.set)
+        # Treeview for sales, paged and sorted in SQL ("Veículo" sorts by brand)
+        columns = (('id', 'ID'), ('customer_name', 'Cliente'), ('brand', 'Veículo'), ('sale_price', 'Preço'),
+                   ('sale_date', 'Data'), ('payment_method', 'Pagamento'), ('employee_name', 'Vendedor'))
+        self.sales_pager = PagedTree(
+            self.content_frame, PagedSource(self.db, 'sales', PagedTree.PAGE_SIZE), columns,
+            lambda sale: (sale['id'], sale['customer_name'], f"{sale['brand']} {sale['model']} {sale['year']}",
+                          f"R${sale['sale_price']:.2f}", (sale['sale_date'] or '')[:10],
+                          sale['payment_method'], sale['employee_name'] or ''),
+            row=2, width=130)
+        self.sales_tree = self.sales_pager.tree
         
         self.refresh_sales()
     
     def refresh_sales(self):
         """Refresh sales list"""
-        # Clear existing items
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
-        
-        # Load sales
-        sales = self.db.get_sales()
-        for sale in sales:
-            vehicle_info = f"{sale['brand']} {sale['model']} {sale['year']}"
-            self.sales_tree.insert('', tk.END, values=(
-                sale['id'], sale['customer_name'], vehicle_info,
-                f"R${sale['sale_price']:.2f}", sale['sale_date'][:10], 
-                sale['payment_method']
-            ))
+        self.sales_pager.refresh()
+    
+    def pricing_engine(self):
+        """The interface's pricing engine, up to date with the recorded sales"""
+        if self.pricing is None:
+            from pricing import PricingEngine
+            self.pricing = PricingEngine(self.db)
+        self.pricing.refresh_if_stale()
+        return self.pricing
     
     def add_sale_dialog(self):
         """Show add sale dialog"""
-        dialog = SaleDialog(self.root, self.db)
+        dialog = SaleDialog(self.root, self.db, self.pricing_engine)
         if dialog.result:
             try:
-                self.db.add_sale(**dialog.result)
+                if self.saved_offline(self.db.add_sale(**dialog.result)):
+                    return
                 messagebox.showinfo("Sucesso", "Venda registrada com sucesso!")
                 self.refresh_sales()
                 # Refresh vehicles if showing vehicles
-                if hasattr(self, 'vehicles_tree'):
+                if hasattr(self, 'vehicles_tree') and self.vehicles_tree.winfo_exists():
                     self.refresh_vehicles()
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao registrar venda: {e}")
@@ -365,40 +413,24 @@ class GUIInterface:
         ttk.Button(btn_frame, text="Adicionar Funcionário", 
                   command=self.add_employee_dialog).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(btn_frame, text="Atualizar", 
-                  command=self.refresh_employees).pack(side=tk.LEFT)
-        
-        # Treeview for employees
-        columns = ('ID', 'Nome', 'Email', 'Cargo', 'Salário')
-        self.employees_tree = ttk.Treeview(self.content_frame, columns=columns, show='headings')
-        
-        for col in columns:
-            self.employees_tree.heading(col, text=col)
-            self.employees_tree.column(col, width=150)
-        
-        self.employees_tree.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, 
-                                 command=self.employees_tree.yview)
-        scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S))
-        self.employees_tree.configure(yscrollcommand=scrollbar.set)
+                  command=self.refresh_employees).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(btn_frame, text="Ranking de Vendedores", 
+                  command=lambda: LeaderboardDialog(self.root, self.db)).pack(side=tk.LEFT)
+        
+        # Treeview for employees, paged and sorted in SQL
+        columns = (('id', 'ID'), ('name', 'Nome'), ('email', 'Email'), ('position', 'Cargo'), ('salary', 'Salário'))
+        self.employees_pager = PagedTree(
+            self.content_frame, PagedSource(self.db, 'employees', PagedTree.PAGE_SIZE), columns,
+            lambda employee: (employee['id'], employee['name'], employee['email'], employee['position'],
+                              f"R${employee['salary']:.2f}" if employee['salary'] else "N/A"),
+            row=2, width=150)
+        self.employees_tree = self.employees_pager.tree
         
         self.refresh_employees()
     
     def refresh_employees(self):
         """Refresh employees list"""
-        # Clear existing items
-        for item in self.employees_tree.get_children():
-            self.employees_tree.delete(item)
-        
-        # Load employees
-        employees = self.db.get_employees()
-        for employee in employees:
-            salary_str = f"R${employee['salary']:.2f}" if employee['salary'] else "N/A"
-            self.employees_tree.insert('', tk.END, values=(
-                employee['id'], employee['name'], employee['email'], 
-                employee['position'], salary_str
-            ))
+        self.employees_pager.refresh()
     
     def add_employee_dialog(self):
         """Show add employee dialog"""
@@ -458,53 +490,375 @@ class GUIInterface:
         self.search_var = tk.StringVar()
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side=tk.LEFT, padx=(10, 5))
-        ttk.Button(search_frame, text="Buscar", command=self.perform_search).pack(side=tk.LEFT)
-        
-        # Results treeview
-        columns = ('ID', 'Marca', 'Modelo', 'Ano', 'Cor', 'Preço', 'Status')
-        self.search_tree = ttk.Treeview(self.content_frame, columns=columns, show='headings')
-        
-        for col in columns:
-            self.search_tree.heading(col, text=col)
-            self.search_tree.column(col, width=100)
-        
-        self.search_tree.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        ttk.Button(search_frame, text="Buscar", command=self.perform_search).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(search_frame, text="Limpar Filtros", command=self.clear_search_filters).pack(side=tk.LEFT)
+        
+        # Filters frame (ranges and facets)
+        filters_frame = ttk.LabelFrame(self.content_frame, text="Filtros", padding="5")
+        filters_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        self.search_ranges = {}
+        ranges = [("Ano:", 'year'), ("Preço:", 'price'), ("Km:", 'mileage')]
+        for i, (label, field) in enumerate(ranges):
+            ttk.Label(filters_frame, text=label).grid(row=i, column=0, sticky=tk.W, pady=2)
+            low = ttk.Entry(filters_frame, width=10)
+            low.grid(row=i, column=1, padx=(5, 2), pady=2)
+            ttk.Label(filters_frame, text="até").grid(row=i, column=2)
+            high = ttk.Entry(filters_frame, width=10)
+            high.grid(row=i, column=3, padx=(2, 15), pady=2)
+            self.search_ranges[field] = (low, high)
+        
+        self.search_facets = {}
+        facets = [("Combustível:", 'fuel_type'), ("Transmissão:", 'transmission'),
+                  ("Status:", 'status'), ("Marca:", 'brand')]
+        for i, (label, field) in enumerate(facets):
+            ttk.Label(filters_frame, text=label).grid(row=i, column=4, sticky=tk.W, pady=2)
+            combo = ttk.Combobox(filters_frame, width=18, state="readonly")
+            combo.grid(row=i, column=5, padx=(5, 0), pady=2)
+            combo.bind('<<ComboboxSelected>>', lambda e: self.perform_search())
+            self.search_facets[field] = combo
+        
+        self.search_summary = ttk.Label(self.content_frame, text="")
+        self.search_summary.grid(row=3, column=0, sticky=tk.W, pady=(0, 5))
+        
+        # Results treeview; headings sort the matches in SQL
+        self.search_columns = (('id', 'ID'), ('brand', 'Marca'), ('model', 'Modelo'), ('year', 'Ano'),
+                               ('color', 'Cor'), ('price', 'Preço'), ('mileage', 'Km'),
+                               ('fuel_type', 'Combustível'), ('transmission', 'Transmissão'), ('status', 'Status'))
+        self.search_tree = ttk.Treeview(self.content_frame, columns=[heading for _, heading in self.search_columns],
+                                        show='headings')
+        
+        for column, heading in self.search_columns:
+            self.search_tree.heading(heading, text=heading, command=lambda c=column: self.sort_search(c))
+            self.search_tree.column(heading, width=90)
+        
+        self.search_tree.grid(row=4, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Scrollbar
         scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, 
                                  command=self.search_tree.yview)
-        scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S))
+        scrollbar.grid(row=4, column=1, sticky=(tk.N, tk.S))
         self.search_tree.configure(yscrollcommand=scrollbar.set)
         
+        # Result pages
+        nav_frame = ttk.Frame(self.content_frame)
+        nav_frame.grid(row=5, column=0, sticky=tk.W, pady=(5, 0))
+        self.search_prev = ttk.Button(nav_frame, text="< Anterior",
+                                      command=lambda: self.perform_search(self.search_page - 1))
+        self.search_prev.pack(side=tk.LEFT)
+        self.search_next = ttk.Button(nav_frame, text="Próxima >",
+                                      command=lambda: self.perform_search(self.search_page + 1))
+        self.search_next.pack(side=tk.LEFT, padx=(5, 0))
+        
+        self.search_sort = ('created_at', True)
+        self.search_page = 0
+        
         # Bind Enter key to search
         search_entry.bind('<Return>', lambda e: self.perform_search())
+        
+        self.perform_search()
+    
+    def sort_search(self, column):
+        """Sort search results by a column; clicking it again reverses the order"""
+        sort, descending = self.search_sort
+        self.search_sort = (column, not descending if column == sort else False)
+        self.perform_search()
+    
+    def clear_search_filters(self):
+        """Reset all search filters"""
+        self.search_var.set("")
+        for low, high in self.search_ranges.values():
+            low.delete(0, tk.END)
+            high.delete(0, tk.END)
+        for combo in self.search_facets.values():
+            combo.set("")
+        self.perform_search()
     
-    def perform_search(self):
-        """Perform vehicle search"""
-        query = self.search_var.get().strip()
-        if not query:
-            messagebox.showwarning("Aviso", "Digite um termo para buscar.")
+    def perform_search(self, page: int = 0):
+        """Perform faceted vehicle search"""
+        filters = {'query': self.search_var.get().strip() or None}
+        
+        try:
+            for field, (low, high) in self.search_ranges.items():
+                cast = float if field == 'price' else int
+                if low.get().strip():
+                    filters[f'{field}_min'] = cast(low.get().strip())
+                if high.get().strip():
+                    filters[f'{field}_max'] = cast(high.get().strip())
+        except ValueError:
+            messagebox.showerror("Erro", "Verifique os valores numéricos dos filtros!")
             return
         
+        for field, combo in self.search_facets.items():
+            value = combo.get()
+            if value:
+                # Facet values are shown as "Value (count)"
+                filters[field] = value.rsplit(' (', 1)[0]
+        
+        sort, descending = self.search_sort
+        page = max(0, page)
+        result = self.db.search_vehicles_faceted(**filters, sort=sort, descending=descending,
+                                                 limit=PagedTree.PAGE_SIZE, offset=page * PagedTree.PAGE_SIZE)
+        self.search_page = page
+        PagedTree.mark_sorted(self.search_tree, self.search_columns, sort, descending)
+        
         # Clear existing items
         for item in self.search_tree.get_children():
             self.search_tree.delete(item)
         
-        # Search vehicles
-        vehicles = self.db.search_vehicles(query)
-        for vehicle in vehicles:
+        for vehicle in result['vehicles']:
             self.search_tree.insert('', tk.END, values=(
                 vehicle['id'], vehicle['brand'], vehicle['model'], 
                 vehicle['year'], vehicle['color'], f"R${vehicle['price']:.2f}", 
+                vehicle['mileage'], vehicle['fuel_type'], vehicle['transmission'],
                 vehicle['status']
             ))
         
-        if not vehicles:
-            messagebox.showinfo("Resultado", "Nenhum veículo encontrado.")
+        # Refresh facet choices; a facet's counts ignore its own selection, so switching values stays possible
+        for field, combo in self.search_facets.items():
+            counts = sorted(result['facets'][field].items(), key=lambda item: -item[1])
+            combo['values'] = [""] + [f"{value} ({count})" for value, count in counts]
+            if filters.get(field):
+                combo.set(f"{filters[field]} ({result['facets'][field].get(filters[field], 0)})")
+        
+        shown = len(result['vehicles'])
+        first = page * PagedTree.PAGE_SIZE
+        self.search_summary.configure(
+            text=f"{result['total']} veículo(s) encontrado(s)"
+                 + (f" - exibindo {first + 1} a {first + shown}" if shown < result['total'] else ""))
+        self.search_prev.state(['!disabled'] if page > 0 else ['disabled'])
+        self.search_next.state(['!disabled'] if first + shown < result['total'] else ['disabled'])
+    
+    def show_jobs(self):
+        """Show background jobs: submit them and follow their progress"""
+        self.clear_content()
+        
+        # Title
+        title = ttk.Label(self.content_frame, text="Tarefas em Segundo Plano", 
+                         font=('Arial', 14, 'bold'))
+        title.grid(row=0, column=0, pady=(0, 10), sticky=tk.W)
+        
+        # New jobs
+        submit_frame = ttk.Frame(self.content_frame)
+        submit_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        
+        ttk.Button(submit_frame, text="Backup", 
+                  command=lambda: self.submit_job('backup')).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(submit_frame, text="Arquivar Antigos", 
+                  command=self.submit_archive_job).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(submit_frame, text="Relatório de Receita", 
+                  command=self.submit_report_job).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(submit_frame, text="Modelo de Preços", 
+                  command=lambda: self.submit_job('pricing')).pack(side=tk.LEFT, padx=(0, 15))
+        self.export_source = ttk.Combobox(submit_frame, values=list(self.EXPORT_SOURCES), width=12,
+                                          state="readonly")
+        self.export_source.set("Veículos")
+        self.export_source.pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(submit_frame, text="Exportar CSV", 
+                  command=self.submit_export_job).pack(side=tk.LEFT)
+        
+        # Actions on the selected job
+        btn_frame = ttk.Frame(self.content_frame)
+        btn_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Button(btn_frame, text="Detalhes", 
+                  command=self.show_job_details).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(btn_frame, text="Cancelar Selecionada", 
+                  command=self.cancel_job).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(btn_frame, text="Repetir Selecionada", 
+                  command=self.retry_job).pack(side=tk.LEFT)
+        
+        # Treeview for jobs
+        columns = ('ID', 'Tipo', 'Status', 'Progresso', 'Tentativas', 'Criada em', 'Situação')
+        self.jobs_tree = ttk.Treeview(self.content_frame, columns=columns, show='headings', height=20)
+        for col in columns:
+            self.jobs_tree.heading(col, text=col)
+            self.jobs_tree.column(col, width=260 if col == 'Situação' else 90)
+        self.jobs_tree.grid(row=3, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.jobs_tree.bind('<Double-1>', lambda e: self.show_job_details())
+        
+        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, command=self.jobs_tree.yview)
+        scrollbar.grid(row=3, column=1, sticky=(tk.N, tk.S))
+        self.jobs_tree.configure(yscrollcommand=scrollbar.set)
+        
+        self.content_frame.rowconfigure(3, weight=1)
+        self.poll_jobs()
+    
+    def poll_jobs(self):
+        """Refresh the jobs list every JOBS_REFRESH_MS while it is on screen"""
+        if not self.jobs_tree.winfo_exists():
+            return
+        self.refresh_jobs()
+        self.root.after(self.JOBS_REFRESH_MS, self.poll_jobs)
+    
+    def refresh_jobs(self):
+        """Reload the most recent jobs, keeping the selection"""
+        selected = self.jobs_tree.selection()
+        self.jobs_tree.delete(*self.jobs_tree.get_children())
+        for job in self.job_queue.list(limit=100):
+            label = JOB_TYPES[job['kind']][1] if job['kind'] in JOB_TYPES else job['kind']
+            self.jobs_tree.insert('', tk.END, iid=str(job['id']), values=(
+                job['id'], label, STATUS_LABELS[job['status']], f"{job['progress'] * 100:.0f}%",
+                f"{job['attempts']}/{job['max_attempts']}", job['created_at'],
+                job['error'] or job['message'] or ''
+            ))
+        kept = [iid for iid in selected if self.jobs_tree.exists(iid)]
+        if kept:
+            self.jobs_tree.selection_set(kept)
+    
+    def selected_job_id(self):
+        """Id of the selected job, or None after warning the user"""
+        selection = self.jobs_tree.selection()
+        if not selection:
+            messagebox.showwarning("Aviso", "Selecione uma tarefa!")
+            return None
+        return int(selection[0])
+    
+    def submit_job(self, kind: str, params: dict = None):
+        """Queue a job and show it in the list"""
+        self.job_queue.submit(kind, params)
+        self.refresh_jobs()
+    
+    def submit_archive_job(self):
+        """Queue an archive run for sales older than the chosen number of months"""
+        months = simpledialog.askinteger("Arquivar", "Arquivar vendas com mais de quantos meses?",
+                                         initialvalue=24, minvalue=1, parent=self.root)
+        if months:
+            self.submit_job('archive', {'months': months})
+    
+    def submit_report_job(self):
+        """Queue a revenue report grouped by the chosen dimensions"""
+        labels = self.REPORT_DIMENSION_LABELS
+        answer = simpledialog.askstring(
+            "Relatório de Receita", f"Agrupar por (separadas por vírgula: {', '.join(labels)}):",
+            initialvalue="marca", parent=self.root)
+        if not answer:
+            return
+        names = [name.strip().lower() for name in answer.split(',') if name.strip()]
+        unknown = [name for name in names if name not in labels]
+        if unknown or not names:
+            messagebox.showerror("Erro", f"Dimensão inválida: {', '.join(unknown)}")
+            return
+        include_archive = messagebox.askyesno("Relatório de Receita", "Incluir vendas arquivadas?")
+        self.submit_job('report', {'dimensions': [labels[name] for name in names],
+                                   'include_archive': include_archive})
+    
+    def submit_export_job(self):
+        """Queue a CSV export of the chosen listing"""
+        source = self.EXPORT_SOURCES[self.export_source.get()]
+        path = filedialog.asksaveasfilename(parent=self.root, defaultextension='.csv',
+                                            initialfile=f"{source}.csv",
+                                            filetypes=[("CSV", "*.csv")])
+        if path:
+            self.submit_job('export', {'source': source, 'path': path})
+    
+    def cancel_job(self):
+        """Cancel the selected job (a running one stops at its next checkpoint)"""
+        job_id = self.selected_job_id()
+        if job_id is None:
+            return
+        if not self.job_queue.cancel(job_id):
+            messagebox.showinfo("Tarefas", "A tarefa já terminou.")
+        self.refresh_jobs()
+    
+    def retry_job(self):
+        """Queue the selected failed or cancelled job again"""
+        job_id = self.selected_job_id()
+        if job_id is None:
+            return
+        if not self.job_queue.retry(job_id):
+            messagebox.showinfo("Tarefas", "Só tarefas que falharam ou foram canceladas podem ser repetidas.")
+        self.refresh_jobs()
+    
+    def show_job_details(self):
+        """Show parameters, outcome and result of the selected job"""
+        job_id = self.selected_job_id()
+        if job_id is None:
+            return
+        job = self.job_queue.get(job_id)
+        if job:
+            JobDetailsDialog(self.root, job)
     
     def run(self):
         """Start the GUI application"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.job_runner.stop()
+
+class PagedTree:
+    """Treeview showing one page of a PagedSource.
+    
+    Clicking a heading sorts by that column in SQL (again to reverse) and
+    the buttons below the tree move between pages; only the page on screen
+    is read from the database.
+    """
+    PAGE_SIZE = 100
+    
+    def __init__(self, parent, source, columns, row_values, row=2, width=100):
+        self.source = source
+        self.columns = columns
+        self.row_values = row_values
+        self.number = 0
+        
+        self.tree = ttk.Treeview(parent, columns=[heading for _, heading in columns], show='headings')
+        for column, heading in columns:
+            self.tree.heading(heading, text=heading, command=lambda c=column: self.sort_by(c))
+            self.tree.column(heading, width=width)
+        self.tree.grid(row=row, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.grid(row=row, column=1, sticky=(tk.N, tk.S))
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        
+        nav_frame = ttk.Frame(parent)
+        nav_frame.grid(row=row + 1, column=0, sticky=tk.W, pady=(5, 0))
+        self.prev_button = ttk.Button(nav_frame, text="< Anterior",
+                                      command=lambda: self.show_page(self.number - 1))
+        self.prev_button.pack(side=tk.LEFT)
+        self.next_button = ttk.Button(nav_frame, text="Próxima >",
+                                      command=lambda: self.show_page(self.number + 1))
+        self.next_button.pack(side=tk.LEFT, padx=(5, 0))
+        self.page_label = ttk.Label(nav_frame, text="")
+        self.page_label.pack(side=tk.LEFT, padx=(10, 0))
+    
+    @staticmethod
+    def mark_sorted(tree, columns, sort, descending):
+        """Show an arrow on the heading of the sort column"""
+        for column, heading in columns:
+            arrow = (' ▼' if descending else ' ▲') if column == sort else ''
+            tree.heading(heading, text=heading + arrow)
+    
+    def sort_by(self, column):
+        self.source.set_sort(column)
+        self.show_page(0)
+    
+    def refresh(self):
+        """Reload the current page (counts and data may have changed)"""
+        self.source.invalidate()
+        self.show_page(min(self.number, self.source.page_count - 1))
+    
+    def show_page(self, number):
+        number = max(0, min(number, self.source.page_count - 1))
+        self._fill(self.source.page(number))
+        self.number = number
+        self.mark_sorted(self.tree, self.columns, self.source.sort, self.source.descending)
+        self.page_label.configure(text=f"Página {number + 1} de {self.source.page_count} "
+                                       f"({self.source.count()} registro(s))")
+        self.prev_button.state(['!disabled'] if number > 0 else ['disabled'])
+        self.next_button.state(['!disabled'] if number + 1 < self.source.page_count else ['disabled'])
+    
+    def show_rows(self, rows, label):
+        """Show rows from elsewhere (e.g. a search) in place of the page"""
+        self._fill(rows)
+        self.page_label.configure(text=label)
+        self.prev_button.state(['disabled'])
+        self.next_button.state(['disabled'])
+    
+    def _fill(self, rows):
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            self.tree.insert('', tk.END, values=self.row_values(row))
 
 class VehicleDialog:
     def __init__(self, parent, title, vehicle=None):
@@ -546,8 +900,8 @@ class VehicleDialog:
             self.entries[field] = entry
         
         # Special handling for fuel_type and transmission dropdowns
-        fuel_values = ["Gasoline", "Flex", "Diesel", "Electric", "Hybrid"]
-        transmission_values = ["Manual", "Automatic", "CVT"]
+        fuel_values = list(FUEL_TYPES)
+        transmission_values = list(TRANSMISSIONS)
         
         # Replace fuel_type entry with combobox
         self.entries['fuel_type'].destroy()
@@ -590,35 +944,20 @@ class VehicleDialog:
     def save(self):
         """Save the vehicle data"""
         try:
-            data = {
-                'brand': self.entries['brand'].get().strip(),
-                'model': self.entries['model'].get().strip(),
-                'year': int(self.entries['year'].get()),
-                'color': self.entries['color'].get().strip(),
-                'price': float(self.entries['price'].get()),
-                'mileage': int(self.entries['mileage'].get() or 0),
+            self.result = validate('vehicles', {
+                'brand': self.entries['brand'].get(),
+                'model': self.entries['model'].get(),
+                'year': self.entries['year'].get(),
+                'color': self.entries['color'].get(),
+                'price': self.entries['price'].get(),
+                'mileage': self.entries['mileage'].get().strip() or 0,
                 'fuel_type': self.entries['fuel_type'].get(),
                 'transmission': self.entries['transmission'].get()
-            }
-            
-            # Validate required fields
-            if not all([data['brand'], data['model'], data['color']]):
-                messagebox.showerror("Erro", "Preencha todos os campos obrigatórios!")
-                return
-            
-            if data['year'] < 1900 or data['year'] > 2030:
-                messagebox.showerror("Erro", "Ano deve estar entre 1900 e 2030!")
-                return
-            
-            if data['price'] <= 0:
-                messagebox.showerror("Erro", "Preço deve ser maior que zero!")
-                return
-            
-            self.result = data
+            })
             self.dialog.destroy()
             
-        except ValueError:
-            messagebox.showerror("Erro", "Verifique os valores numéricos!")
+        except ValidationError as e:
+            messagebox.showerror("Erro", "\n".join(e.errors.values()))
     
     def cancel(self):
         """Cancel the dialog"""
@@ -665,8 +1004,8 @@ class CustomerDialog:
             self.entries['name'].insert(0, customer.get('name', ''))
             self.entries['email'].insert(0, customer.get('email', ''))
             self.entries['phone'].insert(0, customer.get('phone', ''))
-            self.entries['address'].insert(0, customer.get('address', ''))
-            self.entries['cpf'].insert(0, customer.get('cpf', ''))
+            self.entries['address'].insert(0, customer.get('address') or '')
+            self.entries['cpf'].insert(0, customer.get('cpf') or '')
         
         # Buttons
         btn_frame = ttk.Frame(main_frame)
@@ -684,43 +1023,89 @@ class CustomerDialog:
     def save(self):
         """Save the customer data"""
         try:
-            data = {
-                'name': self.entries['name'].get().strip(),
-                'email': self.entries['email'].get().strip(),
-                'phone': self.entries['phone'].get().strip(),
-                'address': self.entries['address'].get().strip(),
-                'cpf': self.entries['cpf'].get().strip()
-            }
-            
-            # Validate required fields
-            if not all([data['name'], data['email'], data['phone']]):
-                messagebox.showerror("Erro", "Preencha nome, email e telefone!")
-                return
-            
-            # Basic email validation
-            if '@' not in data['email']:
-                messagebox.showerror("Erro", "Email inválido!")
-                return
-            
-            self.result = data
+            self.result = validate('customers', {
+                'name': self.entries['name'].get(),
+                'email': self.entries['email'].get(),
+                'phone': self.entries['phone'].get(),
+                'address': self.entries['address'].get(),
+                'cpf': self.entries['cpf'].get()
+            })
             self.dialog.destroy()
             
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar: {e}")
+        except ValidationError as e:
+            messagebox.showerror("Erro", "\n".join(e.errors.values()))
     
     def cancel(self):
         """Cancel the dialog"""
         self.dialog.destroy()
 
+class CustomerHistoryDialog:
+    def __init__(self, parent, history):
+        customer = history['customer']
+        stats = history['stats']
+        
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"Histórico de Compras - {customer['name']}")
+        self.dialog.geometry("700x400")
+        self.dialog.transient(parent)
+        
+        # Center the dialog
+        self.dialog.geometry("+%d+%d" % (parent.winfo_rootx() + 50, parent.winfo_rooty() + 50))
+        
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        # Lifetime statistics
+        stats_frame = ttk.LabelFrame(main_frame, text=customer['name'], padding="10")
+        stats_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        rows = [
+            ("Total de Compras:", stats['purchase_count']),
+            ("Valor Total Gasto:", f"R${stats['lifetime_spend'] or 0:.2f}"),
+            ("Última Compra:", stats['last_purchase_date'] or "N/A")
+        ]
+        for i, (label, value) in enumerate(rows):
+            ttk.Label(stats_frame, text=label, font=('Arial', 10, 'bold')).grid(
+                row=i, column=0, sticky=tk.W, pady=2)
+            ttk.Label(stats_frame, text=str(value), font=('Arial', 10)).grid(
+                row=i, column=1, sticky=tk.W, padx=(20, 0), pady=2)
+        
+        # Purchases
+        columns = ('Venda', 'Data', 'Veículo', 'Preço', 'Pagamento')
+        tree = ttk.Treeview(main_frame, columns=columns, show='headings')
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=120)
+        tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=tree.yview)
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        tree.configure(yscrollcommand=scrollbar.set)
+        
+        for sale in history['sales']:
+            tree.insert('', tk.END, values=(
+                sale['id'], sale['sale_date'][:10],
+                f"{sale['brand']} {sale['model']} {sale['year']}",
+                f"R${sale['sale_price']:.2f}", sale['payment_method']
+            ))
+        
+        ttk.Button(main_frame, text="Fechar", command=self.dialog.destroy).grid(
+            row=2, column=0, pady=(10, 0))
+
 class SaleDialog:
-    def __init__(self, parent, db):
+    def __init__(self, parent, db, pricing_engine):
         self.result = None
         self.db = db
+        # Returns the owner's shared PricingEngine, refreshed
+        self.pricing_engine = pricing_engine
         
         # Create dialog window
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Registrar Venda")
-        self.dialog.geometry("500x400")
+        self.dialog.geometry("500x440")
         self.dialog.transient(parent)
         self.dialog.grab_set()
         
@@ -752,7 +1137,7 @@ class SaleDialog:
         
         # Payment method
         ttk.Label(main_frame, text="Método de Pagamento:").grid(row=3, column=0, sticky=tk.W, pady=5)
-        payment_methods = ["Cash", "Credit Card", "Debit Card", "Bank Transfer", "Financing"]
+        payment_methods = list(PAYMENT_METHODS)
         self.payment_combo = ttk.Combobox(main_frame, values=payment_methods, 
                                          width=37, state="readonly")
         self.payment_combo.grid(row=3, column=1, sticky=(tk.W, tk.E), pady=5, padx=(10, 0))
@@ -763,16 +1148,26 @@ class SaleDialog:
         self.notes_text = tk.Text(main_frame, width=40, height=5)
         self.notes_text.grid(row=4, column=1, sticky=(tk.W, tk.E), pady=5, padx=(10, 0))
         
+        # Salesperson credited with the sale (optional)
+        ttk.Label(main_frame, text="Vendedor:").grid(row=5, column=0, sticky=tk.W, pady=5)
+        self.employee_combo = ttk.Combobox(main_frame, width=37, state="readonly")
+        self.employee_combo.grid(row=5, column=1, sticky=(tk.W, tk.E), pady=5, padx=(10, 0))
+        
         # Load data
         self.load_customers()
         self.load_vehicles()
+        self.load_employees()
         
         # Bind vehicle selection to update price
         self.vehicle_combo.bind('<<ComboboxSelected>>', self.on_vehicle_selected)
         
+        # List price and model suggestion for the selected vehicle
+        self.price_hint = ttk.Label(main_frame, text="", foreground="gray")
+        self.price_hint.grid(row=6, column=1, sticky=tk.W, padx=(10, 0))
+        
         # Buttons
         btn_frame = ttk.Frame(main_frame)
-        btn_frame.grid(row=5, column=0, columnspan=2, pady=20)
+        btn_frame.grid(row=7, column=0, columnspan=2, pady=20)
         
         ttk.Button(btn_frame, text="Registrar Venda", command=self.save).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(btn_frame, text="Cancelar", command=self.cancel).pack(side=tk.LEFT)
@@ -790,19 +1185,42 @@ class SaleDialog:
     def load_vehicles(self):
         """Load available vehicles into combobox"""
         vehicles = self.db.get_vehicles("Available")
+        suggestions = self.suggest_prices(vehicles)
         vehicle_list = [f"{v['id']} - {v['brand']} {v['model']} {v['year']} - R${v['price']:.2f}" 
                        for v in vehicles]
         self.vehicle_combo['values'] = vehicle_list
         self.vehicles_data = {f"{v['id']} - {v['brand']} {v['model']} {v['year']} - R${v['price']:.2f}": 
-                             {'id': v['id'], 'price': v['price']} for v in vehicles}
+                             {'id': v['id'], 'price': v['price'], 'suggested': suggested}
+                             for v, suggested in zip(vehicles, suggestions)}
+    
+    def load_employees(self):
+        """Load employees into combobox (the first entry credits no one)"""
+        employees = self.db.get_employees()
+        self.employees_data = {f"{e['id']} - {e['name']} ({e['position']})": e['id'] for e in employees}
+        self.employee_combo['values'] = [""] + list(self.employees_data)
+    
+    def suggest_prices(self, vehicles):
+        """Model-suggested sale prices (None where no suggestion is available)"""
+        try:
+            return self.pricing_engine().suggest_prices(vehicles)
+        except (sqlite3.Error, OSError) as e:
+            # A suggestion is a convenience; never block a sale on it
+            print(f"Aviso: sugestão de preço indisponível ({e})", file=sys.stderr)
+            return [None] * len(vehicles)
     
     def on_vehicle_selected(self, event):
         """Update price when vehicle is selected"""
         selected = self.vehicle_var.get()
         if selected in self.vehicles_data:
-            price = self.vehicles_data[selected]['price']
+            vehicle = self.vehicles_data[selected]
+            price = vehicle['suggested'] if vehicle['suggested'] is not None else vehicle['price']
             self.price_entry.delete(0, tk.END)
             self.price_entry.insert(0, str(price))
+            if vehicle['suggested'] is not None:
+                self.price_hint.config(text=f"Tabela: R${vehicle['price']:,.2f}  |  "
+                                            f"Sugerido: R${vehicle['suggested']:,.2f}")
+            else:
+                self.price_hint.config(text=f"Tabela: R${vehicle['price']:,.2f}")
     
     def save(self):
         """Save the sale data"""
@@ -814,28 +1232,21 @@ class SaleDialog:
                 messagebox.showerror("Erro", "Selecione cliente e veículo!")
                 return
             
-            customer_id = self.customers_data[customer_selection]
-            vehicle_id = self.vehicles_data[vehicle_selection]['id']
-            sale_price = float(self.price_entry.get())
-            payment_method = self.payment_combo.get()
-            notes = self.notes_text.get("1.0", tk.END).strip()
+            sale = validate('sales', {
+                'sale_price': self.price_entry.get(),
+                'payment_method': self.payment_combo.get(),
+                'notes': self.notes_text.get("1.0", tk.END)
+            })
             
-            if sale_price <= 0:
-                messagebox.showerror("Erro", "Preço deve ser maior que zero!")
-                return
-            
-            self.result = {
-                'customer_id': customer_id,
-                'vehicle_id': vehicle_id,
-                'sale_price': sale_price,
-                'payment_method': payment_method,
-                'notes': notes
-            }
+            self.result = dict(sale,
+                               customer_id=self.customers_data[customer_selection],
+                               vehicle_id=self.vehicles_data[vehicle_selection]['id'],
+                               employee_id=self.employees_data.get(self.employee_combo.get()))
             
             self.dialog.destroy()
             
-        except ValueError:
-            messagebox.showerror("Erro", "Preço inválido!")
+        except ValidationError as e:
+            messagebox.showerror("Erro", "\n".join(e.errors.values()))
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao registrar venda: {e}")
     
@@ -843,6 +1254,129 @@ class SaleDialog:
         """Cancel the dialog"""
         self.dialog.destroy()
 
+class LeaderboardDialog:
+    """Top sellers of a month or year"""
+    METRICS = {"Receita": 'revenue', "Unidades": 'units', "Comissão": 'commission'}
+    
+    def __init__(self, parent, db):
+        from datetime import datetime
+        self.db = db
+        
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Ranking de Vendedores")
+        self.dialog.geometry("700x400")
+        self.dialog.transient(parent)
+        
+        # Center the dialog
+        self.dialog.geometry("+%d+%d" % (parent.winfo_rootx() + 50, parent.winfo_rooty() + 50))
+        
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        # Period and metric
+        filter_frame = ttk.Frame(main_frame)
+        filter_frame.grid(row=0, column=0, sticky=tk.W, pady=(0, 10))
+        ttk.Label(filter_frame, text="Período (AAAA-MM ou AAAA):").pack(side=tk.LEFT)
+        self.period_var = tk.StringVar(value=datetime.now().strftime('%Y-%m'))
+        period_entry = ttk.Entry(filter_frame, textvariable=self.period_var, width=10)
+        period_entry.pack(side=tk.LEFT, padx=(5, 15))
+        period_entry.bind('<Return>', lambda e: self.refresh())
+        ttk.Label(filter_frame, text="Ordenar por:").pack(side=tk.LEFT)
+        self.metric_combo = ttk.Combobox(filter_frame, values=list(self.METRICS), width=10, state="readonly")
+        self.metric_combo.set("Receita")
+        self.metric_combo.pack(side=tk.LEFT, padx=(5, 15))
+        self.metric_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh())
+        ttk.Button(filter_frame, text="Atualizar", command=self.refresh).pack(side=tk.LEFT)
+        
+        columns = ('#', 'Vendedor', 'Cargo', 'Vendas', 'Receita', 'Comissão')
+        self.tree = ttk.Treeview(main_frame, columns=columns, show='headings')
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=40 if col == '#' else 110)
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        ttk.Button(main_frame, text="Fechar", command=self.dialog.destroy).grid(
+            row=2, column=0, pady=(10, 0))
+        
+        self.refresh()
+    
+    def refresh(self):
+        """Reload the ranking for the chosen period and metric"""
+        self.tree.delete(*self.tree.get_children())
+        leaders = self.db.get_leaderboard(self.period_var.get().strip() or None,
+                                          self.METRICS[self.metric_combo.get()])
+        for position, leader in enumerate(leaders, 1):
+            self.tree.insert('', tk.END, values=(
+                position, leader['name'], leader['position'], leader['units'],
+                f"R${leader['revenue']:,.2f}", f"R${leader['commission']:,.2f}"
+            ))
+
+class JobDetailsDialog:
+    """Parameters, outcome and result of one background job"""
+    
+    def __init__(self, parent, job):
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"Tarefa {job['id']}")
+        self.dialog.geometry("700x450")
+        self.dialog.transient(parent)
+        
+        # Center the dialog
+        self.dialog.geometry("+%d+%d" % (parent.winfo_rootx() + 50, parent.winfo_rooty() + 50))
+        
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(0, weight=1)
+        
+        text = tk.Text(main_frame, wrap=tk.NONE, font=('Courier', 10))
+        text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=text.yview)
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        text.configure(yscrollcommand=scrollbar.set)
+        text.insert(tk.END, "\n".join(self.describe(job)))
+        text.configure(state=tk.DISABLED)
+        
+        ttk.Button(main_frame, text="Fechar", command=self.dialog.destroy).grid(
+            row=1, column=0, pady=(10, 0))
+    
+    @staticmethod
+    def describe(job) -> list:
+        """Text lines describing the job"""
+        lines = [
+            f"Tipo: {JOB_TYPES[job['kind']][1] if job['kind'] in JOB_TYPES else job['kind']}",
+            f"Status: {STATUS_LABELS[job['status']]} ({job['progress'] * 100:.0f}%)",
+            f"Prioridade: {job['priority']}",
+            f"Tentativas: {job['attempts']} de {job['max_attempts']}",
+            f"Criada em: {job['created_at']}",
+            f"Iniciada em: {job['started_at'] or '-'}",
+            f"Terminada em: {job['finished_at'] or '-'}",
+        ]
+        lines += [f"Parâmetro {key}: {value}" for key, value in job['params'].items()]
+        if job['error']:
+            lines.append(f"Erro: {job['error']}")
+        if job['message']:
+            lines.append(f"Situação: {job['message']}")
+        
+        result = job['result']
+        if result is None:
+            return lines
+        lines.append("")
+        if job['kind'] == 'report':
+            dimensions = result['dimensions']
+            labels = {column: label for label, column in GUIInterface.REPORT_DIMENSION_LABELS.items()}
+            lines.append(" ".join(f"{labels.get(name, name).capitalize():<15}" for name in dimensions) +
+                         f"{'Vendas':>8} {'Receita':>16} {'Ticket Médio':>14}")
+            for row in result['rows']:
+                lines.append(" ".join(f"{str(row[name])[:15]:<15}" for name in dimensions) +
+                             f"{row['sales']:>8} R${row['revenue']:>14,.2f} R${row['average']:>12,.2f}")
+        else:
+            lines += [f"{key}: {value}" for key, value in result.items()]
+        return lines
+
 class EmployeeDialog:
     def __init__(self, parent, title, employee=None):
         self.result = None
@@ -910,34 +1444,16 @@ class EmployeeDialog:
     def save(self):
         """Save the employee data"""
         try:
-            data = {
-                'name': self.entries['name'].get().strip(),
-                'email': self.entries['email'].get().strip(),
+            self.result = validate('employees', {
+                'name': self.entries['name'].get(),
+                'email': self.entries['email'].get(),
                 'position': self.entries['position'].get(),
-                'salary': float(self.entries['salary'].get() or 0)
-            }
-            
-            # Validate required fields
-            if not all([data['name'], data['email'], data['position']]):
-                messagebox.showerror("Erro", "Preencha nome, email e cargo!")
-                return
-            
-            # Basic email validation
-            if '@' not in data['email']:
-                messagebox.showerror("Erro", "Email inválido!")
-                return
-            
-            if data['salary'] < 0:
-                messagebox.showerror("Erro", "Salário não pode ser negativo!")
-                return
-            
-            self.result = data
+                'salary': self.entries['salary'].get().strip() or 0
+            })
             self.dialog.destroy()
             
-        except ValueError:
-            messagebox.showerror("Erro", "Salário inválido!")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar: {e}")
+        except ValidationError as e:
+            messagebox.showerror("Erro", "\n".join(e.errors.values()))
     
     def cancel(self):
         """Cancel the dialog"""
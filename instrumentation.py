@@ -0,0 +1,334 @@
+"""
+Query instrumentation for DatabaseManager.
+
+Records per-method and per-SQL-statement call counts, latency histograms
+and rows returned, and keeps a slow-query log (with EXPLAIN QUERY PLAN)
+for statements above a configurable threshold.
+
+Usage:
+    db = DatabaseManager()
+    stats = db.enable_instrumentation(slow_threshold_ms=50)
+    ...
+    print(stats.format_report())
+    stats.dump_json('data/query_stats.json')
+"""
+
+import functools
+import inspect
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# VM instructions between progress-handler callbacks
+PROGRESS_INTERVAL = 1000
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so the same statement always gets the same key"""
+    return _WHITESPACE.sub(' ', sql).strip()
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+    
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    
+    def record(self, elapsed_ms: float):
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+    
+    def to_dict(self) -> Dict[str, int]:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {label: count for label, count in zip(labels, self.counts) if count}
+
+class OperationStats:
+    """Counters for one method or one SQL statement"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.vm_steps = 0
+        self.histogram = LatencyHistogram()
+    
+    def record(self, elapsed_ms: float, rows: int = 0, vm_steps: int = 0):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.vm_steps += vm_steps
+        self.histogram.record(elapsed_ms)
+    
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+            'vm_steps': self.vm_steps,
+            'histogram': self.histogram.to_dict(),
+        }
+
+class QueryInstrumentation:
+    """Collects method and statement statistics for one DatabaseManager"""
+    
+    def __init__(self, slow_threshold_ms: float = 100.0, slow_log_size: int = 100):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.methods: Dict[str, OperationStats] = {}
+        self.statements: Dict[str, OperationStats] = {}
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self.traced_statements = 0
+        self.started_at = datetime.now()
+        self._lock = threading.Lock()
+    
+    def reset(self):
+        """Discard all collected statistics"""
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+            self.slow_queries.clear()
+            self.traced_statements = 0
+            self.started_at = datetime.now()
+    
+    def record_method(self, name: str, elapsed_ms: float, rows: int):
+        with self._lock:
+            self.methods.setdefault(name, OperationStats()).record(elapsed_ms, rows)
+    
+    def record_statement(self, sql: str, elapsed_ms: float, rows: int = 0, vm_steps: int = 0):
+        with self._lock:
+            self.statements.setdefault(sql, OperationStats()).record(elapsed_ms, rows, vm_steps)
+    
+    def add_rows(self, sql: str, rows: int, elapsed_ms: float):
+        """Attribute rows (and fetch time) to a statement after it was executed"""
+        with self._lock:
+            stats = self.statements.get(sql)
+            if stats:
+                stats.rows += rows
+                stats.total_ms += elapsed_ms
+    
+    def record_slow_query(self, sql: str, params, elapsed_ms: float, plan: List[str]):
+        with self._lock:
+            self.slow_queries.append({
+                'sql': sql,
+                'params': [repr(p) for p in params] if params else [],
+                'elapsed_ms': round(elapsed_ms, 3),
+                'plan': plan,
+                'at': datetime.now().isoformat(timespec='seconds'),
+            })
+    
+    def count_traced(self, statement: str):
+        # Trace callback: counts every statement SQLite runs, including
+        # implicit BEGIN/COMMIT and statements fired by triggers
+        with self._lock:
+            self.traced_statements += 1
+    
+    def report(self) -> Dict:
+        """Snapshot of all statistics as plain data"""
+        with self._lock:
+            return {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'slow_threshold_ms': self.slow_threshold_ms,
+                'traced_statements': self.traced_statements,
+                'methods': {name: stats.to_dict() for name, stats in self.methods.items()},
+                'statements': {sql: stats.to_dict() for sql, stats in self.statements.items()},
+                'slow_queries': list(self.slow_queries),
+            }
+    
+    def dump_json(self, path: str):
+        """Write the report to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+    
+    def format_report(self, top: int = 10) -> str:
+        """Human-readable report, slowest operations first"""
+        report = self.report()
+        lines = [f"Desde {report['started_at']} - {report['traced_statements']} instruções SQL executadas", ""]
+        
+        lines.append(f"{'Método':<32} {'Chamadas':>9} {'Média ms':>10} {'Máx ms':>10} {'Linhas':>9}")
+        lines.append("-" * 74)
+        methods = sorted(report['methods'].items(), key=lambda item: -item[1]['total_ms'])
+        for name, stats in methods[:top]:
+            lines.append(f"{name:<32} {stats['count']:>9} {stats['avg_ms']:>10.2f} "
+                         f"{stats['max_ms']:>10.2f} {stats['rows']:>9}")
+        
+        lines.append("")
+        lines.append(f"{'SQL':<50} {'Exec.':>7} {'Média ms':>10} {'Linhas':>9}")
+        lines.append("-" * 79)
+        statements = sorted(report['statements'].items(), key=lambda item: -item[1]['total_ms'])
+        for sql, stats in statements[:top]:
+            short = sql if len(sql) <= 50 else sql[:47] + '...'
+            lines.append(f"{short:<50} {stats['count']:>7} {stats['avg_ms']:>10.2f} {stats['rows']:>9}")
+        
+        lines.append("")
+        lines.append(f"Consultas lentas (> {report['slow_threshold_ms']} ms): {len(report['slow_queries'])}")
+        for entry in report['slow_queries'][-top:]:
+            lines.append(f"  [{entry['at']}] {entry['elapsed_ms']:.1f} ms: {entry['sql'][:70]}")
+            for step in entry['plan']:
+                lines.append(f"      {step}")
+        return "\n".join(lines)
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times every statement and counts the rows fetched"""
+    
+    def _timed(self, sql, params, many=False):
+        conn = self.connection
+        instrumentation = conn.instrumentation
+        if instrumentation is None:
+            # Statements run while connecting, before attach()
+            return super().executemany(sql, params) if many else super().execute(sql, params)
+        steps_before = conn.vm_steps
+        start = time.perf_counter()
+        try:
+            if many:
+                return super().executemany(sql, params)
+            return super().execute(sql, params)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            key = normalize_sql(sql)
+            self._last_sql = key
+            instrumentation.record_statement(key, elapsed_ms,
+                                             vm_steps=(conn.vm_steps - steps_before) * PROGRESS_INTERVAL)
+            if elapsed_ms >= instrumentation.slow_threshold_ms and not many:
+                instrumentation.record_slow_query(key, params, elapsed_ms, self._explain(sql, params))
+    
+    def _explain(self, sql, params) -> List[str]:
+        try:
+            cursor = self.connection.cursor(sqlite3.Cursor)
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[3] for row in cursor.fetchall()]
+        except sqlite3.Error:
+            return []
+    
+    def execute(self, sql, params=()):
+        return self._timed(sql, params)
+    
+    def executemany(self, sql, seq_of_params):
+        return self._timed(sql, seq_of_params, many=True)
+    
+    def _fetched(self, rows: int, start: float):
+        sql = getattr(self, '_last_sql', None)
+        if sql:
+            self.connection.instrumentation.add_rows(sql, rows, (time.perf_counter() - start) * 1000)
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(1 if row is not None else 0, start)
+        return row
+    
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), start)
+        return rows
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), start)
+        return rows
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors report to a QueryInstrumentation"""
+    
+    instrumentation: QueryInstrumentation = None
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vm_steps = 0
+        self.set_progress_handler(self._on_progress, PROGRESS_INTERVAL)
+    
+    def _on_progress(self):
+        self.vm_steps += 1
+        return 0
+    
+    def attach(self, instrumentation: QueryInstrumentation):
+        self.instrumentation = instrumentation
+        self.set_trace_callback(instrumentation.count_traced)
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+    
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+def _count_rows(result) -> int:
+    if result is None or isinstance(result, bool):
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict):
+        lists = [value for value in result.values() if isinstance(value, list)]
+        return sum(len(value) for value in lists) if lists else 1
+    return 1
+
+def timed(instrumentation: QueryInstrumentation, name: str):
+    """Decorator recording call latency and rows returned under name.
+    
+    For a generator function the latency is the time spent producing its
+    items (not the consumer's work between them), recorded when the
+    generator is exhausted or closed, and the rows are the items yielded.
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                generator = func(*args, **kwargs)
+                elapsed = 0.0
+                rows = 0
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            break
+                        finally:
+                            elapsed += time.perf_counter() - start
+                        rows += 1
+                        yield item
+                finally:
+                    generator.close()
+                    instrumentation.record_method(name, elapsed * 1000, rows)
+            return generator_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            instrumentation.record_method(name, (time.perf_counter() - start) * 1000, _count_rows(result))
+            return result
+        return wrapper
+    return decorator
+
+def instrument_methods(db, instrumentation: QueryInstrumentation, exclude=()):
+    """Wrap the public methods of a DatabaseManager instance with timed()"""
+    for name in dir(type(db)):
+        if name.startswith('_') or name in exclude:
+            continue
+        method = getattr(db, name)
+        if callable(method) and not isinstance(method, type):
+            setattr(db, name, timed(instrumentation, name)(method))
+
+def uninstrument_methods(db):
+    """Remove the wrappers installed by instrument_methods()"""
+    for name in list(vars(db)):
+        if hasattr(getattr(db, name), '__wrapped__'):
+            delattr(db, name)
@@ -0,0 +1,474 @@
+"""
+Durable queue for heavy background work (backups, archive runs, reports, exports).
+
+Jobs are rows of the ``jobs`` table in the dealership database, so they
+survive a restart. A job is queued, claimed by exactly one worker (the
+claim runs in a write transaction, safe across threads and processes), runs
+and ends done, failed or cancelled. Queued jobs run highest priority
+first; a failed attempt is retried after an exponentially growing delay
+until ``max_attempts`` is reached. Handlers report progress and see
+cancellation requests through their JobContext, so the interfaces only
+submit jobs and read their rows, never waiting for one to finish.
+
+Workers are threads of a JobRunner (the terminal and the GUI start one)
+or a separate process. A runner keeps a heartbeat on its running jobs;
+jobs whose worker stopped beating (the application was killed) go back
+to the queue.
+
+Usage (from the project root):
+    python main.py jobs worker                  # run queued jobs until Ctrl+C
+    python main.py jobs list
+    python main.py jobs submit backup --param keep=12
+    python main.py jobs cancel 12
+"""
+
+import csv
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from contention import retry_on_busy
+from scheduling import PeriodicTask
+from settings import DATA_DIR, get_settings
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed', 'cancelled')
+FINISHED_STATUSES = ('done', 'failed', 'cancelled')
+
+STATUS_LABELS = {'queued': 'Na fila', 'running': 'Executando', 'done': 'Concluída',
+                 'failed': 'Falhou', 'cancelled': 'Cancelada'}
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds before the first retry; doubles on every further attempt
+RETRY_DELAY = 30
+
+# Seconds an idle worker waits before looking at the queue again
+POLL_INTERVAL = 1.0
+
+# Running jobs are touched every HEARTBEAT_INTERVAL seconds; after
+# STALE_AFTER seconds without a heartbeat their worker is presumed dead
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = 60
+
+# Progress is written (and cancellation read) at most this often, in seconds
+PROGRESS_INTERVAL = 0.5
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Default folder of export jobs. Paths in job params must be absolute: the
+# worker may run in another process, started from another directory.
+DEFAULT_EXPORT_DIR = os.path.join(DATA_DIR, 'exports')
+
+# Params naming files or folders, made absolute when submitted from the command line
+PATH_PARAMS = ('path', 'backup_dir')
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job was cancelled"""
+
+class JobContext:
+    """What a running handler sees of its job: parameters, progress and cancellation"""
+    
+    def __init__(self, queue: 'JobQueue', job: Dict, worker: str):
+        self.queue = queue
+        self.job_id = job['id']
+        self.params = job['params']
+        self.worker = worker
+        self._last_sync = 0.0
+        self._cancel_requested = False
+    
+    def progress(self, fraction: float, message: str = None):
+        """Record progress (0 to 1); raises JobCancelled once the job is cancelled"""
+        now = time.monotonic()
+        if now - self._last_sync >= PROGRESS_INTERVAL or fraction >= 1:
+            self._last_sync = now
+            self._cancel_requested = self.queue._report_progress(
+                self.job_id, self.worker, min(max(fraction, 0.0), 1.0), message)
+        if self._cancel_requested:
+            raise JobCancelled()
+    
+    def cancelled(self) -> bool:
+        """True once cancellation was requested (polled, for handlers that stop themselves)"""
+        now = time.monotonic()
+        if not self._cancel_requested and now - self._last_sync >= PROGRESS_INTERVAL:
+            self._last_sync = now
+            self._cancel_requested = self.queue._cancel_requested(self.job_id)
+        return self._cancel_requested
+
+# Job kind -> (handler, label, default priority); handlers take (db, context)
+# and return a JSON-serializable result
+JOB_TYPES: Dict[str, tuple] = {}
+
+def job_type(kind: str, label: str, priority: int = 0):
+    """Register the decorated function as the handler of ``kind`` jobs"""
+    def register(handler: Callable):
+        JOB_TYPES[kind] = (handler, label, priority)
+        return handler
+    return register
+
+def _now(offset_seconds: float = 0) -> str:
+    return (datetime.now() + timedelta(seconds=offset_seconds)).strftime(TIMESTAMP_FORMAT)
+
+def _decode_job(row) -> Dict:
+    job = dict(row)
+    job['params'] = json.loads(job['params'] or '{}')
+    if job['result'] is not None:
+        job['result'] = json.loads(job['result'])
+    return job
+
+class JobQueue:
+    """Submit, inspect and cancel jobs; claimed and finished by JobRunner workers"""
+    
+    def __init__(self, db):
+        self.db = db
+    
+    @retry_on_busy
+    def submit(self, kind: str, params: Dict = None, priority: int = None,
+               max_attempts: int = DEFAULT_MAX_ATTEMPTS, delay: float = 0) -> int:
+        """Queue a job; returns its id. Raises ValueError for an unknown kind"""
+        if kind not in JOB_TYPES:
+            raise ValueError(f"tipo de tarefa desconhecido: {kind}")
+        if priority is None:
+            priority = JOB_TYPES[kind][2]
+        with self.db.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO jobs (kind, params, priority, max_attempts, created_at, run_after)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (kind, json.dumps(params or {}), priority, max(1, max_attempts), _now(), _now(delay)))
+            return cursor.lastrowid
+    
+    def get(self, job_id: int) -> Optional[Dict]:
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            return _decode_job(row) if row else None
+    
+    def list(self, status: str = None, limit: int = 50) -> List[Dict]:
+        """Most recent jobs first, optionally only those with ``status``"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            if status:
+                cursor.execute('SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?', (status, limit))
+            else:
+                cursor.execute('SELECT * FROM jobs ORDER BY id DESC LIMIT ?', (limit,))
+            return [_decode_job(row) for row in cursor.fetchall()]
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status')
+            counts = dict.fromkeys(JOB_STATUSES, 0)
+            counts.update((status, count) for status, count in cursor.fetchall())
+            return counts
+    
+    @retry_on_busy
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job now, or ask a running one to stop; False if already finished"""
+        with self.db.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                           "WHERE id = ? AND status = 'queued'", (_now(), job_id))
+            if cursor.rowcount:
+                return True
+            cursor.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+            return cursor.rowcount > 0
+    
+    @retry_on_busy
+    def retry(self, job_id: int) -> bool:
+        """Queue a failed or cancelled job again with a fresh set of attempts"""
+        with self.db.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE jobs SET status = 'queued', attempts = 0, progress = 0, message = NULL,
+                                error = NULL, result = NULL, cancel_requested = 0, worker = NULL,
+                                run_after = ?, started_at = NULL, finished_at = NULL
+                WHERE id = ? AND status IN ('failed', 'cancelled')
+            ''', (_now(), job_id))
+            return cursor.rowcount > 0
+    
+    @retry_on_busy
+    def prune(self, days: int = 30) -> int:
+        """Delete jobs finished more than ``days`` ago; returns how many"""
+        with self.db.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                           (_now(-days * 86400),))
+            return cursor.rowcount
+    
+    # Worker side
+    @retry_on_busy
+    def _claim(self, worker: str) -> Optional[Dict]:
+        """Take the next due job for ``worker``, or None if there is none"""
+        # The write lock is held from the SELECT on, so no other worker can claim the same job
+        with self.db.write_transaction() as conn:
+            cursor = conn.cursor()
+            now = _now()
+            cursor.execute('''
+                SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ?
+                ORDER BY priority DESC, id LIMIT 1
+            ''', (now,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute('''
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?,
+                                started_at = ?, heartbeat_at = ?, progress = 0, message = NULL
+                WHERE id = ?
+            ''', (worker, now, now, row['id']))
+            cursor.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],))
+            return _decode_job(cursor.fetchone())
+    
+    @retry_on_busy
+    def _report_progress(self, job_id: int, worker: str, fraction: float, message: Optional[str]) -> bool:
+        """Store progress; returns True if cancellation was requested"""
+        with self.db.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE jobs SET progress = ?, message = COALESCE(?, message), heartbeat_at = ?
+                WHERE id = ? AND worker = ? AND status = 'running'
+            ''', (fraction, message, _now(), job_id, worker))
+            cursor.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            return bool(row and row[0])
+    
+    def _cancel_requested(self, job_id: int) -> bool:
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            return bool(row and row[0])
+    
+    @retry_on_busy
+    def _finish(self, job: Dict, worker: str, status: str, result=None, error: str = None):
+        """Record the outcome of an attempt; failures with attempts left are queued again.
+        
+        Only the worker holding the job may finish it, so a worker presumed
+        dead cannot overwrite the outcome of the attempt that replaced it.
+        """
+        now = _now()
+        if status == 'failed' and job['attempts'] < job['max_attempts']:
+            with self.db.write_transaction() as conn:
+                conn.execute('''
+                    UPDATE jobs SET status = 'queued', error = ?, worker = NULL, run_after = ?
+                    WHERE id = ? AND worker = ? AND status = 'running'
+                ''', (error, _now(RETRY_DELAY * 2 ** (job['attempts'] - 1)), job['id'], worker))
+            return
+        with self.db.write_transaction() as conn:
+            conn.execute('''
+                UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?,
+                                progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END
+                WHERE id = ? AND worker = ? AND status = 'running'
+            ''', (status, json.dumps(result) if result is not None else None, error, now, status,
+                  job['id'], worker))
+    
+    @retry_on_busy
+    def _heartbeat(self, worker: str):
+        with self.db.write_transaction() as conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE worker = ? AND status = 'running'",
+                         (_now(), worker))
+    
+    @retry_on_busy
+    def _release(self, worker: str) -> int:
+        """Queue again the jobs ``worker`` is running (it is shutting down)"""
+        with self.db.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE jobs SET status = 'queued', attempts = attempts - 1, worker = NULL, message = NULL
+                WHERE worker = ? AND status = 'running'
+            ''', (worker,))
+            return cursor.rowcount
+    
+    @retry_on_busy
+    def _requeue_stale(self, stale_after: float = STALE_AFTER) -> int:
+        """Queue again running jobs whose worker stopped sending heartbeats"""
+        with self.db.write_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                                error = 'interrompida (o processo que a executava parou)',
+                                worker = NULL, finished_at = CASE WHEN attempts < max_attempts
+                                                                  THEN NULL ELSE ? END
+                WHERE status = 'running' AND heartbeat_at < ?
+            ''', (_now(), _now(-stale_after)))
+            return cursor.rowcount
+
+class JobRunner:
+    """Worker threads that run queued jobs until stopped"""
+    
+    def __init__(self, db, workers: int = None, poll_interval: float = POLL_INTERVAL,
+                 on_finish: Optional[Callable[[Dict], None]] = None):
+        self.db = db
+        self.queue = JobQueue(db)
+        # None: the configured job_workers (see settings.py)
+        self.workers = workers or get_settings().job_workers
+        self.poll_interval = poll_interval
+        self.on_finish = on_finish
+        # Unique per runner: several processes (or runners) share the queue
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._heartbeat = PeriodicTask(HEARTBEAT_INTERVAL, self._beat, name='job-heartbeat')
+    
+    def start(self):
+        """Start the workers (no-op if already running)"""
+        if self.running:
+            return
+        self._stop.clear()
+        self.queue._requeue_stale()
+        self._threads = [threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        self._heartbeat.start()
+    
+    def stop(self, timeout: float = 5):
+        """Stop taking jobs and wait up to ``timeout`` seconds for running ones.
+        
+        Jobs still running afterwards are put back in the queue; they start
+        over on the next run (handlers must tolerate being repeated).
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._heartbeat.stop()
+        self.queue._release(self.name)
+    
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+    
+    def run_forever(self):
+        """Run the workers until Ctrl+C"""
+        self.start()
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+    
+    def _beat(self):
+        self.queue._heartbeat(self.name)
+        self.queue._requeue_stale()
+    
+    def _work(self):
+        try:
+            while not self._stop.is_set():
+                job = self.queue._claim(self.name)
+                if job is None:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self.run_job(job)
+        finally:
+            self.db.close()
+    
+    def run_job(self, job: Dict):
+        """Run one claimed job and record its outcome"""
+        if job['kind'] not in JOB_TYPES:
+            # Nothing to retry: no attempt can succeed
+            job['attempts'] = job['max_attempts']
+            self.queue._finish(job, self.name, 'failed', error=f"tipo de tarefa desconhecido: {job['kind']}")
+        else:
+            handler = JOB_TYPES[job['kind']][0]
+            context = JobContext(self.queue, job, self.name)
+            try:
+                result = handler(self.db, context)
+            except JobCancelled:
+                self.queue._finish(job, self.name, 'cancelled')
+            except Exception as e:
+                self.queue._finish(job, self.name, 'failed', error=f"{type(e).__name__}: {e}")
+            else:
+                self.queue._finish(job, self.name, 'done', result=result)
+        if self.on_finish:
+            self.on_finish(self.queue.get(job['id']))
+
+# Handlers
+@job_type('backup', "Backup", priority=10)
+def backup_job(db, context: JobContext) -> Dict:
+    """Verified snapshot of the database; params: backup_dir, compress, keep"""
+    import backup
+    backup_dir = context.params.get('backup_dir') or backup.DEFAULT_BACKUP_DIR
+    path = backup.create_snapshot(
+        db.db_path, backup_dir, compress=context.params.get('compress', True),
+        progress=lambda copied, total: context.progress(0.9 * copied / total if total else 0,
+                                                        "Copiando páginas"))
+    context.progress(0.95, "Aplicando retenção")
+    removed = backup.prune_snapshots(backup_dir, context.params.get('keep', 24))
+    return {'path': path, 'pruned': len(removed)}
+
+@job_type('archive', "Arquivamento", priority=-10)
+def archive_job(db, context: JobContext) -> Dict:
+    """Archive old sales and sold vehicles; params: months"""
+    import archive
+    context.progress(0, "Arquivando")
+    return archive.archive_old_records(db, context.params.get('months', archive.DEFAULT_MONTHS))
+
+@job_type('report', "Relatório de receita")
+def report_job(db, context: JobContext) -> Dict:
+    """Revenue report; params: dimensions, include_archive, date_from, date_to"""
+    from reports import ReportCancelled, run_report
+    try:
+        report = run_report(db.db_path, context.params.get('dimensions', ['brand']),
+                            date_from=context.params.get('date_from'), date_to=context.params.get('date_to'),
+                            progress=lambda done, total: context.progress(done / total, "Processando partições"),
+                            should_cancel=context.cancelled,
+                            include_archive=context.params.get('include_archive', False),
+                            mmap_size=db.mmap_size)
+    except ReportCancelled:
+        raise JobCancelled() from None
+    return report
+
+@job_type('pricing', "Atualização do modelo de preços")
+def pricing_job(db, context: JobContext) -> Dict:
+    """Fold new sales into the pricing model; params: force"""
+    from pricing import PricingEngine
+    engine = PricingEngine(db)
+    return {'added': engine.refresh(force=context.params.get('force', False)), 'ready': engine.ready}
+
+@job_type('dedup', "Detecção de clientes duplicados", priority=-5)
+def dedup_job(db, context: JobContext) -> Dict:
+    """Likely duplicate customers; params: threshold, max_block_size, limit (groups returned)"""
+    import dedup
+    result = dedup.find_duplicates(db, context.params.get('threshold', dedup.DEFAULT_THRESHOLD),
+                                   context.params.get('max_block_size', dedup.MAX_BLOCK_SIZE),
+                                   progress=context.progress)
+    return {'stats': result['stats'], 'groups': result['groups'][:context.params.get('limit', 100)],
+            'group_count': len(result['groups'])}
+
+@job_type('export', "Exportação CSV")
+def export_job(db, context: JobContext) -> Dict:
+    """A listing as CSV; params: source, path, filter, sort, descending"""
+    from paging import PagedSource
+    listing = PagedSource(db, context.params['source'], page_size=1000, sort=context.params.get('sort'),
+                          descending=context.params.get('descending'),
+                          filter_text=context.params.get('filter', ''))
+    path = context.params['path']
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    total = listing.count()
+    written = 0
+    # Written next to the target and renamed at the end: a cancelled or
+    # failed export never leaves a truncated file behind
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow([label for _, label, _ in listing.columns.values()])
+            for number in range(listing.page_count):
+                rows = listing.page(number)
+                writer.writerows([row[column] for column in listing.columns] for row in rows)
+                written += len(rows)
+                context.progress(written / total if total else 1, f"{written} de {total} linha(s)")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {'path': path, 'rows': written}
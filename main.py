@@ -2,10 +2,42 @@
 """
 Sistema de Concessionária
 Escolha entre interface de terminal ou interface gráfica
+
+Uso:
+    python main.py          # menu interativo
+    python main.py tui      # interface de terminal
+    python main.py tui --memory-replica 5   # leituras de uma cópia em memória
+    python main.py gui      # interface gráfica
+    python main.py init     # criar e popular a base de dados
+    python main.py backup   # snapshot da base de dados (ver backup.py)
+    python main.py archive  # arquivar vendas antigas (ver archive.py)
+    python main.py jobs     # fila de tarefas em segundo plano (ver jobs.py)
+    python main.py storage  # tamanho de página e reorganização (ver storage.py)
+    python main.py sales-view --rebuild  # recalcular a tabela de leitura das vendas
+    python main.py import customers clientes.csv  # importar em lote (ver validation.py)
+    python main.py tui --offline-journal data/offline-journal.jsonl  # vendas sem rede (ver offline.py)
+    python main.py --config loja.ini --cache-mb 64 tui   # configurações (ver settings.py)
+    python main.py settings  # configurações em uso e sua origem
 """
 
 import sys
-import os
+
+# Interfaces, tkinter and the database layer are imported on first use so
+# that showing the menu (or running a subcommand) only pays for what it needs
+_db = None
+
+def get_db():
+    """Shared DatabaseManager, created on first use and reused across interfaces"""
+    global _db
+    if _db is None:
+        from database import DatabaseManager
+        _db = DatabaseManager()
+    return _db
+
+def clear_screen():
+    """Clear the terminal with ANSI escapes (no shell subprocess)"""
+    sys.stdout.write("\033[2J\033[H")
+    sys.stdout.flush()
 
 def show_interface_menu():
     """Show interface selection menu"""
@@ -20,8 +52,26 @@ def show_interface_menu():
     print("0. Sair")
     print()
 
-def initialize_database():
-    """Initialize and seed the database"""
+def run_terminal():
+    """Start the terminal interface"""
+    from terminal_interface import TerminalInterface
+    app = TerminalInterface(get_db())
+    app.run()
+
+def run_gui() -> bool:
+    """Start the graphical interface; returns False if tkinter is unavailable"""
+    try:
+        from gui_interface import GUIInterface
+    except ImportError as e:
+        print(f"Erro ao carregar interface gráfica: {e}")
+        print("Certifique-se de que o tkinter está instalado.")
+        return False
+    app = GUIInterface(get_db())
+    app.run()
+    return True
+
+def initialize_database(interactive: bool = True) -> bool:
+    """Initialize and seed the database (path and page size from settings.py)"""
     try:
         from scripts.create_database import create_database
         from scripts.seed_database import seed_database
@@ -33,18 +83,562 @@ def initialize_database():
         seed_database()
         
         print("Base de dados inicializada com sucesso!")
-        input("Pressione Enter para continuar...")
-        
+        ok = True
+    
     except Exception as e:
         print(f"Erro ao inicializar base de dados: {e}")
+        ok = False
+    
+    if interactive:
         input("Pressione Enter para continuar...")
+    return ok
 
-def main():
-    """Main application entry point"""
+def run_command(args) -> int:
+    """Run a non-interactive subcommand; returns the process exit code"""
+    import argparse
+    import settings
+    
+    parser = argparse.ArgumentParser(prog='main.py', description="Sistema de Concessionária")
+    settings.add_arguments(parser)
+    subparsers = parser.add_subparsers(dest='command')
+    for name, help_text in (('tui', "interface de terminal"), ('gui', "interface gráfica")):
+        interface_parser = subparsers.add_parser(name, help=help_text)
+        interface_parser.add_argument('--memory-replica', type=float, metavar='SEGUNDOS',
+                                      help="ler de uma cópia em memória, atualizada a cada N segundos")
+        interface_parser.add_argument('--offline-journal', metavar='ARQUIVO',
+                                      help="guardar cadastros e vendas neste arquivo local se a base cair")
+    subparsers.add_parser('settings', help="configurações em uso e de onde vieram")
+    subparsers.add_parser('init', help="criar e popular a base de dados (tamanho de página: --page-size)")
+    
+    storage_parser = subparsers.add_parser('storage', help="layout da base e reorganização (VACUUM INTO)")
+    storage_parser.add_argument('--vacuum-into', metavar='ARQUIVO',
+                                help="gravar uma cópia reorganizada neste arquivo")
+    storage_parser.add_argument('--relayout', action='store_true',
+                                help="reorganizar a base em uso (com snapshot de segurança)")
+    storage_parser.add_argument('--no-safety', action='store_true',
+                                help="não criar snapshot antes de reorganizar")
+    
+    backup_parser = subparsers.add_parser('backup', help="criar snapshot da base de dados")
+    backup_parser.add_argument('--dir', default=None, help="pasta dos snapshots")
+    backup_parser.add_argument('--no-compress', action='store_true', help="não compactar com gzip")
+    backup_parser.add_argument('--every', type=float, metavar='MINUTOS',
+                               help="repetir a cada N minutos até Ctrl+C")
+    backup_parser.add_argument('--keep', type=int, default=24, help="snapshots mantidos (retenção)")
+    
+    snapshots_parser = subparsers.add_parser('snapshots', help="listar snapshots")
+    snapshots_parser.add_argument('--dir', default=None, help="pasta dos snapshots")
+    
+    verify_parser = subparsers.add_parser('verify', help="verificar a integridade de um snapshot")
+    verify_parser.add_argument('snapshot')
+    
+    restore_parser = subparsers.add_parser('restore', help="restaurar um snapshot")
+    restore_parser.add_argument('snapshot', nargs='?', help="arquivo do snapshot")
+    restore_parser.add_argument('--at', metavar='"AAAA-MM-DD HH:MM"',
+                                help="restaurar o último snapshot anterior a este instante")
+    restore_parser.add_argument('--dir', default=None, help="pasta dos snapshots")
+    restore_parser.add_argument('--no-safety', action='store_true',
+                                help="não criar snapshot da base atual antes de restaurar")
+    
+    replicate_parser = subparsers.add_parser('replicate', help="atualizar uma réplica pelo change log")
+    replicate_parser.add_argument('replica', help="arquivo da réplica (criado se não existir)")
+    replicate_parser.add_argument('--every', type=float, metavar='SEGUNDOS',
+                                  help="repetir a cada N segundos até Ctrl+C")
+    
+    import_parser = subparsers.add_parser('import', help="importar veículos, clientes ou funcionários de um CSV")
+    import_parser.add_argument('table', choices=('vehicles', 'customers', 'employees'))
+    import_parser.add_argument('path', help="arquivo CSV com cabeçalho (nomes das colunas da tabela)")
+    import_parser.add_argument('--check', action='store_true', help="apenas validar, sem gravar")
+    import_parser.add_argument('--max-errors', type=int, default=20, help="erros mostrados")
+    
+    sales_view_parser = subparsers.add_parser('sales-view', help="verificar a tabela de leitura das vendas")
+    sales_view_parser.add_argument('--rebuild', action='store_true',
+                                   help="recalcular sales_view a partir das tabelas de origem")
+    
+    offline_parser = subparsers.add_parser('offline', help="diário offline: pendências e conflitos")
+    offline_parser.add_argument('--journal', default=None, metavar='ARQUIVO', help="arquivo do diário")
+    offline_parser.add_argument('--replay', action='store_true', help="gravar as entradas pendentes na base")
+    offline_parser.add_argument('--conflicts', type=int, default=10, metavar='N', help="conflitos mostrados")
+    
+    dedup_parser = subparsers.add_parser('dedup', help="encontrar e unir clientes duplicados")
+    dedup_parser.add_argument('--threshold', type=float, default=None, help="pontuação mínima (0 a 1)")
+    dedup_parser.add_argument('--max-block', type=int, default=None,
+                              help="ignorar blocos com mais clientes que isto")
+    dedup_parser.add_argument('--limit', type=int, default=20, help="grupos mostrados")
+    dedup_parser.add_argument('--merge', type=int, nargs='+', metavar='ID',
+                              help="unir os clientes seguintes ao primeiro ID")
+    
+    compact_parser = subparsers.add_parser('compact-log', help="compactar o change log")
+    compact_parser.add_argument('--retain', type=int, default=10000,
+                                help="entradas recentes sem compactar (limite de atraso das réplicas)")
+    
+    archive_parser = subparsers.add_parser('archive', help="arquivar vendas antigas e veículos vendidos")
+    archive_parser.add_argument('--months', type=int, default=24,
+                                help="arquivar vendas com mais de N meses")
+    archive_parser.add_argument('--every', type=float, metavar='HORAS',
+                                help="repetir a cada N horas até Ctrl+C")
+    archive_parser.add_argument('--report', action='store_true',
+                                help="apenas mostrar o tamanho das tabelas")
+    
+    stores_parser = subparsers.add_parser('stores', help="consultas consolidadas entre lojas")
+    stores_parser.add_argument('--store', action='append', required=True, metavar='NOME=ARQUIVO',
+                               help="base de uma loja (repita para cada loja)")
+    stores_actions = stores_parser.add_subparsers(dest='action', required=True)
+    stores_actions.add_parser('summary', help="resumo geral de todas as lojas")
+    stores_search = stores_actions.add_parser('search', help="buscar veículos em todas as lojas")
+    stores_search.add_argument('query')
+    stores_vehicle = stores_actions.add_parser('vehicle', help="localizar um veículo pelo ID")
+    stores_vehicle.add_argument('vehicle_id', type=int)
+    stores_actions.add_parser('assign-ids', help="dar a cada loja sua própria faixa de IDs")
+    
+    jobs_parser = subparsers.add_parser('jobs', help="fila de tarefas em segundo plano")
+    jobs_actions = jobs_parser.add_subparsers(dest='action', required=True)
+    jobs_list = jobs_actions.add_parser('list', help="listar tarefas recentes")
+    jobs_list.add_argument('--status', choices=('queued', 'running', 'done', 'failed', 'cancelled'))
+    jobs_list.add_argument('--limit', type=int, default=20)
+    jobs_worker = jobs_actions.add_parser('worker', help="executar tarefas da fila até Ctrl+C")
+    jobs_worker.add_argument('--workers', type=int, default=None,
+                             help="tarefas executadas ao mesmo tempo (padrão: job_workers da configuração)")
+    jobs_submit = jobs_actions.add_parser('submit', help="enfileirar uma tarefa")
+    jobs_submit.add_argument('kind', help="backup, archive, report, pricing, dedup ou export")
+    jobs_submit.add_argument('--param', action='append', default=[], metavar='CHAVE=VALOR',
+                             help="parâmetro da tarefa (valor em JSON ou texto; repita para cada um)")
+    jobs_submit.add_argument('--priority', type=int, help="maior executa primeiro")
+    jobs_submit.add_argument('--max-attempts', type=int, default=3)
+    for action, help_text in (('show', "detalhes de uma tarefa"), ('cancel', "cancelar uma tarefa"),
+                              ('retry', "repetir uma tarefa que falhou ou foi cancelada")):
+        jobs_actions.add_parser(action, help=help_text).add_argument('job_id', type=int)
+    jobs_prune = jobs_actions.add_parser('prune', help="apagar tarefas terminadas há mais de N dias")
+    jobs_prune.add_argument('--days', type=int, default=30)
+    
+    options = parser.parse_args(args)
+    try:
+        settings.use_settings(settings.from_arguments(options))
+    except ValueError as e:
+        print(f"Erro na configuração: {e}")
+        return 1
+    
+    if getattr(options, 'memory_replica', None):
+        get_db().enable_read_replica(refresh_interval=options.memory_replica)
+    if getattr(options, 'offline_journal', None):
+        get_db().enable_offline_mode(options.offline_journal)
+    
+    if options.command is None:
+        run_menu()
+    elif options.command == 'settings':
+        print(settings.get_settings().describe())
+    elif options.command == 'tui':
+        run_terminal()
+    elif options.command == 'gui':
+        if not run_gui():
+            return 1
+    elif options.command == 'init':
+        if not initialize_database(interactive=False):
+            return 1
+    elif options.command == 'storage':
+        return run_storage_command(options)
+    elif options.command in ('backup', 'snapshots', 'verify', 'restore'):
+        return run_backup_command(options)
+    elif options.command == 'replicate':
+        from replication import ReplicaFollower
+        follower = ReplicaFollower(get_db(), options.replica, interval=options.every or 0,
+                                   on_sync=lambda applied: print(f"{applied} alteração(ões) aplicada(s)"),
+                                   on_error=lambda e: print(f"Erro na replicação: {e}"))
+        if options.every:
+            follower.run_forever()
+        else:
+            follower.sync()
+    elif options.command == 'import':
+        return run_import_command(options)
+    elif options.command == 'sales-view':
+        if options.rebuild:
+            rows = get_db().rebuild_sales_view()
+            print(f"sales_view recalculada: {rows} venda(s)")
+        differences = get_db().check_sales_view()
+        print(f"sales_view: {differences} linha(s) divergente(s)")
+        if differences:
+            print("Use --rebuild para recalcular.")
+            return 1
+    elif options.command == 'dedup':
+        return run_dedup_command(options)
+    elif options.command == 'offline':
+        return run_offline_command(options)
+    elif options.command == 'compact-log':
+        removed = get_db().compact_change_log(retain=options.retain)
+        print(f"{removed} entrada(s) removida(s) do change log")
+    elif options.command == 'archive':
+        return run_archive_command(options)
+    elif options.command == 'stores':
+        return run_stores_command(options)
+    elif options.command == 'jobs':
+        return run_jobs_command(options)
+    return 0
+
+def run_storage_command(options) -> int:
+    """Show the database layout, or rewrite it with VACUUM INTO"""
+    import os
+    import sqlite3
+    import storage
+    from backup import BackupError
+    from settings import get_settings
+    
+    db_path = get_settings().db_path
+    # Page size of the re-laid-out copy (None keeps the current one)
+    page_size = get_settings().page_size
+    
+    def print_info(path):
+        info = storage.storage_info(path)
+        print(f"{path}: página de {info['page_size']} bytes, {info['page_count']} páginas "
+              f"({info['freelist_count']} livres), {info['file_bytes'] / 1024 / 1024:.1f} MB, "
+              f"journal {info['journal_mode']}")
+    
+    if not os.path.exists(db_path):
+        print(f"Base de dados não encontrada: {db_path}")
+        return 1
+    print_info(db_path)
+    try:
+        if options.vacuum_into:
+            stats = storage.vacuum_into(db_path, options.vacuum_into, page_size)
+            print(f"Cópia reorganizada em {stats['seconds']:.1f} s:")
+            print_info(options.vacuum_into)
+        elif options.relayout:
+            stats = storage.relayout(db_path, page_size, safety_snapshot=not options.no_safety)
+            if stats['safety_snapshot']:
+                print(f"Base anterior salva em {stats['safety_snapshot']}")
+            print(f"Base reorganizada em {stats['seconds']:.1f} s:")
+            print_info(db_path)
+    except (BackupError, OSError, ValueError, sqlite3.Error) as e:
+        print(f"Erro: {e}")
+        return 1
+    return 0
+
+def run_jobs_command(options) -> int:
+    """Inspect and feed the background job queue, or run its workers"""
+    import json
+    import os
+    import jobs
+    
+    queue = jobs.JobQueue(get_db())
+    
+    def print_job(job):
+        print(f"{job['id']:>6}  {job['kind']:<8} {jobs.STATUS_LABELS[job['status']]:<11} "
+              f"{job['progress'] * 100:5.1f}%  tentativa {job['attempts']}/{job['max_attempts']}  "
+              f"{job['created_at']}  {job['error'] or job['message'] or ''}")
+    
+    if options.action == 'list':
+        listed = queue.list(options.status, options.limit)
+        if not listed:
+            print("Nenhuma tarefa.")
+        for job in listed:
+            print_job(job)
+    
+    elif options.action == 'worker':
+        runner = jobs.JobRunner(get_db(), workers=options.workers, on_finish=print_job)
+        print(f"Executando tarefas com {runner.workers} worker(s). Ctrl+C para parar.")
+        runner.run_forever()
+    
+    elif options.action == 'submit':
+        params = {}
+        for spec in options.param:
+            key, sep, value = spec.partition('=')
+            if not sep or not key:
+                print(f"Parâmetro inválido: {spec} (use CHAVE=VALOR)")
+                return 1
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                params[key] = value
+            if key in jobs.PATH_PARAMS and isinstance(params[key], str):
+                params[key] = os.path.abspath(params[key])
+        try:
+            job_id = queue.submit(options.kind, params, options.priority, options.max_attempts)
+        except ValueError as e:
+            print(f"Erro: {e}")
+            return 1
+        print(f"Tarefa {job_id} enfileirada.")
+    
+    elif options.action == 'show':
+        job = queue.get(options.job_id)
+        if not job:
+            print("Tarefa não encontrada.")
+            return 1
+        print(json.dumps(job, indent=2, ensure_ascii=False, default=str))
+    
+    elif options.action == 'cancel':
+        if not queue.cancel(options.job_id):
+            print("Tarefa não encontrada ou já terminada.")
+            return 1
+        print("Cancelamento solicitado.")
+    
+    elif options.action == 'retry':
+        if not queue.retry(options.job_id):
+            print("Só tarefas que falharam ou foram canceladas podem ser repetidas.")
+            return 1
+        print(f"Tarefa {options.job_id} enfileirada novamente.")
+    
+    elif options.action == 'prune':
+        print(f"{queue.prune(options.days)} tarefa(s) apagada(s)")
+    return 0
+
+def run_import_command(options) -> int:
+    """Validate a CSV file and insert its valid rows"""
+    import csv
+    import time
+    from validation import validate_batch
+    
+    try:
+        with open(options.path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            columns = [column.strip() for column in next(reader, [])]
+            # Short rows are padded so every column has a value
+            rows = [row + [''] * (len(columns) - len(row)) for row in reader if any(cell.strip() for cell in row)]
+    except OSError as e:
+        print(f"Erro ao ler {options.path}: {e}")
+        return 1
+    
+    start = time.perf_counter()
+    try:
+        if options.check:
+            valid, _, errors = validate_batch(options.table, columns, rows)
+            inserted = 0
+        else:
+            result = get_db().import_rows(options.table, columns, rows)
+            inserted, errors = result['inserted'], result['errors']
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    
+    for index, column, message in errors[:options.max_errors]:
+        # Line 1 of the file is the header
+        print(f"linha {index + 2}: {column}: {message}")
+    if len(errors) > options.max_errors:
+        print(f"... e mais {len(errors) - options.max_errors} erro(s)")
+    rejected = len({index for index, _, _ in errors})
+    if options.check:
+        print(f"{len(valid)} linha(s) válida(s), {rejected} com erro ({len(rows) / max(elapsed, 1e-9):,.0f} linhas/s)")
+    else:
+        print(f"{inserted} linha(s) importada(s), {rejected} rejeitada(s) em {elapsed:.2f} s")
+    return 1 if errors else 0
+
+def run_offline_command(options) -> int:
+    """Show pending offline journal entries and conflicts, or replay the journal"""
+    import sqlite3
+    from offline import DEFAULT_JOURNAL_PATH, OfflineJournal, OfflineWriter, recent_conflicts
+    
+    journal = OfflineJournal(options.journal or DEFAULT_JOURNAL_PATH, sync_interval=0)
+    writer = OfflineWriter(get_db(), journal, probe_interval=None)
+    try:
+        print(f"{journal.path}: {len(journal)} entrada(s) pendente(s)")
+        if options.replay and len(journal):
+            try:
+                counts = writer.replay()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Base de dados indisponível: {e}")
+                return 1
+            print(f"{counts['applied']} gravada(s), {counts['skipped']} já gravada(s), "
+                  f"{counts['conflict']} conflito(s)")
+    finally:
+        writer.stop()
+    
+    conflicts = recent_conflicts(get_db(), options.conflicts)
+    if conflicts:
+        print("\nConflitos recentes:")
+    for conflict in conflicts:
+        print(f"  {conflict['replayed_at']}  {conflict['terminal']:<15} {conflict['operation']:<13} "
+              f"{conflict['reason']}  {conflict['payload']}")
+    return 0
+
+def run_dedup_command(options) -> int:
+    """List likely duplicate customers, or merge the given ones"""
+    import dedup
+    
+    db = get_db()
+    if options.merge:
+        if len(options.merge) < 2:
+            print("Informe o cliente a manter e ao menos um duplicado.")
+            return 1
+        try:
+            moved = db.merge_customers(options.merge[0], options.merge[1:])
+        except ValueError as e:
+            print(f"Erro: {e}")
+            return 1
+        print(f"{len(set(options.merge[1:]) - {options.merge[0]})} cliente(s) unido(s) ao cliente "
+              f"{options.merge[0]}, {moved} venda(s) transferida(s)")
+        return 0
+    
+    threshold = options.threshold if options.threshold is not None else dedup.DEFAULT_THRESHOLD
+    max_block = options.max_block if options.max_block is not None else dedup.MAX_BLOCK_SIZE
+    result = dedup.find_duplicates(db, threshold, max_block)
+    stats = result['stats']
+    print(f"{stats['customers']} cliente(s), {stats['compared']} par(es) comparado(s) em "
+          f"{stats['seconds']:.1f} s ({stats['skipped_blocks']} bloco(s) grande(s) ignorado(s))")
+    shown = result['groups'][:options.limit]
+    group_of = {customer_id: number for number, group in enumerate(shown) for customer_id in group}
+    group_pairs = [[] for _ in shown]
+    for pair in result['pairs']:
+        # Pairs left out of a group (conflicting CPFs) are not shown under it
+        if pair['ids'][0] in group_of and group_of.get(pair['ids'][1]) == group_of[pair['ids'][0]]:
+            group_pairs[group_of[pair['ids'][0]]].append(pair)
+    for group, pairs in zip(shown, group_pairs):
+        customers = [db.get_customer_by_id(customer_id) for customer_id in group]
+        print(f"\nGrupo: python main.py dedup --merge {' '.join(map(str, group))}")
+        for customer in customers:
+            if customer:
+                print(f"  {customer['id']:>7}  {customer['name']:<30} {customer['email']:<32} "
+                      f"{customer['phone']:<16} {customer['cpf'] or ''}")
+        for pair in pairs:
+            first, second = pair['ids']
+            print(f"    {first} ~ {second}: {pair['score']:.2f} ({', '.join(pair['reasons'])})")
+    if len(result['groups']) > options.limit:
+        print(f"\n... e mais {len(result['groups']) - options.limit} grupo(s)")
+    print(f"\n{len(result['groups'])} grupo(s) de prováveis duplicados")
+    return 0
+
+def run_archive_command(options) -> int:
+    """Move old sales and sold vehicles to the archive tables"""
+    import archive
+    
+    def print_sizes():
+        for table, size in archive.table_sizes(get_db()).items():
+            megabytes = f"{size['bytes'] / 1024 / 1024:8.1f} MB" if size['bytes'] is not None else ''
+            print(f"{table:<18} {size['rows']:>10} linha(s) {megabytes}")
+    
+    print_sizes()
+    if options.report:
+        return 0
+    
+    def report(moved):
+        print(f"\n{moved['sales']} venda(s) e {moved['vehicles']} veículo(s) arquivado(s)")
+        print_sizes()
+    
+    scheduler = archive.ArchiveScheduler(get_db(), options.months, interval_hours=options.every or 0,
+                                         on_archive=report,
+                                         on_error=lambda e: print(f"Erro ao arquivar: {e}"))
+    if options.every:
+        print(f"Arquivando a cada {options.every:g} hora(s). Ctrl+C para parar.")
+        scheduler.run_forever()
+    else:
+        scheduler.archive()
+    return 0
+
+def run_stores_command(options) -> int:
+    """Federated queries over several store databases"""
+    from federation import FederatedDatabase, FederationError
+    
+    stores = {}
+    for spec in options.store:
+        name, sep, path = spec.partition('=')
+        if not sep or not name or not path:
+            print(f"Loja inválida: {spec} (use NOME=ARQUIVO)")
+            return 1
+        stores[name] = path
+    
+    try:
+        federation = FederatedDatabase(stores)
+    except FederationError as e:
+        print(f"Erro: {e}")
+        return 1
+    with federation:
+        if options.action == 'summary':
+            summary = federation.get_sales_summary()
+            for name, store_summary in summary['by_store'].items():
+                print(f"{name:<15} vendas={store_summary['total_sales']:>6}  "
+                      f"receita=R${store_summary['total_revenue'] or 0:>14,.2f}  "
+                      f"disponíveis={store_summary['available_vehicles']:>5}  "
+                      f"clientes={store_summary['total_customers']:>6}")
+            print(f"{'TOTAL':<15} vendas={summary['total_sales']:>6}  "
+                  f"receita=R${summary['total_revenue']:>14,.2f}  "
+                  f"disponíveis={summary['available_vehicles']:>5}  "
+                  f"clientes={summary['total_customers']:>6}")
+        
+        elif options.action == 'search':
+            for vehicle in federation.search_vehicles(options.query):
+                print(f"{vehicle['store']:<15} {vehicle['id']:>15}  {vehicle['brand']} {vehicle['model']} "
+                      f"{vehicle['year']}  R${vehicle['price']:,.2f}  {vehicle['status']}")
+        
+        elif options.action == 'vehicle':
+            vehicles = federation.find_vehicle_everywhere(options.vehicle_id)
+            if not vehicles:
+                print("Veículo não encontrado em nenhuma loja.")
+                return 1
+            for vehicle in vehicles:
+                print(f"{vehicle['store']}: {vehicle['brand']} {vehicle['model']} {vehicle['year']} "
+                      f"R${vehicle['price']:,.2f} ({vehicle['status']})")
+        
+        elif options.action == 'assign-ids':
+            for name, index in federation.configure_id_ranges().items():
+                print(f"{name}: IDs a partir de {index << 40}")
+        
+        for name, error in federation.last_errors.items():
+            print(f"Aviso: loja {name} indisponível ({error})")
+    return 0
+
+def run_backup_command(options) -> int:
+    """Backup, snapshot listing, verification and restore subcommands"""
+    import backup
+    from settings import get_settings
+    
+    db_path = get_settings().db_path
+    backup_dir = getattr(options, 'dir', None) or backup.DEFAULT_BACKUP_DIR
+    
+    try:
+        if options.command == 'backup':
+            scheduler = backup.SnapshotScheduler(
+                db_path, backup_dir, interval_minutes=options.every or 0,
+                keep=options.keep, compress=not options.no_compress,
+                on_snapshot=lambda path: print(f"Snapshot criado: {path}"),
+                on_error=lambda e: print(f"Erro ao criar snapshot: {e}"))
+            if options.every:
+                print(f"Criando snapshots a cada {options.every:g} minuto(s). Ctrl+C para parar.")
+                scheduler.run_forever()
+            else:
+                scheduler.take_snapshot()
+        
+        elif options.command == 'snapshots':
+            snapshots = backup.list_snapshots(backup_dir)
+            if not snapshots:
+                print("Nenhum snapshot encontrado.")
+            for manifest in snapshots:
+                print(f"{manifest['created_at']}  {manifest['snapshot_bytes'] / 1024 / 1024:8.1f} MB  "
+                      f"{manifest['path']}")
+        
+        elif options.command == 'verify':
+            problems = backup.verify_snapshot(options.snapshot)
+            if problems:
+                print("Snapshot com problemas:")
+                for problem in problems:
+                    print(f"  {problem}")
+                return 1
+            print("Snapshot íntegro.")
+        
+        elif options.command == 'restore':
+            snapshot = options.snapshot
+            if options.at:
+                from datetime import datetime
+                manifest = backup.find_snapshot_at(datetime.fromisoformat(options.at), backup_dir)
+                if not manifest:
+                    print(f"Nenhum snapshot anterior a {options.at}.")
+                    return 1
+                snapshot = manifest['path']
+            if not snapshot:
+                print("Informe o snapshot ou --at.")
+                return 1
+            safety = backup.restore_snapshot(snapshot, db_path, backup_dir,
+                                             safety_snapshot=not options.no_safety)
+            if safety:
+                print(f"Base atual salva em {safety}")
+            print(f"Base de dados restaurada a partir de {snapshot}")
+    
+    except (backup.BackupError, OSError, ValueError) as e:
+        print(f"Erro: {e}")
+        return 1
+    return 0
+
+def run_menu():
+    """Interactive interface selection loop (exits the process on '0' or Ctrl+C)"""
     while True:
         try:
-            # Clear screen
-            os.system('cls' if os.name == 'nt' else 'clear')
+            clear_screen()
             
             show_interface_menu()
             
@@ -52,33 +646,25 @@ def main():
             
             if choice == '1':
                 # Terminal interface
-                from terminal_interface import TerminalInterface
-                app = TerminalInterface()
-                app.run()
-                
+                run_terminal()
+            
             elif choice == '2':
                 # GUI interface
-                try:
-                    from gui_interface import GUIInterface
-                    app = GUIInterface()
-                    app.run()
-                except ImportError as e:
-                    print(f"Erro ao carregar interface gráfica: {e}")
-                    print("Certifique-se de que o tkinter está instalado.")
+                if not run_gui():
                     input("Pressione Enter para continuar...")
-                
+            
             elif choice == '3':
                 # Initialize database
                 initialize_database()
-                
+            
             elif choice == '0':
                 print("Obrigado por usar o Sistema de Concessionária!")
                 sys.exit(0)
-                
+            
             else:
                 print("Opção inválida!")
                 input("Pressione Enter para continuar...")
-                
+        
         except KeyboardInterrupt:
             print("\n\nSaindo do sistema...")
             sys.exit(0)
@@ -86,5 +672,16 @@ def main():
             print(f"Erro inesperado: {e}")
             input("Pressione Enter para continuar...")
 
+def main():
+    """Main application entry point"""
+    if len(sys.argv) > 1:
+        try:
+            sys.exit(run_command(sys.argv[1:]))
+        except KeyboardInterrupt:
+            print("\n\nSaindo do sistema...")
+            sys.exit(0)
+    # Without arguments, settings come from the config file and environment on first use
+    run_menu()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,41 @@
+import re
+import unicodedata
+
+_NON_DIGITS = re.compile(r'\D+')
+_WHITESPACE = re.compile(r'\s+')
+
+def digits_only(value: str) -> str:
+    """Strip everything but digits (used for phones and CPFs)"""
+    return _NON_DIGITS.sub('', value or '')
+
+def fold_text(value: str) -> str:
+    """Case-fold and strip accents so 'João' and 'joao' compare equal"""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _WHITESPACE.sub(' ', stripped).strip().casefold()
+
+def format_cpf(value: str) -> str:
+    """Format an 11-digit CPF as 000.000.000-00; other input is returned as is"""
+    digits = digits_only(value)
+    if len(digits) != 11:
+        return value
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix.
+    
+    Lets a prefix search run as an index range scan:
+    ``key >= prefix AND key < prefix_upper_bound(prefix)``.
+    """
+    return prefix + '\uffff'
+
+def phone_key(value: str) -> str:
+    """Canonical phone digits: drops the +55 country code and the trunk zero"""
+    digits = digits_only(value)
+    if len(digits) in (12, 13) and digits.startswith('55'):
+        digits = digits[2:]
+    if len(digits) in (11, 12) and digits.startswith('0'):
+        digits = digits[1:]
+    return digits
@@ -0,0 +1,369 @@
+"""
+Offline mode: sales keep being recorded while the database is unreachable.
+
+When the database file lives on a network share that goes away, the
+writes a seller makes (add_vehicle, add_customer, add_sale) are appended
+to a local journal instead of failing, and replayed once the database
+answers again (see DatabaseManager.enable_offline_mode).
+
+The journal has one line per write, "<crc32> <json>", appended through a
+file descriptor opened with O_APPEND: the line reaches the OS at once,
+so a crash of the program loses nothing, while fsync runs in the
+background every ``sync_interval`` seconds for all lines written since.
+A write costs a few microseconds; a power loss can only lose the last
+interval. A torn last line fails its checksum and is cut off (and kept
+aside) when the journal is opened.
+
+Replay applies each entry in a savepoint together with a row in
+offline_replays keyed by the entry's id, so replaying an entry again
+(after a crash, from a second process) is skipped. Entries that cannot
+apply are recorded there as conflicts instead of stopping the replay: a
+sale of a vehicle sold meanwhile, a customer whose email or CPF is
+already registered (later sales of that customer go to the registered
+one).
+
+Rows created offline get provisional negative ids, so a sale can refer to
+a customer registered during the outage; replay maps them to the real ids.
+
+Usage (from the project root):
+    python main.py tui --offline-journal data/offline-journal.jsonl
+    python main.py offline                  # pending entries and recent conflicts
+    python main.py offline --replay
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from scheduling import PeriodicTask
+from settings import DATA_DIR
+
+# Must be on a local disk, not next to a database on a network share
+DEFAULT_JOURNAL_PATH = os.path.join(DATA_DIR, 'offline-journal.jsonl')
+
+# Journal operation -> DatabaseManager method inserting a validated row with a cursor
+OPERATIONS = {
+    'add_vehicle': '_insert_vehicle',
+    'add_customer': '_insert_customer',
+    'add_sale': '_insert_sale',
+}
+
+# Entries applied per replay transaction
+REPLAY_BATCH_SIZE = 500
+
+# sqlite3 messages meaning the file cannot be reached, as opposed to a busy
+# database or a failing statement
+_UNAVAILABLE_MESSAGES = ('unable to open', 'i/o error')
+
+TERMINAL = socket.gethostname()
+
+OFFLINE_NOTICE = ("Base de dados indisponível: registro guardado localmente com ID provisório "
+                  "e enviado quando a conexão voltar.")
+
+def is_unavailable(error: Exception) -> bool:
+    """Whether ``error`` means the database file cannot be reached right now"""
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(text in message for text in _UNAVAILABLE_MESSAGES)
+    return isinstance(error, OSError)
+
+def _encode_line(entry: Dict) -> bytes:
+    data = json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode()
+    return b'%08x %s\n' % (zlib.crc32(data), data)
+
+def _decode_line(line: bytes) -> Optional[Dict]:
+    """The entry of a journal line, or None if the line is torn or damaged"""
+    if not line.endswith(b'\n'):
+        return None
+    checksum, _, data = line[:-1].partition(b' ')
+    try:
+        if int(checksum, 16) != zlib.crc32(data):
+            return None
+        return json.loads(data)
+    except ValueError:
+        return None
+
+class OfflineJournal:
+    """Append-only, checksummed local journal of writes"""
+    
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH, sync_interval: float = 0.05):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.entries = self._recover()
+        self._last_local_id = min([entry['local_id'] for entry in self.entries] + [0])
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        self._unsynced = 0
+        # Without an interval every append is synced before returning
+        self._syncer = None
+        if sync_interval:
+            self._syncer = PeriodicTask(sync_interval, self.sync, name='offline-journal-sync')
+            self._syncer.start()
+    
+    def _recover(self) -> List[Dict]:
+        """Entries in the file; a damaged tail is moved to <path>.damaged and cut off"""
+        entries = []
+        valid_bytes = 0
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    entry = _decode_line(line)
+                    if entry is None:
+                        break
+                    entries.append(entry)
+                    valid_bytes += len(line)
+                f.seek(valid_bytes)
+                tail = f.read()
+        except FileNotFoundError:
+            return entries
+        if tail:
+            with open(self.path + '.damaged', 'ab') as f:
+                f.write(tail)
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+                os.fsync(f.fileno())
+        return entries
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def append(self, operation: str, values: Dict, sync: bool = False) -> Dict:
+        """Journal one write and return its entry (with a new provisional ``local_id``)"""
+        with self._lock:
+            self._last_local_id -= 1
+            entry = {'id': uuid.uuid4().hex, 'op': operation, 'values': values, 'local_id': self._last_local_id,
+                     'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'terminal': TERMINAL}
+            os.write(self._fd, _encode_line(entry))
+            self.entries.append(entry)
+            self._unsynced += 1
+        if sync or self._syncer is None:
+            self.sync()
+        return entry
+    
+    def pending(self, start: int = 0) -> List[Dict]:
+        """Entries from position ``start`` on"""
+        with self._lock:
+            return self.entries[start:]
+    
+    def sync(self):
+        """fsync the lines appended since the last sync"""
+        with self._lock:
+            if not self._unsynced:
+                return
+            self._unsynced = 0
+        os.fsync(self._fd)
+    
+    def clear(self, count: int) -> bool:
+        """Empty the journal if it holds exactly ``count`` entries (all replayed); returns whether it did"""
+        with self._lock:
+            if len(self.entries) != count:
+                return False
+            os.ftruncate(self._fd, 0)
+            os.fsync(self._fd)
+            self.entries = []
+            self._unsynced = 0
+            return True
+    
+    def close(self):
+        if self._syncer is not None:
+            self._syncer.stop()
+        self.sync()
+        os.close(self._fd)
+
+class OfflineWriter:
+    """Sends writes to the database or, while it is unreachable, to the journal"""
+    
+    def __init__(self, db, journal: OfflineJournal, probe_interval: float = 5.0):
+        self.db = db
+        self.journal = journal
+        # Entries left from an earlier outage go first
+        self.online = not len(journal)
+        self.last_error = None
+        # Provisional id -> real id of the rows replayed (provisional ids are
+        # not reused while the process runs)
+        self._id_map: Dict[int, int] = {}
+        # Held while writing, so the journal is only emptied between writes
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._probe = None
+        if probe_interval:
+            self._probe = PeriodicTask(probe_interval, self.probe, name='offline-probe', run_immediately=True,
+                                       on_error=lambda e: setattr(self, 'last_error', str(e)))
+    
+    def start(self):
+        if self._probe is not None:
+            self._probe.start()
+    
+    def stop(self):
+        if self._probe is not None:
+            self._probe.stop()
+        self.journal.close()
+    
+    def status(self) -> Dict:
+        return {'online': self.online, 'pending': len(self.journal), 'journal': self.journal.path,
+                'last_error': self.last_error}
+    
+    def write(self, operation: str, values: Dict) -> int:
+        """Apply a validated write; returns the new row id, negative (provisional) when journaled"""
+        with self._lock:
+            if self.online:
+                if operation == 'add_sale':
+                    values = self._resolve_ids(values)
+                try:
+                    with self.db.write_transaction() as conn:
+                        return getattr(self.db, OPERATIONS[operation])(conn.cursor(), values)
+                except (sqlite3.Error, OSError) as e:
+                    if not is_unavailable(e):
+                        raise
+                    self._go_offline(e)
+            return self.journal.append(operation, values)['local_id']
+    
+    def _resolve_ids(self, sale: Dict) -> Dict:
+        """Sale with provisional customer/vehicle ids replaced by the replayed rows' ids"""
+        sale = dict(sale)
+        for key in ('customer_id', 'vehicle_id'):
+            if sale[key] is not None and sale[key] < 0:
+                if sale[key] not in self._id_map:
+                    raise ValueError(f"ID provisório {sale[key]} não foi gravado na base de dados")
+                sale[key] = self._id_map[sale[key]]
+        return sale
+    
+    def _go_offline(self, error: Exception):
+        self.online = False
+        self.last_error = str(error)
+        # The broken connection is reopened on the next attempt
+        self.db.close()
+    
+    def probe(self) -> bool:
+        """Replay the journal if the database can be reached; returns whether writes go to it again"""
+        if self.online:
+            return True
+        try:
+            self.replay()
+        except (sqlite3.Error, OSError) as e:
+            if not is_unavailable(e):
+                raise
+            self._go_offline(e)
+        return self.online
+    
+    def _check_reachable(self):
+        """Raise unless the database file is there (without creating an empty one in its place)"""
+        conn = sqlite3.connect(f'file:{quote(os.path.abspath(self.db.db_path))}?mode=rw', uri=True)
+        try:
+            conn.execute('SELECT 1 FROM offline_replays LIMIT 1').fetchall()
+        finally:
+            conn.close()
+    
+    def replay(self) -> Dict[str, int]:
+        """Apply the journal to the database and empty it; returns applied, skipped and conflict counts.
+        
+        Raises the sqlite3/OS error if the database cannot be reached;
+        entries applied until then are skipped by the next replay.
+        """
+        counts = {'applied': 0, 'skipped': 0, 'conflict': 0}
+        with self._replay_lock:
+            self._check_reachable()
+            done = 0
+            while True:
+                entries = self.journal.pending(done)
+                if not entries:
+                    with self._lock:
+                        if self.journal.clear(done):
+                            self.online = True
+                            self.last_error = None
+                            return counts
+                    continue
+                for start in range(0, len(entries), REPLAY_BATCH_SIZE):
+                    for status, count in self._replay_batch(entries[start:start + REPLAY_BATCH_SIZE]).items():
+                        counts[status] += count
+                done += len(entries)
+    
+    def _replay_batch(self, entries: List[Dict]) -> Dict[str, int]:
+        counts = {'applied': 0, 'skipped': 0, 'conflict': 0}
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT entry_id, result_id FROM offline_replays WHERE entry_id IN "
+                       f"({', '.join('?' * len(entries))})", [entry['id'] for entry in entries])
+        replayed = dict(cursor.fetchall())
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self.db.write_transaction():
+            for entry in entries:
+                if entry['id'] in replayed:
+                    status, result_id = 'skipped', replayed[entry['id']]
+                else:
+                    status, result_id, reason = self._apply(cursor, entry)
+                    cursor.execute('''
+                        INSERT INTO offline_replays (entry_id, operation, payload, status, result_id, reason,
+                                                     terminal, recorded_at, replayed_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (entry['id'], entry['op'], json.dumps(entry['values'], ensure_ascii=False), status,
+                          result_id, reason, entry['terminal'], entry['at'], now))
+                if result_id is not None:
+                    self._id_map[entry['local_id']] = result_id
+                counts[status] += 1
+        return counts
+    
+    def _apply(self, cursor: sqlite3.Cursor, entry: Dict) -> Tuple[str, Optional[int], Optional[str]]:
+        """Apply one entry: ('applied', new id, None) or ('conflict', id or None, reason)"""
+        values = dict(entry['values'])
+        if entry['op'] == 'add_customer':
+            cursor.execute('SELECT id FROM customers WHERE email = ? OR cpf = ?', (values['email'], values['cpf']))
+            row = cursor.fetchone()
+            if row:
+                return 'conflict', row[0], f"cliente já cadastrado (ID {row[0]})"
+        elif entry['op'] == 'add_sale':
+            for key in ('customer_id', 'vehicle_id'):
+                if values[key] is not None and values[key] < 0:
+                    values[key] = self._id_map.get(values[key])
+            reason = sale_conflict(cursor, values)
+            if reason:
+                return 'conflict', None, reason
+        
+        cursor.execute('SAVEPOINT offline_entry')
+        try:
+            new_id = getattr(self.db, OPERATIONS[entry['op']])(cursor, values)
+        except sqlite3.IntegrityError as e:
+            cursor.execute('ROLLBACK TO offline_entry')
+            cursor.execute('RELEASE offline_entry')
+            return 'conflict', None, str(e)
+        cursor.execute('RELEASE offline_entry')
+        return 'applied', new_id, None
+
+def sale_conflict(cursor: sqlite3.Cursor, sale: Dict) -> Optional[str]:
+    """Why a sale recorded offline cannot be applied now, or None"""
+    if sale['customer_id'] is None:
+        return "cliente registrado offline não foi gravado"
+    if sale['vehicle_id'] is None:
+        return "veículo registrado offline não foi gravado"
+    cursor.execute('SELECT 1 FROM customers WHERE id = ?', (sale['customer_id'],))
+    if cursor.fetchone() is None:
+        return f"cliente {sale['customer_id']} não existe"
+    cursor.execute('SELECT status FROM vehicles WHERE id = ?', (sale['vehicle_id'],))
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute('SELECT 1 FROM vehicles_archive WHERE id = ?', (sale['vehicle_id'],))
+        return (f"veículo {sale['vehicle_id']} já vendido" if cursor.fetchone()
+                else f"veículo {sale['vehicle_id']} não existe")
+    if row[0] == 'Sold':
+        return f"veículo {sale['vehicle_id']} já vendido"
+    return None
+
+def recent_conflicts(db, limit: int = 20) -> List[Dict]:
+    """Journal entries that could not be applied, most recent first"""
+    with db.get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT entry_id, operation, payload, reason, terminal, recorded_at, replayed_at
+            FROM offline_replays WHERE status = 'conflict'
+            ORDER BY replayed_at DESC LIMIT ?
+        ''', (limit,))
+        return [dict(row, payload=json.loads(row['payload'])) for row in cursor.fetchall()]
@@ -0,0 +1,256 @@
+"""
+Paged, sorted and filtered listings read straight from the database.
+
+A PagedSource fetches one page at a time with the ORDER BY, WHERE and
+LIMIT pushed into SQL, so listing a table of any size costs a page of
+rows. Moving to the next or previous page continues from the last row
+seen (keyset pagination: ``(column, id) > (last value, last id)``), which
+an index on the sort column answers directly; only jumping to a page not
+reached that way falls back to OFFSET. Every sort is tie-broken by id so
+page boundaries are exact.
+
+Filters are simple expressions over the source's columns, e.g.
+``marca=Honda preco<60000 modelo~civ`` (see parse_filter).
+"""
+
+import shlex
+from typing import Dict, List, Tuple
+
+from normalization import fold_text
+
+DEFAULT_PAGE_SIZE = 20
+
+# Source -> FROM clause, id expression, default sort and its columns as
+# name -> (SQL expression, label, type). Column names are English (they
+# match the row keys); filters also accept the Portuguese labels.
+SOURCES = {
+    'vehicles': {
+        'from': 'vehicles',
+        'id': 'id',
+        'default_sort': ('created_at', True),
+        'columns': {
+            'id': ('id', 'ID', int),
+            'brand': ('brand', 'Marca', str),
+            'model': ('model', 'Modelo', str),
+            'year': ('year', 'Ano', int),
+            'color': ('color', 'Cor', str),
+            'price': ('price', 'Preço', float),
+            'mileage': ('mileage', 'Km', int),
+            'fuel_type': ('fuel_type', 'Combustível', str),
+            'transmission': ('transmission', 'Câmbio', str),
+            'status': ('status', 'Status', str),
+            'created_at': ('created_at', 'Cadastro', str),
+        },
+    },
+    'customers': {
+        'from': 'customers',
+        'id': 'id',
+        'default_sort': ('name', False),
+        'columns': {
+            'id': ('id', 'ID', int),
+            'name': ('name', 'Nome', str),
+            'email': ('email', 'Email', str),
+            'phone': ('phone', 'Telefone', str),
+            'cpf': ('cpf', 'CPF', str),
+            'created_at': ('created_at', 'Cadastro', str),
+        },
+    },
+    # Sales come from the trigger-maintained sales_view, already joined to
+    # customer, vehicle and salesperson
+    'sales': {
+        'from': 'sales_view',
+        'id': 'id',
+        'default_sort': ('sale_date', True),
+        'columns': {
+            'id': ('id', 'ID', int),
+            'sale_date': ('sale_date', 'Data', str),
+            'customer_name': ('customer_name', 'Cliente', str),
+            'brand': ('brand', 'Marca', str),
+            'model': ('model', 'Modelo', str),
+            'year': ('year', 'Ano', int),
+            'sale_price': ('sale_price', 'Preço', float),
+            'payment_method': ('payment_method', 'Pagamento', str),
+            'employee_name': ('employee_name', 'Vendedor', str),
+        },
+    },
+    'employees': {
+        'from': 'employees',
+        'id': 'id',
+        'default_sort': ('name', False),
+        'columns': {
+            'id': ('id', 'ID', int),
+            'name': ('name', 'Nome', str),
+            'email': ('email', 'Email', str),
+            'position': ('position', 'Cargo', str),
+            'salary': ('salary', 'Salário', float),
+            'hire_date': ('hire_date', 'Admissão', str),
+        },
+    },
+}
+
+# Operators of filter terms; at the same position the longest wins ('<=' over '<')
+FILTER_OPERATORS = ('<=', '>=', '!=', '<', '>', '=', '~')
+
+def _fold(name: str) -> str:
+    return fold_text(name).replace(' ', '_')
+
+def column_name(source: str, name: str) -> str:
+    """Column of ``source`` named ``name`` or labelled ``name`` (accents and case ignored)"""
+    columns = SOURCES[source]['columns']
+    if name in columns:
+        return name
+    folded = _fold(name)
+    for column, (_, label, _) in columns.items():
+        if folded in (_fold(column), _fold(label)):
+            return column
+    raise ValueError(f"coluna desconhecida: {name}")
+
+def parse_filter(source: str, text: str) -> Tuple[List[str], List]:
+    """SQL conditions and parameters for a filter expression.
+    
+    The expression is a list of ``column<op>value`` terms, all of which
+    must hold. Operators: = != < <= > >= and ~ (contains, case
+    insensitive). Values with spaces go in quotes: ``modelo~"gran siena"``.
+    Raises ValueError for unknown columns or malformed terms.
+    """
+    columns = SOURCES[source]['columns']
+    conditions = []
+    params = []
+    try:
+        terms = shlex.split(text or '')
+    except ValueError as e:
+        raise ValueError(f"filtro inválido: {e}") from None
+    for term in terms:
+        position, operator = min(((term.find(op), op) for op in FILTER_OPERATORS if op in term),
+                                 key=lambda found: (found[0], -len(found[1])), default=(-1, None))
+        if operator is None or position == 0:
+            raise ValueError(f"termo de filtro inválido: {term}")
+        column = column_name(source, term[:position].strip())
+        expression, _, value_type = columns[column]
+        value = term[position + len(operator):].strip()
+        if operator == '~':
+            conditions.append(f"{expression} LIKE ? ESCAPE '\\'")
+            escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f'%{escaped}%')
+            continue
+        if value_type is not str:
+            try:
+                value = value_type(value.replace(',', '.') if value_type is float else value)
+            except ValueError:
+                raise ValueError(f"valor inválido para {column}: {value}") from None
+        conditions.append(f'{expression} {"<>" if operator == "!=" else operator} ?')
+        params.append(value)
+    return conditions, params
+
+class PagedSource:
+    """One listing (vehicles, customers, sales or employees), read a page at a time"""
+    
+    def __init__(self, db, source: str, page_size: int = DEFAULT_PAGE_SIZE,
+                 sort: str = None, descending: bool = None, filter_text: str = ''):
+        if source not in SOURCES:
+            raise ValueError(f"listagem desconhecida: {source}")
+        self.db = db
+        self.source = source
+        self.page_size = page_size
+        self.definition = SOURCES[source]
+        default_column, default_descending = self.definition['default_sort']
+        self.sort = default_column
+        self.descending = default_descending
+        self.filter_text = ''
+        self._conditions, self._params = [], []
+        self._count = None
+        # Page number -> (sort value, id) of its last row, for keyset paging
+        self._boundaries: Dict[int, tuple] = {}
+        if sort:
+            self.set_sort(sort, descending)
+        if filter_text:
+            self.set_filter(filter_text)
+    
+    @property
+    def columns(self) -> Dict[str, tuple]:
+        return self.definition['columns']
+    
+    def set_sort(self, column: str, descending: bool = None):
+        """Sort by ``column``; without ``descending``, re-sorting the same column reverses it"""
+        column = column_name(self.source, column)
+        if descending is None:
+            descending = not self.descending if column == self.sort else False
+        self.sort = column
+        self.descending = descending
+        self._boundaries.clear()
+    
+    def set_filter(self, text: str):
+        """Replace the filter expression (empty clears it); raises ValueError if invalid"""
+        self._conditions, self._params = parse_filter(self.source, text)
+        self.filter_text = text or ''
+        self._count = None
+        self._boundaries.clear()
+    
+    def invalidate(self):
+        """Forget cached counts and boundaries after the data changed"""
+        self._count = None
+        self._boundaries.clear()
+    
+    def count(self) -> int:
+        """Rows matching the filter (cached until the filter changes)"""
+        if self._count is None:
+            where = ' AND '.join(self._conditions) or '1'
+            with self.db.get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT COUNT(*) FROM {self.definition['from']} WHERE {where}", self._params)
+                self._count = cursor.fetchone()[0]
+        return self._count
+    
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.count() // self.page_size))
+    
+    def page(self, number: int) -> List[Dict]:
+        """Rows of page ``number`` (0-based) under the current sort and filter"""
+        number = max(0, number)
+        expression = self.columns[self.sort][0]
+        id_expression = self.definition['id']
+        direction = 'DESC' if self.descending else 'ASC'
+        select = ', '.join(f'{sql} AS {name}' for name, (sql, _, _) in self.columns.items())
+        order = f'ORDER BY {expression} {direction}, {id_expression} {direction}'
+        
+        with self.db.get_read_connection() as conn:
+            cursor = conn.cursor()
+            
+            def fetch(conditions, params, limit, offset=0):
+                where = ' AND '.join(self._conditions + conditions) or '1'
+                cursor.execute(f"SELECT {select} FROM {self.definition['from']} WHERE {where} "
+                               f"{order} LIMIT ? OFFSET ?", self._params + params + [limit, offset])
+                return [dict(row) for row in cursor.fetchall()]
+            
+            boundary = self._boundaries.get(number - 1)
+            if number == 0:
+                rows = fetch([], [], self.page_size)
+            elif boundary is None:
+                rows = fetch([], [], self.page_size, number * self.page_size)
+            else:
+                rows = self._after(fetch, expression, id_expression, boundary)
+        
+        if rows:
+            self._boundaries[number] = (rows[-1][self.sort], rows[-1]['id'])
+        return rows
+    
+    def _after(self, fetch, expression: str, id_expression: str, boundary: tuple) -> List[Dict]:
+        """The page following ``boundary``.
+        
+        NULLs sort first ascending and last descending, so the order is two
+        runs (NULL values, then the rest, or the reverse). The page continues
+        the run the boundary is in and, if that run ends, starts the next one.
+        Each part is a range the sort column's index answers directly.
+        """
+        value, last_id = boundary
+        comparison = '<' if self.descending else '>'
+        if value is None:
+            rows = fetch([f'{expression} IS NULL', f'{id_expression} {comparison} ?'], [last_id], self.page_size)
+            if len(rows) < self.page_size and not self.descending:
+                rows += fetch([f'{expression} IS NOT NULL'], [], self.page_size - len(rows))
+            return rows
+        rows = fetch([f'({expression}, {id_expression}) {comparison} (?, ?)'], [value, last_id], self.page_size)
+        if len(rows) < self.page_size and self.descending:
+            rows += fetch([f'{expression} IS NULL'], [], self.page_size - len(rows))
+        return rows
@@ -0,0 +1,286 @@
+"""
+Sale price suggestions and inventory valuation.
+
+A ridge regression predicts the sale price of a vehicle from its brand,
+model, fuel type, transmission, age and mileage, fitted on past sales
+(archived ones included). The model is kept as sufficient statistics (X'X,
+X'y and the row count), which SQLite aggregates per vehicle category in a
+single query, so new sales are folded in incrementally and re-solving the model takes milliseconds. The
+statistics, the solved weights and the last sale id seen are cached in a
+JSON file next to the database.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from contention import retry_on_busy
+
+MODEL_FILENAME = 'pricing_model.json'
+MODEL_VERSION = 1
+
+# Below this many sales the suggestion would mostly be noise
+MIN_TRAINING_SALES = 20
+
+DEFAULT_RIDGE = 1.0
+
+# Suggestions are rounded to this many reais
+ROUND_TO = 100
+
+NUMERIC_FEATURES = ('intercept', 'age', 'mileage_10k')
+CATEGORY_FEATURES = ('brand', 'model', 'fuel_type', 'transmission')
+
+def _category_features(vehicle: Dict) -> List[str]:
+    return [
+        f"brand={vehicle.get('brand')}",
+        f"model={vehicle.get('brand')}|{vehicle.get('model')}",
+        f"fuel_type={vehicle.get('fuel_type')}",
+        f"transmission={vehicle.get('transmission')}",
+    ]
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+    """Solve a symmetric positive definite system by Cholesky decomposition"""
+    n = len(vector)
+    lower = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        row_i = lower[i]
+        for j in range(i + 1):
+            row_j = lower[j]
+            total = matrix[i][j] - sum(row_i[k] * row_j[k] for k in range(j))
+            if i == j:
+                row_i[i] = total ** 0.5 if total > 0 else 1e-12
+            else:
+                row_i[j] = total / row_j[j]
+    
+    forward = [0.0] * n
+    for i in range(n):
+        forward[i] = (vector[i] - sum(lower[i][k] * forward[k] for k in range(i))) / lower[i][i]
+    solution = [0.0] * n
+    for i in reversed(range(n)):
+        solution[i] = (forward[i] - sum(lower[k][i] * solution[k] for k in range(i + 1, n))) / lower[i][i]
+    return solution
+
+class PricingEngine:
+    """Suggested sale prices from a regression over past sales"""
+    
+    def __init__(self, db, model_path: str = None, ridge: float = DEFAULT_RIDGE):
+        self.db = db
+        self.model_path = model_path or os.path.join(os.path.dirname(db.db_path) or '.', MODEL_FILENAME)
+        self.ridge = ridge
+        self.model = self._load() or self._empty_model()
+        self._indexes = {}
+    
+    # Model state
+    def _empty_model(self) -> Dict:
+        return {
+            'version': MODEL_VERSION,
+            'source': os.path.abspath(self.db.db_path),
+            'features': list(NUMERIC_FEATURES),
+            'xtx': [[0.0] * len(NUMERIC_FEATURES) for _ in NUMERIC_FEATURES],
+            'xty': [0.0] * len(NUMERIC_FEATURES),
+            'rows': 0,
+            'last_sale_id': 0,
+            'weights': {},
+            'trained_at': None,
+        }
+    
+    def _load(self) -> Optional[Dict]:
+        try:
+            with open(self.model_path, encoding='utf-8') as f:
+                model = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if model.get('version') != MODEL_VERSION or model.get('source') != os.path.abspath(self.db.db_path):
+            return None
+        return model
+    
+    def _save(self):
+        tmp_path = self.model_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.model, f)
+        os.replace(tmp_path, self.model_path)
+    
+    def _feature_index(self, name: str) -> int:
+        """Index of a feature, growing X'X with zeros for one not seen before"""
+        features = self.model['features']
+        if name not in self._indexes:
+            self._indexes[name] = len(features)
+            features.append(name)
+            for row in self.model['xtx']:
+                row.append(0.0)
+            self.model['xtx'].append([0.0] * len(features))
+            self.model['xty'].append(0.0)
+        return self._indexes[name]
+    
+    # Training
+    @retry_on_busy
+    def refresh(self, force: bool = False) -> int:
+        """Fold sales recorded since the last refresh into the model; returns how many.
+        
+        Edits or deletions of already-counted sales cannot be subtracted
+        from the statistics, so when the number of counted sales no longer
+        matches, the model is rebuilt from scratch. The sales are read in
+        one snapshot, so the counts and sums agree with each other.
+        """
+        with self.db.read_transaction() as conn:
+            cursor = conn.cursor()
+            if force or self._count_sales(cursor, self.model['last_sale_id']) != self.model['rows']:
+                self.model = self._empty_model()
+            
+            max_id = self._latest_sale_id(cursor)
+            if max_id <= self.model['last_sale_id'] and self.model['trained_at']:
+                return 0
+            
+            # One row per vehicle category, with the sums that X'X and X'y need
+            cursor.execute('''
+                SELECT brand, model, fuel_type, transmission,
+                       COUNT(*) AS n, SUM(age) AS a, SUM(km) AS k,
+                       SUM(age * age) AS aa, SUM(age * km) AS ak, SUM(km * km) AS kk,
+                       SUM(y) AS y, SUM(y * age) AS ya, SUM(y * km) AS yk
+                FROM (
+                    SELECT COALESCE(v.brand, va.brand) AS brand, COALESCE(v.model, va.model) AS model,
+                           COALESCE(v.fuel_type, va.fuel_type) AS fuel_type,
+                           COALESCE(v.transmission, va.transmission) AS transmission,
+                           CAST(substr(s.sale_date, 1, 4) AS INTEGER) - COALESCE(v.year, va.year) AS age,
+                           COALESCE(v.mileage, va.mileage, 0) / 10000.0 AS km,
+                           s.sale_price AS y
+                    FROM (SELECT id, vehicle_id, sale_date, sale_price FROM sales WHERE id > ? AND id <= ?
+                          UNION ALL
+                          SELECT id, vehicle_id, sale_date, sale_price FROM sales_archive
+                          WHERE id > ? AND id <= ?) s
+                    LEFT JOIN vehicles v ON s.vehicle_id = v.id
+                    LEFT JOIN vehicles_archive va ON s.vehicle_id = va.id
+                    WHERE v.id IS NOT NULL OR va.id IS NOT NULL
+                )
+                GROUP BY brand, model, fuel_type, transmission
+            ''', (self.model['last_sale_id'], max_id) * 2)
+            groups = [dict(row) for row in cursor.fetchall()]
+            counted = self._count_sales(cursor, max_id)
+        
+        self._indexes = {name: i for i, name in enumerate(self.model['features'])}
+        added = 0
+        for group in groups:
+            self._accumulate(group)
+            added += group['n']
+        # Sales whose vehicle row is gone still count towards the consistency check
+        self.model['rows'] = counted
+        self.model['last_sale_id'] = max_id
+        self._fit()
+        self._save()
+        return added
+    
+    def refresh_if_stale(self) -> int:
+        """refresh() if the newest sale id changed since the last one (sales added or removed).
+        
+        The check reads two MAX(id) values, so screens can call it every
+        time they need suggestions. Edits to sales already counted wait for
+        the next sale or a full refresh().
+        """
+        with self.db.get_connection() as conn:
+            if self.model['trained_at'] and self._latest_sale_id(conn.cursor()) == self.model['last_sale_id']:
+                return 0
+        return self.refresh()
+    
+    @staticmethod
+    def _latest_sale_id(cursor) -> int:
+        """Highest sale id, archived or not (0 without sales)"""
+        cursor.execute('SELECT MAX(max_id) FROM (SELECT MAX(id) AS max_id FROM sales '
+                       'UNION ALL SELECT MAX(id) FROM sales_archive)')
+        return cursor.fetchone()[0] or 0
+    
+    @staticmethod
+    def _count_sales(cursor, max_id: int) -> int:
+        """Sales with id <= max_id, archived or not (archiving does not force a rebuild)"""
+        cursor.execute('SELECT (SELECT COUNT(*) FROM sales WHERE id <= ?) + '
+                       '(SELECT COUNT(*) FROM sales_archive WHERE id <= ?)', (max_id, max_id))
+        return cursor.fetchone()[0]
+    
+    def _accumulate(self, group: Dict):
+        xtx = self.model['xtx']
+        xty = self.model['xty']
+        n, a, k = group['n'], group['a'], group['k']
+        numeric = [0, 1, 2]
+        categories = [self._feature_index(name) for name in _category_features(group)]
+        
+        # Sums of x_i * x_j over the group: numeric features vary per sale,
+        # the one-hot category features are 1 for every sale in the group
+        moments = {(0, 0): n, (0, 1): a, (0, 2): k, (1, 1): group['aa'], (1, 2): group['ak'], (2, 2): group['kk']}
+        for (i, j), value in moments.items():
+            xtx[i][j] += value
+            if i != j:
+                xtx[j][i] += value
+        for c in categories:
+            for i, value in zip(numeric, (n, a, k)):
+                xtx[c][i] += value
+                xtx[i][c] += value
+            for d in categories:
+                xtx[c][d] += n
+        for i, value in zip(numeric, (group['y'], group['ya'], group['yk'])):
+            xty[i] += value
+        for c in categories:
+            xty[c] += group['y']
+    
+    def _fit(self):
+        self.model['trained_at'] = datetime.now().isoformat(timespec='seconds')
+        if self.model['rows'] < MIN_TRAINING_SALES:
+            self.model['weights'] = {}
+            return
+        features = self.model['features']
+        matrix = [row[:] for row in self.model['xtx']]
+        for i in range(1, len(features)):
+            matrix[i][i] += self.ridge
+        weights = _solve(matrix, self.model['xty'])
+        self.model['weights'] = dict(zip(features, weights))
+    
+    @property
+    def ready(self) -> bool:
+        """True once enough sales have been seen to make suggestions"""
+        return bool(self.model['weights'])
+    
+    # Suggestions
+    def suggest_prices(self, vehicles: Iterable[Dict], year: int = None) -> List[Optional[float]]:
+        """Suggested sale price for each vehicle (None until the model is ready).
+        
+        Only a handful of dict lookups per vehicle, so thousands of
+        vehicles are priced in a few milliseconds.
+        """
+        weights = self.model['weights']
+        if not weights:
+            return [None for _ in vehicles]
+        year = year or datetime.now().year
+        intercept = weights['intercept']
+        per_year = weights['age']
+        per_10k = weights['mileage_10k']
+        suggestions = []
+        for vehicle in vehicles:
+            price = (intercept
+                     + per_year * (year - (vehicle.get('year') or year))
+                     + per_10k * (vehicle.get('mileage') or 0) / 10000.0)
+            for name in _category_features(vehicle):
+                price += weights.get(name, 0.0)
+            suggestions.append(max(0.0, round(price / ROUND_TO) * ROUND_TO))
+        return suggestions
+    
+    def suggest_price(self, vehicle: Dict) -> Optional[float]:
+        return self.suggest_prices([vehicle])[0]
+    
+    def inventory_valuation(self, status: str = 'Available') -> Dict:
+        """List and suggested value of the inventory, in total and per brand.
+        
+        Vehicles the model cannot price yet are valued at their list price.
+        """
+        vehicles = self.db.get_vehicles(status)
+        suggestions = self.suggest_prices(vehicles)
+        valuation = {'count': 0, 'list_value': 0.0, 'suggested_value': 0.0, 'by_brand': {},
+                     'model_ready': self.ready, 'training_sales': self.model['rows']}
+        for vehicle, suggestion in zip(vehicles, suggestions):
+            list_price = vehicle['price'] or 0.0
+            value = suggestion if suggestion is not None else list_price
+            brand = valuation['by_brand'].setdefault(
+                vehicle['brand'], {'count': 0, 'list_value': 0.0, 'suggested_value': 0.0})
+            for totals in (valuation, brand):
+                totals['count'] += 1
+                totals['list_value'] += list_price
+                totals['suggested_value'] += value
+        return valuation
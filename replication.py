@@ -0,0 +1,220 @@
+"""
+Delta replication from the change log.
+
+A replica starts as a backup of the source database and then applies only
+the changes recorded in the source's change_log since the last applied
+sequence number, which is stored in the replica itself.
+
+MemoryReplica keeps the same kind of copy in memory for a single
+process, so that DatabaseManager can serve reads from it while writes go
+to the file (see DatabaseManager.enable_read_replica).
+
+Usage (from the project root):
+    python main.py replicate data/replica.db               # catch up once
+    python main.py replicate data/replica.db --every 30    # tail every 30 s
+    python main.py tui --memory-replica 5                  # reads from memory, refreshed every 5 s
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+
+from scheduling import PeriodicTask
+from scripts.create_database import CHANGE_LOG_TABLES
+
+def _ensure_state_table(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS replication_state (
+            source TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL
+        )
+    ''')
+
+def get_last_applied_seq(conn: sqlite3.Connection, source: str) -> int:
+    """Last source sequence number applied to the replica"""
+    _ensure_state_table(conn)
+    row = conn.execute('SELECT last_seq FROM replication_state WHERE source = ?', (source,)).fetchone()
+    return row[0] if row else 0
+
+def apply_changes(conn: sqlite3.Connection, changes: Iterable[Dict]) -> int:
+    """Apply change_log entries to a replica connection; returns the last seq applied.
+    
+    INSERT and UPDATE entries carry the full row and are applied as upserts,
+    so replaying an entry twice (or a compacted log) is harmless.
+    """
+    columns_by_table = {}
+    last_seq = 0
+    for change in changes:
+        table = change['table_name']
+        if table not in CHANGE_LOG_TABLES:
+            raise ValueError(f"tabela desconhecida no change log: {table}")
+        
+        if change['operation'] == 'DELETE':
+            conn.execute(f'DELETE FROM {table} WHERE id = ?', (change['row_id'],))
+        else:
+            if table not in columns_by_table:
+                columns_by_table[table] = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+            values = {column: value for column, value in change['new_values'].items()
+                      if column in columns_by_table[table]}
+            columns = list(values)
+            updates = ', '.join(f'{column} = excluded.{column}' for column in columns if column != 'id')
+            conn.execute(f'''
+                INSERT INTO {table} ({', '.join(columns)})
+                VALUES ({', '.join('?' * len(columns))})
+                ON CONFLICT (id) DO UPDATE SET {updates}
+            ''', [values[column] for column in columns])
+        last_seq = change['seq']
+    return last_seq
+
+def create_replica(db, replica_path: str):
+    """Bootstrap a replica from a backup of the source DatabaseManager"""
+    from backup import backup_database
+    
+    backup_database(db.db_path, replica_path)
+    conn = sqlite3.connect(replica_path)
+    try:
+        # The copy already contains every change up to its own newest entry
+        seq = conn.execute('SELECT MAX(seq) FROM change_log').fetchone()[0] or 0
+        _ensure_state_table(conn)
+        conn.execute('INSERT OR REPLACE INTO replication_state (source, last_seq) VALUES (?, ?)',
+                     (os.path.abspath(db.db_path), seq))
+        conn.commit()
+    finally:
+        conn.close()
+
+def sync_replica(db, replica_path: str, batch_size: int = 1000) -> int:
+    """Bring the replica up to date with the source; returns the number of changes applied"""
+    if not os.path.exists(replica_path):
+        create_replica(db, replica_path)
+    
+    source = os.path.abspath(db.db_path)
+    conn = sqlite3.connect(replica_path)
+    applied = 0
+    try:
+        seq = get_last_applied_seq(conn, source)
+        batch = []
+        for change in db.changes_since(seq, batch_size=batch_size):
+            batch.append(change)
+            if len(batch) >= batch_size:
+                applied += _apply_batch(conn, source, batch)
+                batch = []
+        if batch:
+            applied += _apply_batch(conn, source, batch)
+    finally:
+        conn.close()
+    return applied
+
+def _apply_batch(conn: sqlite3.Connection, source: str, batch) -> int:
+    # Changes and the new position are committed together
+    with conn:
+        last_seq = apply_changes(conn, batch)
+        conn.execute('INSERT OR REPLACE INTO replication_state (source, last_seq) VALUES (?, ?)',
+                     (source, last_seq))
+    return len(batch)
+
+class ReplicaFollower(PeriodicTask):
+    """Tail the source change log into a replica every ``interval`` seconds"""
+    
+    def __init__(self, db, replica_path: str, interval: float = 30, on_sync=None, on_error=None):
+        self.db = db
+        self.replica_path = replica_path
+        self.on_sync = on_sync
+        super().__init__(interval, self.sync, name='replica-follower',
+                         on_error=on_error, run_immediately=True)
+    
+    def sync(self) -> int:
+        applied = sync_replica(self.db, self.replica_path)
+        if self.on_sync:
+            self.on_sync(applied)
+        return applied
+
+class MemoryReplica:
+    """Read-only copy of a database file in shared-cache memory.
+    
+    The copy is taken with the backup API. A refresh builds a complete new
+    copy under a fresh name and then swaps it in, so readers always see
+    one consistent snapshot and are never blocked by the refresh.
+    Connections handed out before a swap keep reading the previous copy.
+    """
+    
+    _names = itertools.count(1)
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._uri = None
+        self._keeper = None
+        self.change_seq = None
+        self.refreshes = 0
+        # Set by the owner after it writes to the file, so the next read can
+        # catch up instead of waiting for the refresher
+        self.dirty = False
+        self.refresh()
+    
+    def _source_seq(self, conn: sqlite3.Connection) -> Optional[int]:
+        try:
+            return conn.execute('SELECT MAX(seq) FROM change_log').fetchone()[0] or 0
+        except sqlite3.OperationalError:
+            return None
+    
+    def refresh(self):
+        """Copy the file into a new in-memory database and switch readers to it"""
+        uri = f'file:replica{os.getpid()}_{next(self._names)}?mode=memory&cache=shared'
+        keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(self.db_path)
+        try:
+            source.backup(keeper)
+        finally:
+            source.close()
+        # The copy's own log position, so later polls compare like with like
+        change_seq = self._source_seq(keeper)
+        
+        with self._lock:
+            old_keeper = self._keeper
+            self._uri, self._keeper, self.change_seq = uri, keeper, change_seq
+            self.refreshes += 1
+            self.dirty = False
+        if old_keeper is not None:
+            # The old copy lives on while readers still hold connections to it
+            old_keeper.close()
+    
+    def is_stale(self) -> bool:
+        """True if the file has changes the copy does not have"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            source_seq = self._source_seq(conn)
+        finally:
+            conn.close()
+        return source_seq is None or source_seq != self.change_seq
+    
+    def refresh_if_stale(self) -> bool:
+        """Refresh when the file has changed; returns whether it did"""
+        if self.is_stale():
+            self.refresh()
+            return True
+        return False
+    
+    def connect(self, factory=sqlite3.Connection) -> sqlite3.Connection:
+        """New read-only connection to the current copy"""
+        # Connect under the lock: once a swap closes the old keeper, opening
+        # its name would create a new, empty database
+        with self._lock:
+            conn = sqlite3.connect(self._uri, uri=True, factory=factory)
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+    
+    def close(self):
+        with self._lock:
+            keeper, self._keeper = self._keeper, None
+        if keeper is not None:
+            keeper.close()
+
+class ReplicaRefresher(PeriodicTask):
+    """Poll the file every ``interval`` seconds and refresh a MemoryReplica when it changed"""
+    
+    def __init__(self, replica: MemoryReplica, interval: float = 5.0, on_error=None):
+        self.replica = replica
+        super().__init__(interval, replica.refresh_if_stale, name='memory-replica-refresher',
+                         on_error=on_error)
@@ -0,0 +1,166 @@
+"""
+Parallel revenue reports over the sales history.
+
+The sales table (and sales_archive, when archived sales are included) is
+split into contiguous rowid ranges; each range is
+aggregated by a worker process over its own read-only connection and the
+partial results are merged here. Every worker does its share of the join
+and grouping independently, so the report scales with the number of cores
+instead of being limited to one by the GIL.
+
+Usage (from the project root):
+    python -m scripts.benchmark_reports --sales 2000000
+"""
+
+import os
+import signal
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+from settings import get_settings
+
+# Report dimension -> SQL expression over a sales table s; the vehicle is
+# either in vehicles v or, once archived or deleted, in vehicles_archive va
+REPORT_DIMENSIONS = {
+    'brand': 'COALESCE(v.brand, va.brand)',
+    'model': 'COALESCE(v.model, va.model)',
+    'year': 'COALESCE(v.year, va.year)',
+    'month': "substr(s.sale_date, 1, 7)",
+    'payment_method': 's.payment_method',
+}
+
+SALES_TABLES = ('sales', 'sales_archive')
+
+# Partitions per worker: small enough to balance load and to make
+# progress and cancellation responsive
+PARTITIONS_PER_WORKER = 8
+
+class ReportCancelled(Exception):
+    """Raised when a report is cancelled before all partitions finish"""
+
+def _ignore_sigint():
+    # Ctrl+C is handled by the parent, which cancels the pending partitions
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def aggregate_partition(db_path: str, dimensions: Sequence[str], low: int, high: int,
+                        date_from: str = None, date_to: str = None,
+                        table: str = 'sales', mmap_size: int = None) -> Dict[tuple, List]:
+    """Aggregate sales with low <= id < high; returns {key: [count, revenue, min, max]}"""
+    if table not in SALES_TABLES:
+        raise ValueError(f"tabela de vendas desconhecida: {table}")
+    columns = [REPORT_DIMENSIONS[dimension] for dimension in dimensions]
+    conditions = ['s.id >= ?', 's.id < ?']
+    params = [low, high]
+    if date_from:
+        conditions.append('s.sale_date >= ?')
+        params.append(date_from)
+    if date_to:
+        conditions.append('s.sale_date < ?')
+        params.append(date_to)
+    aggregates = ['COUNT(*)', 'SUM(s.sale_price)', 'MIN(s.sale_price)', 'MAX(s.sale_price)']
+    group_by = f"GROUP BY {', '.join(columns)}" if columns else ''
+    
+    conn = sqlite3.connect(f'file:{quote(os.path.abspath(db_path))}?mode=ro', uri=True)
+    try:
+        if mmap_size is not None:
+            conn.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+        cursor = conn.execute(f'''
+            SELECT {', '.join(columns + aggregates)}
+            FROM {table} s
+            LEFT JOIN vehicles v ON s.vehicle_id = v.id
+            LEFT JOIN vehicles_archive va ON s.vehicle_id = va.id
+            WHERE (v.id IS NOT NULL OR va.id IS NOT NULL) AND {' AND '.join(conditions)}
+            {group_by}
+        ''', params)
+        width = len(columns)
+        return {tuple(row[:width]): list(row[width:]) for row in cursor if row[width]}
+    finally:
+        conn.close()
+
+def _merge(totals: Dict[tuple, List], partial: Dict[tuple, List]):
+    for key, (count, revenue, low, high) in partial.items():
+        current = totals.get(key)
+        if current is None:
+            totals[key] = [count, revenue, low, high]
+        else:
+            current[0] += count
+            current[1] += revenue
+            current[2] = min(current[2], low)
+            current[3] = max(current[3], high)
+
+def partition_ranges(db_path: str, partitions: int, table: str = 'sales') -> List[tuple]:
+    """Split the id space of a sales table into ``partitions`` half-open [low, high) ranges"""
+    if table not in SALES_TABLES:
+        raise ValueError(f"tabela de vendas desconhecida: {table}")
+    conn = sqlite3.connect(f'file:{quote(os.path.abspath(db_path))}?mode=ro', uri=True)
+    try:
+        low, high = conn.execute(f'SELECT MIN(id), MAX(id) FROM {table}').fetchone()
+    finally:
+        conn.close()
+    if low is None:
+        return []
+    step = max(1, -(-(high - low + 1) // partitions))
+    return [(start, min(start + step, high + 1)) for start in range(low, high + 1, step)]
+
+def run_report(db_path: str, dimensions: Sequence[str] = ('brand',), workers: int = None,
+               partitions: int = None, date_from: str = None, date_to: str = None,
+               progress: Optional[Callable[[int, int], None]] = None,
+               should_cancel: Optional[Callable[[], bool]] = None,
+               include_archive: bool = False, mmap_size: int = None) -> Dict:
+    """Revenue report grouped by ``dimensions`` (keys of REPORT_DIMENSIONS).
+    
+    ``progress(done, total)`` is called as partitions complete. The report
+    stops with ReportCancelled on Ctrl+C or when ``should_cancel()`` returns
+    True. With ``include_archive`` the archived sales are aggregated too,
+    split into their own partitions. ``mmap_size`` sets memory-mapped reads
+    in the workers (see storage.py). Returns ``rows`` (one dict per group,
+    highest revenue first) and the run statistics.
+    """
+    unknown = [dimension for dimension in dimensions if dimension not in REPORT_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"dimensões desconhecidas: {', '.join(unknown)}")
+    
+    start = time.perf_counter()
+    workers = workers or get_settings().report_workers or os.cpu_count() or 1
+    partitions = partitions or workers * PARTITIONS_PER_WORKER
+    ranges = [(table, low, high)
+              for table in (SALES_TABLES if include_archive else SALES_TABLES[:1])
+              for low, high in partition_ranges(db_path, partitions, table)]
+    totals = {}
+    done = 0
+    
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint)
+    try:
+        futures = [executor.submit(aggregate_partition, db_path, tuple(dimensions), low, high,
+                                   date_from, date_to, table, mmap_size)
+                   for table, low, high in ranges]
+        for future in as_completed(futures):
+            _merge(totals, future.result())
+            done += 1
+            if progress:
+                progress(done, len(ranges))
+            if should_cancel and should_cancel():
+                raise ReportCancelled()
+    except KeyboardInterrupt:
+        raise ReportCancelled() from None
+    finally:
+        # Cancelled runs drop the queued partitions instead of waiting for them
+        executor.shutdown(wait=done == len(ranges), cancel_futures=True)
+    
+    rows = []
+    for key, (count, revenue, low, high) in totals.items():
+        row = dict(zip(dimensions, key))
+        row.update(sales=count, revenue=revenue, average=revenue / count, min_price=low, max_price=high)
+        rows.append(row)
+    rows.sort(key=lambda row: row['revenue'], reverse=True)
+    
+    return {
+        'dimensions': list(dimensions),
+        'rows': rows,
+        'partitions': len(ranges),
+        'workers': workers,
+        'seconds': time.perf_counter() - start,
+    }
@@ -0,0 +1,54 @@
+import threading
+from typing import Callable, Optional
+
+class PeriodicTask:
+    """Run a function every ``interval`` seconds in a daemon thread.
+    
+    Errors raised by the function are passed to ``on_error`` (if given)
+    and do not stop the schedule.
+    """
+    
+    def __init__(self, interval: float, func: Callable[[], None], name: str = 'periodic-task',
+                 on_error: Optional[Callable[[Exception], None]] = None, run_immediately: bool = False):
+        self.interval = interval
+        self.func = func
+        self.name = name
+        self.on_error = on_error
+        self.run_immediately = run_immediately
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start the schedule (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = None):
+        """Stop the schedule and wait for a running call to finish"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+    
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+    
+    def run_forever(self):
+        """Run the schedule in the calling thread until stop() or Ctrl+C"""
+        self._run()
+    
+    def _run(self):
+        if self.run_immediately:
+            self._call()
+        while not self._stop.wait(self.interval):
+            self._call()
+    
+    def _call(self):
+        try:
+            self.func()
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
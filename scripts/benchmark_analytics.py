@@ -0,0 +1,93 @@
+"""
+Benchmark columnar analytics against the list-of-dicts path.
+
+The dict path is what the interfaces do today: DatabaseManager.get_vehicles()
+and get_sales() followed by Python loops. The columnar paths load only the
+needed columns into array('d') or NumPy arrays.
+
+Usage (from the project root):
+    python -m scripts.benchmark_analytics --vehicles 1000000 --sales 500000
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import analytics
+from database import DatabaseManager
+from scripts.generate_data import create_benchmark_database
+
+def dict_path(db: DatabaseManager) -> dict:
+    """Same statistics computed from lists of dicts"""
+    vehicles = db.get_vehicles()
+    prices = sorted(vehicle['price'] for vehicle in vehicles)
+    last = len(prices) - 1
+    result = {}
+    for q in analytics.DEFAULT_PERCENTILES:
+        position = last * q / 100
+        low = math.floor(position)
+        high = min(low + 1, last)
+        result[q] = prices[low] + (prices[high] - prices[low]) * (position - low)
+    
+    by_year = {}
+    for vehicle in vehicles:
+        totals = by_year.setdefault(vehicle['year'], [0, 0.0])
+        totals[0] += 1
+        totals[1] += vehicle['price']
+    
+    by_id = {vehicle['id']: vehicle['price'] for vehicle in vehicles}
+    discounts = [1 - sale['sale_price'] / by_id[sale['vehicle_id']] for sale in db.get_sales()]
+    return {'percentiles': result, 'years': len(by_year), 'mean_discount': sum(discounts) / len(discounts)}
+
+def columnar_path(db_path: str, use_numpy: bool) -> dict:
+    distribution = analytics.price_distribution(db_path, use_numpy=use_numpy)
+    by_year = analytics.depreciation(db_path, use_numpy=use_numpy)['by_year']
+    discount = analytics.discount_analysis(db_path, use_numpy=use_numpy)
+    return {'percentiles': distribution['percentiles'], 'years': len(by_year),
+            'mean_discount': discount['mean_discount']}
+
+def timed(func, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=1000000)
+    parser.add_argument('--sales', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando {args.vehicles} veículos e {args.sales} vendas...")
+        create_benchmark_database(db_path, vehicles=args.vehicles, customers=10000, sales=args.sales)
+        db = DatabaseManager(db_path)
+        
+        paths = [("lista de dicts", lambda: dict_path(db)),
+                 ("array('d')", lambda: columnar_path(db_path, use_numpy=False))]
+        if analytics.HAS_NUMPY:
+            paths.append(("NumPy", lambda: columnar_path(db_path, use_numpy=True)))
+        else:
+            print("NumPy não instalado: apenas o caminho da biblioteca padrão será medido.")
+        
+        baseline = None
+        reference = None
+        for label, func in paths:
+            result, seconds = timed(func, args.repeat)
+            baseline = baseline or seconds
+            reference = reference or result
+            agrees = all(math.isclose(result['percentiles'][q], reference['percentiles'][q])
+                         for q in reference['percentiles']) and \
+                math.isclose(result['mean_discount'], reference['mean_discount'], rel_tol=1e-9)
+            print(f"{label:<16} {seconds * 1000:9.1f} ms  aceleração {baseline / seconds:5.1f}x  "
+                  f"{'resultados iguais' if agrees else 'RESULTADOS DIFERENTES'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Hot table size and query latency before and after archiving.
+
+Builds a synthetic database, times the everyday inventory and sales
+queries, archives sales older than --months (and the sold vehicles they
+leave behind), then times the same queries again.
+
+Usage (from the project root):
+    python -m scripts.benchmark_archive --vehicles 300000 --sales 200000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import archive
+from database import DatabaseManager
+from scripts.generate_data import create_benchmark_database
+
+def measure(db: DatabaseManager, repeat: int, customers: int) -> dict:
+    rng = random.Random(5)
+    operations = {
+        'get_vehicles(Available)': lambda: db.get_vehicles('Available'),
+        'search_vehicles_faceted': lambda: db.search_vehicles_faceted(brand='Honda', price_max=60000, limit=50),
+        'get_customer_history': lambda: db.get_customer_history(rng.randint(1, customers), limit=20),
+        'get_sales': db.get_sales,
+    }
+    results = {}
+    for name, operation in operations.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        results[name] = timings[len(timings) // 2]
+    return results
+
+def print_sizes(sizes: dict):
+    for table, size in sizes.items():
+        megabytes = f"{size['bytes'] / 1024 / 1024:8.1f} MB" if size['bytes'] is not None else ''
+        print(f"  {table:<18} {size['rows']:>10} linha(s) {megabytes}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=300000)
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--sales', type=int, default=200000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=9)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando {args.vehicles} veículos e {args.sales} vendas...")
+        create_benchmark_database(db_path, vehicles=args.vehicles, customers=args.customers, sales=args.sales)
+        db = DatabaseManager(db_path)
+        
+        print("Antes do arquivamento:")
+        print_sizes(archive.table_sizes(db))
+        before = measure(db, args.repeat, args.customers)
+        
+        start = time.perf_counter()
+        moved = archive.archive_old_records(db, args.months)
+        print(f"\n{moved['sales']} venda(s) e {moved['vehicles']} veículo(s) arquivado(s) "
+              f"em {time.perf_counter() - start:.1f} s")
+        db.close()
+        db = DatabaseManager(db_path)
+        with db.get_connection() as conn:
+            conn.execute('VACUUM')
+        
+        print("Depois do arquivamento (após VACUUM):")
+        print_sizes(archive.table_sizes(db))
+        after = measure(db, args.repeat, args.customers)
+        
+        print(f"\n{'consulta':<26} {'antes':>10} {'depois':>10} {'ganho':>7}")
+        for name in before:
+            print(f"{name:<26} {before[name] * 1000:8.2f}ms {after[name] * 1000:8.2f}ms "
+                  f"{before[name] / after[name]:6.1f}x")
+
+if __name__ == "__main__":
+    main()
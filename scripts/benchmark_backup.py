@@ -0,0 +1,101 @@
+"""
+Backup throughput benchmark.
+
+Builds a database of the requested size (synthetic vehicles plus padding
+rows), then measures online backup throughput for several step sizes
+while a writer thread keeps inserting, reporting the writer's worst
+insert latency during the backup. Also times a full compressed snapshot.
+
+Usage (from the project root):
+    python -m scripts.benchmark_backup --size-mb 2048
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import backup
+from scripts.generate_data import create_benchmark_database
+
+def build_database(db_path: str, size_mb: int):
+    """Synthetic data plus 4 KB padding rows up to roughly size_mb"""
+    create_benchmark_database(db_path, vehicles=100000, customers=10000, sales=50000)
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE IF NOT EXISTS bench_padding (id INTEGER PRIMARY KEY, data BLOB)')
+    while os.path.getsize(db_path) < size_mb * 1024 * 1024:
+        conn.execute('''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 25000)
+            INSERT INTO bench_padding (data) SELECT randomblob(4000) FROM n
+        ''')
+        conn.commit()
+    conn.close()
+
+class Writer(threading.Thread):
+    """Inserts vehicles continuously and records the slowest commit"""
+    
+    def __init__(self, db_path: str):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.stop = threading.Event()
+        self.max_latency = 0.0
+        self.writes = 0
+    
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            conn.execute('''
+                INSERT INTO vehicles (brand, model, year, color, price)
+                VALUES ('Bench', 'Writer', 2024, 'White', 50000)
+            ''')
+            conn.commit()
+            self.max_latency = max(self.max_latency, time.perf_counter() - start)
+            self.writes += 1
+            time.sleep(0.01)
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Backup throughput benchmark")
+    parser.add_argument('--size-mb', type=int, default=512)
+    parser.add_argument('--steps', default='64,256,1024,-1',
+                        help="pages per backup step to compare (-1 = all at once)")
+    parser.add_argument('--dir', default=None, help="working directory (default: temporary)")
+    parser.add_argument('--wal', action='store_true', help="put the source database in WAL mode")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando base de ~{args.size_mb} MB...")
+        build_database(db_path, args.size_mb)
+        if args.wal:
+            conn = sqlite3.connect(db_path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.close()
+        size_mb = os.path.getsize(db_path) / 1024 / 1024
+        print(f"Base: {size_mb:.0f} MB", flush=True)
+        print(f"{'Páginas/passo':>14} {'Segundos':>9} {'MB/s':>8} {'Reinícios':>10} "
+              f"{'Escritas':>9} {'Pior escrita ms':>16}")
+        
+        for pages in [int(step) for step in args.steps.split(',')]:
+            dest = os.path.join(tmp, f'copy{pages}.db')
+            writer = Writer(db_path)
+            writer.start()
+            stats = backup.backup_database(db_path, dest, pages=pages,
+                                           step_sleep=0 if pages < 0 else backup.DEFAULT_STEP_SLEEP)
+            writer.stop.set()
+            writer.join()
+            os.remove(dest)
+            print(f"{pages:>14} {stats['seconds']:>9.2f} {stats['bytes'] / 1024 / 1024 / stats['seconds']:>8.1f} "
+                  f"{stats['restarts']:>10} {writer.writes:>9} {writer.max_latency * 1000:>16.1f}", flush=True)
+        
+        start = time.perf_counter()
+        snapshot = backup.create_snapshot(db_path, os.path.join(tmp, 'backups'))
+        elapsed = time.perf_counter() - start
+        print(f"Snapshot compactado e verificado: {elapsed:.2f} s "
+              f"({size_mb / elapsed:.1f} MB/s, {os.path.getsize(snapshot) / 1024 / 1024:.0f} MB em disco)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Speed and accuracy of duplicate customer detection.
+
+Imports --customers synthetic customers into a new database, a share of
+them (--duplicates) registered a second time the way people re-register:
+the name spelled differently, the email with dots or a +tag, the phone
+with other punctuation, the CPF left out. Then times find_duplicates and
+reports the precision and recall of the groups it finds against the
+injected duplicates.
+
+Usage (from the project root):
+    python -m scripts.benchmark_dedup --customers 500000 --duplicates 0.02
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import dedup
+from database import DatabaseManager
+from scripts.create_database import create_database
+from validation import cpf_check_digits
+
+FIRST_NAMES = ['João', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Lúcia', 'José', 'Fernanda', 'Márcio', 'Beatriz',
+               'Luiz', 'Felipe', 'Rafael', 'Juliana', 'Thiago', 'Camila', 'Gustavo', 'Larissa', 'Rodrigo',
+               'Patrícia', 'Marcelo', 'Vanessa', 'Eduardo', 'Gabriela', 'Bruno', 'Letícia', 'André',
+               'Priscila', 'Sérgio', 'Tatiane', 'Vinícius', 'Renata', 'Leandro', 'Cristina', 'Henrique',
+               'Simone', 'Fábio', 'Daniela', 'Ricardo', 'Aline', 'Roberto', 'Sandra', 'Paulo', 'Cecília',
+               'Antônio', 'Elisa', 'Mateus', 'Isabela', 'Diego', 'Natália']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Costa', 'Ferreira', 'Gonçalves', 'Araújo', 'Rodrigues',
+              'Almeida', 'Nascimento', 'Lima', 'Carvalho', 'Gomes', 'Martins', 'Rocha', 'Ribeiro', 'Barbosa',
+              'Pereira', 'Cardoso', 'Teixeira', 'Correia', 'Mendes', 'Nunes', 'Moreira', 'Cavalcanti',
+              'Dias', 'Castro', 'Campos', 'Batista', 'Freitas', 'Pinto', 'Moura', 'Vieira', 'Monteiro',
+              'Machado', 'Brandão', 'Fonseca', 'Queiroz', 'Andrade', 'Coelho', 'Lopes', 'Barros', 'Tavares',
+              'Miranda', 'Xavier', 'Sampaio', 'Pacheco', 'Macedo', 'Figueiredo']
+COLUMNS = ('name', 'email', 'phone', 'address', 'cpf')
+
+# Ways a name gets re-typed: spelling variants, dropped accents, a typo
+SPELLINGS = [('ss', 'ç'), ('s', 'z'), ('z', 's'), ('i', 'y'), ('f', 'ph'), ('ph', 'f'), ('th', 't'),
+             ('lu', 'llu'), ('qu', 'k'), ('x', 'ch')]
+ACCENTS = str.maketrans('áâãàéêíóôõúçÁÉÍÓÚ', 'aaaaeeioooucAEIOU')
+
+def name_variant(name: str, rng: random.Random) -> str:
+    change = rng.randrange(4)
+    if change == 0:
+        return name.translate(ACCENTS)
+    if change == 1:
+        for old, new in rng.sample(SPELLINGS, len(SPELLINGS)):
+            if old in name:
+                return name.replace(old, new, 1)
+        return name.upper()
+    if change == 2:
+        first, *rest = name.split()
+        return ' '.join([first, 'da'] + rest) if rest else name
+    position = rng.randrange(1, len(name) - 2)
+    return name[:position] + name[position + 1] + name[position] + name[position + 2:]
+
+def email_variant(email: str, rng: random.Random) -> tuple:
+    """Another email of the same person, and whether email_key still matches the original"""
+    local, domain = email.split('@')
+    change = rng.randrange(3)
+    if change == 0:
+        position = rng.randrange(1, len(local))
+        return f"{local[:position]}.{local[position:]}@{domain}", True
+    if change == 1:
+        return f"{local}+loja@{domain}", True
+    return f"{local}@{'gmail.com' if domain != 'gmail.com' else 'hotmail.com'}", False
+
+def phone_variant(phone: str, rng: random.Random) -> str:
+    digits = ''.join(char for char in phone if char.isdigit())
+    return rng.choice((digits, f"+55 {digits[:2]} {digits[2:7]}-{digits[7:]}", phone))
+
+def synthetic_customers(count: int, duplicate_share: float, rng: random.Random):
+    """Customer rows (originals first, then the re-registrations) and the (original, copy) row indexes"""
+    rows = []
+    for i in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        local = name.translate(ACCENTS).lower().replace(' ', '.') + str(rng.randint(1, 999))
+        base = f"{i + 1:09d}"
+        rows.append([name, f"{local}@{rng.choice(('gmail.com', 'hotmail.com', 'uol.com.br'))}",
+                     f"({rng.randint(11, 99)}) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                     '', base + cpf_check_digits(base) if rng.random() < 0.7 else ''])
+    
+    copies = []
+    for original in rng.sample(range(count), int(count * duplicate_share)):
+        name, email, phone, _, _ = rows[original]
+        email, recognisable = email_variant(email, rng)
+        # A copy with a recognisable email may come with a new phone number
+        if recognisable and rng.random() < 0.5:
+            phone = f"({rng.randint(11, 99)}) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+        else:
+            phone = phone_variant(phone, rng)
+        rows.append([name_variant(name, rng), email, phone, '', ''])
+        copies.append((original, len(rows) - 1))
+    return rows, copies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--customers', type=int, default=500000)
+    parser.add_argument('--duplicates', type=float, default=0.02, help="fração de clientes cadastrados duas vezes")
+    parser.add_argument('--threshold', type=float, default=dedup.DEFAULT_THRESHOLD)
+    parser.add_argument('--max-block', type=int, default=dedup.MAX_BLOCK_SIZE)
+    args = parser.parse_args()
+    rows, copies = synthetic_customers(args.customers, args.duplicates, random.Random(11))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        create_database(db_path)
+        db = DatabaseManager(db_path)
+        start = time.perf_counter()
+        result = db.import_rows('customers', COLUMNS, rows)
+        print(f"{result['inserted']} cliente(s) importado(s) em {time.perf_counter() - start:.1f} s "
+              f"({len(copies)} duplicado(s) injetado(s), {len(result['errors'])} rejeitado(s))")
+        
+        with db.get_read_connection() as conn:
+            ids_by_email = dict(conn.execute('SELECT email, id FROM customers'))
+        # Row index -> customer id, through the (unique) email
+        ids = [ids_by_email.get(row[1].strip().lower()) for row in rows]
+        expected = {(ids[original], ids[copy]) for original, copy in copies if ids[original] and ids[copy]}
+        
+        found = dedup.find_duplicates(db, args.threshold, args.max_block)
+        db.close()
+    
+    stats = found['stats']
+    print(f"{stats['customers']} cliente(s), {stats['blocks']} bloco(s) ({stats['skipped_blocks']} ignorado(s)), "
+          f"{stats['compared']} par(es) comparado(s) em {stats['seconds']:.1f} s "
+          f"({stats['customers'] / max(stats['seconds'], 1e-9):,.0f} clientes/s)")
+    group_of = {customer_id: number for number, group in enumerate(found['groups']) for customer_id in group}
+    true_pairs = sum(1 for pair in found['pairs'] if tuple(sorted(pair['ids'])) in expected)
+    recalled = sum(1 for first, second in expected
+                   if first in group_of and group_of[first] == group_of.get(second))
+    print(f"precisão {true_pairs / max(len(found['pairs']), 1):.1%} ({true_pairs} de {len(found['pairs'])} par(es)), "
+          f"revocação {recalled / max(len(expected), 1):.1%} ({recalled} de {len(expected)} duplicado(s))")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Page fetch latency of the paged listings against loading the whole table.
+
+Times DatabaseManager.get_vehicles() (what the listings used to do), the
+first page, walking deep into the list page by page (keyset) and jumping
+straight to a deep page (OFFSET), for several sort columns.
+
+Usage (from the project root):
+    python -m scripts.benchmark_paging --vehicles 500000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from database import DatabaseManager
+from paging import PagedSource
+from scripts.generate_data import create_benchmark_database
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=500000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--walk', type=int, default=200, help="páginas percorridas em sequência")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando {args.vehicles} veículos...")
+        create_benchmark_database(db_path, vehicles=args.vehicles)
+        db = DatabaseManager(db_path)
+        
+        print(f"get_vehicles() completo: {timed(db.get_vehicles) * 1000:9.1f} ms")
+        print(f"\n{'ordenação':<16} {'1ª página':>10} {'por página':>11} {'salto':>10}")
+        for sort, descending in (('created_at', True), ('price', False), ('price', True), ('brand', False),
+                                 ('year', False), ('color', False)):
+            source = PagedSource(db, 'vehicles', args.page_size, sort, descending)
+            source.count()
+            first = timed(lambda: source.page(0))
+            walk = timed(lambda: [source.page(number) for number in range(1, args.walk + 1)]) / args.walk
+            jump = PagedSource(db, 'vehicles', args.page_size, sort, descending)
+            offset = timed(lambda: jump.page(args.walk))
+            label = f"{sort}{' desc' if descending else ''}"
+            print(f"{label:<16} {first * 1000:8.2f}ms {walk * 1000:9.2f}ms {offset * 1000:8.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Read latency with and without the in-memory read replica.
+
+Each read is timed while the database is idle and while a writer thread
+keeps committing to the file.
+
+Usage (from the project root):
+    python -m scripts.benchmark_read_replica --vehicles 200000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from database import DatabaseManager
+from scripts.generate_data import create_benchmark_database
+
+class Writer(threading.Thread):
+    """Updates random vehicle prices on the file until stopped"""
+    
+    def __init__(self, db_path: str, max_id: int):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.max_id = max_id
+        self.stop = threading.Event()
+    
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        rng = random.Random(7)
+        while not self.stop.is_set():
+            conn.execute('UPDATE vehicles SET price = price + 1 WHERE id = ?', (rng.randint(1, self.max_id),))
+            conn.commit()
+            time.sleep(0.002)
+        conn.close()
+
+def measure(db: DatabaseManager, reads: int, max_id: int):
+    rng = random.Random(3)
+    operations = {
+        'get_vehicle_by_id': lambda: db.get_vehicle_by_id(rng.randint(1, max_id)),
+        'get_sales_summary': db.get_sales_summary,
+        'search_vehicles_faceted': lambda: db.search_vehicles_faceted(brand='Honda', price_max=60000, limit=50),
+    }
+    results = {}
+    for name, operation in operations.items():
+        timings = []
+        for _ in range(reads):
+            start = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        results[name] = (timings[len(timings) // 2], timings[int(len(timings) * 0.99)])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=200000)
+    parser.add_argument('--sales', type=int, default=50000)
+    parser.add_argument('--reads', type=int, default=200)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando {args.vehicles} veículos e {args.sales} vendas...")
+        create_benchmark_database(db_path, vehicles=args.vehicles, customers=10000, sales=args.sales)
+        db = DatabaseManager(db_path)
+        
+        for with_writer in (False, True):
+            for replica in (False, True):
+                if replica:
+                    start = time.perf_counter()
+                    db.enable_read_replica(refresh_interval=None)
+                    load_seconds = time.perf_counter() - start
+                writer = Writer(db_path, args.vehicles) if with_writer else None
+                if writer:
+                    writer.start()
+                results = measure(db, args.reads, args.vehicles)
+                if writer:
+                    writer.stop.set()
+                    writer.join()
+                db.disable_read_replica()
+                
+                label = f"{'réplica em memória' if replica else 'arquivo'}, {'com' if with_writer else 'sem'} escritas"
+                print(f"\n{label}" + (f" (cópia carregada em {load_seconds * 1000:.0f} ms)" if replica else ""))
+                for name, (median, p99) in results.items():
+                    print(f"  {name:<25} mediana {median * 1000:8.2f} ms   p99 {p99 * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
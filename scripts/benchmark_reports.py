@@ -0,0 +1,43 @@
+"""
+Benchmark the parallel revenue report against the number of worker processes.
+
+Usage (from the project root):
+    python -m scripts.benchmark_reports --sales 2000000 --workers 1,2,4,8
+"""
+
+import argparse
+import os
+import tempfile
+
+from reports import run_report
+from scripts.generate_data import create_benchmark_database
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sales', type=int, default=2000000)
+    parser.add_argument('--workers', default=None,
+                        help="worker counts to compare (default: 1 up to the number of cores)")
+    parser.add_argument('--dimensions', default='brand,model,month,payment_method')
+    args = parser.parse_args()
+    
+    cores = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(n) for n in args.workers.split(',')]
+    else:
+        counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    dimensions = args.dimensions.split(',')
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando {args.sales} vendas...")
+        create_benchmark_database(db_path, vehicles=100000, customers=50000, sales=args.sales)
+        
+        baseline = None
+        for workers in counts:
+            report = run_report(db_path, dimensions, workers=workers)
+            baseline = baseline or report['seconds']
+            print(f"{workers:>3} processo(s): {report['seconds']:7.2f} s  "
+                  f"aceleração {baseline / report['seconds']:4.1f}x  ({len(report['rows'])} grupos)")
+
+if __name__ == "__main__":
+    main()
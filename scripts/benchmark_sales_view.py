@@ -0,0 +1,100 @@
+"""
+Sales listing read from the joined tables versus the sales_view read model.
+
+Builds a synthetic database and times the same listings both ways: the
+full sales list (get_sales), the first and a later page sorted by
+customer, and a filtered count. The join side is the query these ran
+before sales_view existed.
+
+Usage (from the project root):
+    python -m scripts.benchmark_sales_view --vehicles 300000 --sales 200000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import paging
+from database import DatabaseManager
+from scripts.generate_data import create_benchmark_database
+
+# The 'sales' listing as it was defined over the source tables
+JOIN_SOURCE = {
+    'from': '''sales s
+        LEFT JOIN customers c ON s.customer_id = c.id
+        LEFT JOIN employees e ON s.employee_id = e.id
+        LEFT JOIN vehicles v ON s.vehicle_id = v.id
+        LEFT JOIN vehicles_archive va ON s.vehicle_id = va.id''',
+    'id': 's.id',
+    'default_sort': ('sale_date', True),
+    'columns': {
+        'id': ('s.id', 'ID', int),
+        'sale_date': ('s.sale_date', 'Data', str),
+        'customer_name': ('c.name', 'Cliente', str),
+        'brand': ('COALESCE(v.brand, va.brand)', 'Marca', str),
+        'model': ('COALESCE(v.model, va.model)', 'Modelo', str),
+        'year': ('COALESCE(v.year, va.year)', 'Ano', int),
+        'sale_price': ('s.sale_price', 'Preço', float),
+        'payment_method': ('s.payment_method', 'Pagamento', str),
+        'employee_name': ('e.name', 'Vendedor', str),
+    },
+}
+
+def joined_sales(db: DatabaseManager):
+    with db.get_read_connection() as conn:
+        return db._sale_rows(conn.cursor(), False,
+                             extra_columns=', c.name as customer_name, c.email as customer_email',
+                             joins='JOIN customers c ON s.customer_id = c.id')
+
+def listing(db: DatabaseManager, name: str, sort: str = None, filter_text: str = '') -> paging.PagedSource:
+    return paging.PagedSource(db, name, sort=sort, descending=False if sort else None, filter_text=filter_text)
+
+def operations(db: DatabaseManager, name: str, get_sales) -> dict:
+    def later_page():
+        source = listing(db, name, 'customer_name')
+        for number in range(10):
+            source.page(number)
+    
+    return {
+        'get_sales': get_sales,
+        'página 1 por cliente': lambda: listing(db, name, 'customer_name').page(0),
+        '10 páginas por cliente': later_page,
+        'contagem filtrada': lambda: listing(db, name, filter_text='marca=Honda preço<60000').count(),
+    }
+
+def median_time(operation, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=300000)
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--sales', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando {args.vehicles} veículos e {args.sales} vendas...")
+        create_benchmark_database(db_path, vehicles=args.vehicles, customers=args.customers, sales=args.sales)
+        db = DatabaseManager(db_path)
+        
+        paging.SOURCES['sales_join'] = JOIN_SOURCE
+        joined = operations(db, 'sales_join', lambda: joined_sales(db))
+        flat = operations(db, 'sales', db.get_sales)
+        print(f"\n{'consulta':<24} {'join':>10} {'sales_view':>11} {'ganho':>7}")
+        for name in joined:
+            before = median_time(joined[name], args.repeat)
+            after = median_time(flat[name], args.repeat)
+            print(f"{name:<24} {before * 1000:8.2f}ms {after * 1000:9.2f}ms {before / after:6.1f}x")
+        print(f"\nsales_view: {db.check_sales_view()} linha(s) divergente(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Application workload across combinations of settings (see settings.py).
+
+Builds one synthetic database, then for every combination of the --sweep
+values copies it (with VACUUM INTO, so page_size takes effect), opens it
+through DatabaseManager with those settings and times a mix of the
+listings' reads, single-row writes and a revenue report. Settings not
+swept come from the config file, the environment and the flags, as in
+main.py.
+
+Usage (from the project root):
+    python -m scripts.benchmark_settings --sweep pragma_profile=default,wal --sweep cache_mb=2,64
+    python -m scripts.benchmark_settings --sweep page_size=4096,16384 --sweep mmap_mb=,256
+    python -m scripts.benchmark_settings --config loja.ini --sweep report_workers=1,2,4
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import settings
+import storage
+from database import DatabaseManager
+from reports import run_report
+from scripts.generate_data import create_benchmark_database
+
+def timed(operation, count: int) -> float:
+    """Milliseconds per call of operation(i), over ``count`` calls"""
+    start = time.perf_counter()
+    for i in range(count):
+        operation(i)
+    return (time.perf_counter() - start) * 1000 / max(count, 1)
+
+def measure(db_path: str, combination: settings.Settings, operations: int, vehicles: int, customers: int) -> dict:
+    """Milliseconds per search, history lookup, write and report under one combination"""
+    rng = random.Random(7)
+    db = DatabaseManager(db_path, settings=combination)
+    try:
+        results = {
+            'busca': timed(lambda i: db.search_vehicles_faceted(brand=rng.choice(('Honda', 'Fiat', 'Ford')),
+                                                                status='Available', limit=50), operations),
+            'histórico': timed(lambda i: db.get_customer_history(rng.randint(1, customers), limit=20), operations),
+            'escrita': timed(lambda i: db.update_vehicle(rng.randint(1, vehicles),
+                                                         price=round(rng.uniform(20000, 150000), 2)), operations),
+        }
+        results['relatório'] = timed(lambda i: run_report(db_path, ('brand',), workers=combination.report_workers,
+                                                          mmap_size=combination.mmap_size), 1)
+    finally:
+        db.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    settings.add_arguments(parser)
+    parser.add_argument('--sweep', action='append', default=[], metavar='NOME=VALOR,VALOR',
+                        help="valores de uma configuração a comparar (vazio: padrão); repetível")
+    parser.add_argument('--vehicles', type=int, default=200000)
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--sales', type=int, default=100000)
+    parser.add_argument('--operations', type=int, default=500, help="buscas, consultas e escritas por combinação")
+    args = parser.parse_args()
+    base = settings.use_settings(settings.from_arguments(args))
+    axes = settings.parse_sweep(args.sweep)
+    combinations = settings.expand_sweep(base, axes)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = os.path.join(tmp, 'base.db')
+        print(f"Gerando {args.vehicles} veículos, {args.customers} clientes e {args.sales} vendas...")
+        create_benchmark_database(base_path, vehicles=args.vehicles, customers=args.customers, sales=args.sales)
+        
+        labels = list(axes) or ['pragma_profile']
+        header = ' '.join(f"{name:>15}" for name in labels)
+        print(f"\n{header} {'busca ms':>10} {'histórico ms':>13} {'escrita ms':>11} {'relatório ms':>13}")
+        best = {}
+        for number, combination in enumerate(combinations):
+            db_path = os.path.join(tmp, f'sweep{number}.db')
+            storage.vacuum_into(base_path, db_path, combination.page_size)
+            results = measure(db_path, combination, args.operations, args.vehicles, args.customers)
+            values = ['padrão' if getattr(combination, name) is None else str(getattr(combination, name))
+                      for name in labels]
+            print(' '.join(f"{value:>15}" for value in values)
+                  + f" {results['busca']:>10.2f} {results['histórico']:>13.2f} "
+                  f"{results['escrita']:>11.2f} {results['relatório']:>13.1f}")
+            for name, milliseconds in results.items():
+                if name not in best or milliseconds < best[name][0]:
+                    best[name] = (milliseconds, values)
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+    
+    if len(combinations) > 1:
+        print("\nMelhor combinação por operação:")
+        for name, (milliseconds, values) in best.items():
+            print(f"  {name:<10} {milliseconds:10.2f} ms  "
+                  + ', '.join(f"{label} {value}" for label, value in zip(labels, values)))
+
+if __name__ == "__main__":
+    main()
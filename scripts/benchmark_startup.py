@@ -0,0 +1,73 @@
+"""
+Cold-start benchmark for main.py.
+
+Measures, in fresh interpreters, the time to import main (menu ready) and
+the time to build the terminal interface, and checks that startup stays
+under budget and does not pull in tkinter. Exits with status 1 when over
+budget, so it can run in CI.
+
+Usage (from the project root):
+    python -m scripts.benchmark_startup --budget-ms 150
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ("import main (menu)", "import main"),
+    ("main.get_db()", "import main; main.get_db()"),
+    ("TerminalInterface", "import main; from terminal_interface import TerminalInterface; "
+                          "TerminalInterface(main.get_db())"),
+]
+
+PROBE = '''
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, 'tkinter' in sys.modules)
+'''
+
+def run_scenario(code: str, cwd: str):
+    """Run code in a fresh interpreter; returns (process ms, in-process ms, tkinter loaded)"""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', PROBE.format(code=code)], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True).stdout.splitlines()[-1].split()
+    total = (time.perf_counter() - start) * 1000
+    return total, float(output[0]), output[1] == 'True'
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for main.py")
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help="maximum in-process time for every scenario (median)")
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+    
+    over_budget = False
+    with tempfile.TemporaryDirectory() as tmp:
+        # Fresh working directory: the database is created on the first run
+        run_scenario("import main; main.get_db()", tmp)
+        
+        baseline = sorted(run_scenario("pass", tmp)[0] for _ in range(args.repeat))
+        interpreter_ms = baseline[len(baseline) // 2]
+        print(f"Interpretador vazio: {interpreter_ms:.1f} ms")
+        print(f"{'Cenário':<22} {'Processo ms':>12} {'Código ms':>10}  tkinter")
+        
+        for label, code in SCENARIOS:
+            runs = sorted(run_scenario(code, tmp) for _ in range(args.repeat))
+            total_ms, code_ms, tk_loaded = runs[len(runs) // 2]
+            status = "OK" if code_ms <= args.budget_ms and not tk_loaded else "ACIMA DO LIMITE"
+            over_budget = over_budget or status != "OK"
+            print(f"{label:<22} {total_ms:>12.1f} {code_ms:>10.1f}  {'sim' if tk_loaded else 'não':<7} {status}")
+    
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Cold and warm scans across page sizes, memory-mapped I/O and page cache sizes.
+
+Builds one synthetic database, re-lays it out with VACUUM INTO for every
+page size, then times full scans of vehicles and sales (the sales scan
+joins customers and vehicles, the listing join) for every combination of
+settings. "Cold" drops the file from the OS page cache and opens a new
+connection first; "warm" is the best of --repeat runs on that connection.
+
+Usage (from the project root):
+    python -m scripts.benchmark_storage --vehicles 500000 --sales 300000
+    python -m scripts.benchmark_storage --page-sizes 4096,16384 --mmap 0,1024 --cache 2,256
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import storage
+from scripts.generate_data import create_benchmark_database
+
+QUERIES = {
+    'vehicles': "SELECT COUNT(*), SUM(price), SUM(mileage) FROM vehicles WHERE color <> ''",
+    'sales': '''
+        SELECT COUNT(*), SUM(s.sale_price), COUNT(DISTINCT c.email), SUM(v.year)
+        FROM sales s
+        JOIN customers c ON s.customer_id = c.id
+        JOIN vehicles v ON s.vehicle_id = v.id
+    ''',
+}
+
+def connect(db_path: str, mmap_mb: int, cache_mb: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    storage.apply_connection_settings(conn, mmap_mb * 1024 * 1024, cache_mb * 1024 * 1024)
+    return conn
+
+def timed(conn: sqlite3.Connection, sql: str) -> float:
+    start = time.perf_counter()
+    conn.execute(sql).fetchall()
+    return time.perf_counter() - start
+
+def measure(db_path: str, mmap_mb: int, cache_mb: int, repeat: int) -> dict:
+    """Cold and warm seconds of every query under one combination of settings"""
+    results = {}
+    for name, sql in QUERIES.items():
+        storage.evict_from_os_cache([db_path])
+        conn = connect(db_path, mmap_mb, cache_mb)
+        try:
+            cold = timed(conn, sql)
+            warm = min(timed(conn, sql) for _ in range(repeat))
+        finally:
+            conn.close()
+        results[name] = (cold, warm)
+    return results
+
+def int_list(text: str) -> list:
+    return [int(value) for value in text.split(',') if value.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=500000)
+    parser.add_argument('--customers', type=int, default=50000)
+    parser.add_argument('--sales', type=int, default=300000)
+    parser.add_argument('--page-sizes', type=int_list, default=[4096, 8192, 16384, 65536],
+                        help="tamanhos de página, separados por vírgula")
+    parser.add_argument('--mmap', type=int_list, default=[0, 1024], help="mmap_size em MB")
+    parser.add_argument('--cache', type=int_list, default=[2, 64], help="cache de páginas em MB")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for page_size in args.page_sizes:
+        storage.check_page_size(page_size)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = os.path.join(tmp, 'base.db')
+        print(f"Gerando {args.vehicles} veículos e {args.sales} vendas...")
+        create_benchmark_database(base_path, vehicles=args.vehicles, customers=args.customers, sales=args.sales)
+        
+        print(f"\n{'página':>7} {'mmap MB':>8} {'cache MB':>9} {'tamanho':>9}  "
+              + "  ".join(f"{name + ' frio':>13} {name + ' quente':>15}" for name in QUERIES))
+        best = {}
+        for page_size in args.page_sizes:
+            db_path = os.path.join(tmp, f'page{page_size}.db')
+            storage.vacuum_into(base_path, db_path, page_size)
+            megabytes = os.path.getsize(db_path) / 1024 / 1024
+            for mmap_mb in args.mmap:
+                for cache_mb in args.cache:
+                    results = measure(db_path, mmap_mb, cache_mb, args.repeat)
+                    print(f"{page_size:>7} {mmap_mb:>8} {cache_mb:>9} {megabytes:>7.1f}MB  "
+                          + "  ".join(f"{cold * 1000:>11.1f}ms {warm * 1000:>13.1f}ms"
+                                      for cold, warm in results.values()))
+                    for name, (cold, warm) in results.items():
+                        for kind, seconds in (('frio', cold), ('quente', warm)):
+                            key = (name, kind)
+                            if key not in best or seconds < best[key][0]:
+                                best[key] = (seconds, page_size, mmap_mb, cache_mb)
+            os.remove(db_path)
+        
+        print("\nMelhor combinação por consulta:")
+        for (name, kind), (seconds, page_size, mmap_mb, cache_mb) in best.items():
+            print(f"  {name:<9} {kind:<7} {seconds * 1000:8.1f} ms  página {page_size}, "
+                  f"mmap {mmap_mb} MB, cache {cache_mb} MB")
+        if not hasattr(os, 'posix_fadvise'):
+            print("\nAviso: sem posix_fadvise, as leituras \"frias\" podem vir do cache do sistema.")
+
+if __name__ == "__main__":
+    main()
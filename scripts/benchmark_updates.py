@@ -0,0 +1,127 @@
+"""
+Update throughput: the statement registry and connection reuse, separately.
+
+Random vehicles are updated with random column subsets passed in random
+keyword order. Two changes are measured on their own:
+
+- statement registry (statements.py): dynamic f-string SQL versus the
+  canonical SQL, both on one reused connection, inside one transaction
+  (so commit cost does not hide statement preparation) and committed per
+  call;
+- connection reuse (DatabaseManager.get_connection): the same canonical
+  SQL committed per call on a new connection each time versus on one
+  reused connection.
+
+The full DatabaseManager.update_vehicle call is measured too.
+
+Usage (from the project root):
+    python -m scripts.benchmark_updates --updates 50000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from database import DatabaseManager
+from scripts.generate_data import create_benchmark_database
+from statements import FULL_ROW_COLUMNS, update_parameters
+
+COLUMNS = ('brand', 'model', 'year', 'color', 'price', 'mileage', 'fuel_type', 'transmission', 'status')
+SAMPLE = {'brand': 'Toyota', 'model': 'Corolla', 'year': 2022, 'color': 'White', 'price': 85000.0,
+          'mileage': 15000, 'fuel_type': 'Flex', 'transmission': 'Automatic', 'status': 'Available'}
+
+def workload(count: int, max_id: int, full_rows: bool, seed: int = 11):
+    rng = random.Random(seed)
+    for _ in range(count):
+        if full_rows:
+            columns = list(FULL_ROW_COLUMNS['vehicles'])
+        else:
+            columns = rng.sample(COLUMNS, rng.randint(1, 4))
+        rng.shuffle(columns)
+        yield rng.randint(1, max_id), {column: SAMPLE[column] for column in columns}
+
+def dynamic_sql(vehicle_id, values):
+    set_clause = ', '.join([f"{key} = ?" for key in values.keys()])
+    return f'UPDATE vehicles SET {set_clause} WHERE id = ?', list(values.values()) + [vehicle_id]
+
+def run_in_transaction(db_path: str, updates, build, cached_statements: int = 128) -> float:
+    conn = sqlite3.connect(db_path, cached_statements=cached_statements)
+    start = time.perf_counter()
+    with conn:
+        for vehicle_id, values in updates:
+            conn.execute(*build(vehicle_id, values))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+def run_per_call_connection(db_path: str, updates, build) -> float:
+    start = time.perf_counter()
+    for vehicle_id, values in updates:
+        conn = sqlite3.connect(db_path)
+        with conn:
+            conn.execute(*build(vehicle_id, values))
+        conn.close()
+    return time.perf_counter() - start
+
+def run_reused_connection(db_path: str, updates, build, cached_statements: int = 128) -> float:
+    conn = sqlite3.connect(db_path, cached_statements=cached_statements)
+    start = time.perf_counter()
+    for vehicle_id, values in updates:
+        with conn:
+            conn.execute(*build(vehicle_id, values))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+def registry_sql(vehicle_id, values):
+    return update_parameters('vehicles', vehicle_id, values)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=100000)
+    parser.add_argument('--updates', type=int, default=50000)
+    parser.add_argument('--calls', type=int, default=2000, help="committed update_vehicle calls to time")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando {args.vehicles} veículos...")
+        create_benchmark_database(db_path, vehicles=args.vehicles)
+        # Commit cost is the same for every variant; leave it out of the comparison
+        conn = sqlite3.connect(db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.close()
+        
+        for full_rows in (False, True):
+            print(f"\n{'Linha completa' if full_rows else 'Colunas aleatórias (1 a 4)'}:")
+            updates = list(workload(args.updates, args.vehicles, full_rows))
+            run_in_transaction(db_path, updates[:1000], registry_sql)  # warm the OS page cache
+            calls = updates[:args.calls]
+            print("  Registro de comandos (mesma conexão):")
+            for label, build, cache in (("SQL dinâmico", dynamic_sql, 128),
+                                        ("registro", registry_sql, 128),
+                                        ("registro, cache 512", registry_sql, DatabaseManager.CACHED_STATEMENTS)):
+                in_transaction = args.updates / run_in_transaction(db_path, updates, build, cache)
+                committed = len(calls) / run_reused_connection(db_path, calls, build, cache)
+                print(f"    {label:<26} {in_transaction:>10,.0f} updates/s (uma transação) "
+                      f"{committed:>8,.0f} commits/s")
+            
+            print("  Reuso da conexão (registro, commit por chamada):")
+            seconds = run_per_call_connection(db_path, calls, registry_sql)
+            print(f"    {'conexão nova por chamada':<26} {len(calls) / seconds:>10,.0f} chamadas/s")
+            seconds = run_reused_connection(db_path, calls, registry_sql, DatabaseManager.CACHED_STATEMENTS)
+            print(f"    {'conexão reusada':<26} {len(calls) / seconds:>10,.0f} chamadas/s")
+            
+            db = DatabaseManager(db_path)
+            start = time.perf_counter()
+            for vehicle_id, values in calls:
+                db.update_vehicle(vehicle_id, **values)
+            seconds = time.perf_counter() - start
+            print(f"  {'update_vehicle':<28} {len(calls) / seconds:>10,.0f} chamadas/s")
+            db.close()
+
+if __name__ == "__main__":
+    main()
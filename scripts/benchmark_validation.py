@@ -0,0 +1,77 @@
+"""
+Throughput of batch validation and import.
+
+Generates synthetic customer and vehicle rows as they would come from a
+CSV file (text, mixed case and punctuation, a share of invalid values),
+times validate_batch on them and then import_rows into a new database.
+
+Usage (from the project root):
+    python -m scripts.benchmark_validation --rows 500000 --invalid 0.02
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from database import DatabaseManager
+from scripts.create_database import create_database
+from validation import FUEL_TYPES, TRANSMISSIONS, cpf_check_digits, validate_batch
+
+CUSTOMER_COLUMNS = ('name', 'email', 'phone', 'address', 'cpf')
+VEHICLE_COLUMNS = ('brand', 'model', 'year', 'color', 'price', 'mileage', 'fuel_type', 'transmission')
+
+def customer_rows(count: int, invalid: float, rng: random.Random) -> list:
+    rows = []
+    for i in range(count):
+        base = f"{i + 1:09d}"
+        cpf = base + cpf_check_digits(base)
+        row = [f"Cliente {i}", f"Cliente{i}@Email.com", f"11 9{rng.randint(1000, 9999)} {rng.randint(1000, 9999)}",
+               '', f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}" if i % 2 else cpf]
+        if rng.random() < invalid:
+            row[rng.choice((1, 2, 4))] = 'x'
+        rows.append(row)
+    return rows
+
+def vehicle_rows(count: int, invalid: float, rng: random.Random) -> list:
+    rows = []
+    for _ in range(count):
+        row = ['Honda', 'Civic', str(rng.randint(2000, 2024)), 'Red', f"{rng.uniform(20000, 150000):.2f}",
+               str(rng.randint(0, 200000)), rng.choice(FUEL_TYPES).lower(), rng.choice(TRANSMISSIONS)]
+        if rng.random() < invalid:
+            row[rng.choice((2, 4, 6))] = 'x'
+        rows.append(row)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--invalid', type=float, default=0.02, help="fração de linhas com um valor inválido")
+    args = parser.parse_args()
+    rng = random.Random(7)
+    batches = {
+        'customers': (CUSTOMER_COLUMNS, customer_rows(args.rows, args.invalid, rng)),
+        'vehicles': (VEHICLE_COLUMNS, vehicle_rows(args.rows, args.invalid, rng)),
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        create_database(db_path)
+        db = DatabaseManager(db_path)
+        print(f"{'tabela':<10} {'etapa':<10} {'linhas/s':>12} {'válidas':>9} {'erros':>7}")
+        for table, (columns, rows) in batches.items():
+            start = time.perf_counter()
+            valid, _, errors = validate_batch(table, columns, rows)
+            elapsed = time.perf_counter() - start
+            print(f"{table:<10} {'validação':<10} {len(rows) / elapsed:>12,.0f} {len(valid):>9} {len(errors):>7}")
+            
+            start = time.perf_counter()
+            result = db.import_rows(table, columns, rows)
+            elapsed = time.perf_counter() - start
+            print(f"{table:<10} {'importação':<10} {len(rows) / elapsed:>12,.0f} {result['inserted']:>9} "
+                  f"{len(result['errors']):>7}")
+        db.close()
+
+if __name__ == "__main__":
+    main()
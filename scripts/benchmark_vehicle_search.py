@@ -0,0 +1,52 @@
+"""
+Benchmark faceted vehicle search on a large synthetic inventory.
+
+Usage (from the project root):
+    python -m scripts.benchmark_vehicle_search --vehicles 1000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from database import DatabaseManager
+from scripts.generate_data import create_benchmark_database
+
+QUERIES = [
+    ("sem filtros", {}),
+    ("Flex, Automatic, 2021-2023, < R$80k, < 30k km",
+     dict(fuel_type='Flex', transmission='Automatic', year_min=2021, year_max=2023,
+          price_max=80000, mileage_max=30000)),
+    ("Disponível, Toyota/Honda", dict(status='Available', brand=['Toyota', 'Honda'])),
+    ("preço R$50k-R$60k", dict(price_min=50000, price_max=60000)),
+    ("texto 'Civic'", dict(query='Civic')),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vehicles', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Gerando {args.vehicles} veículos...")
+        create_benchmark_database(db_path, vehicles=args.vehicles)
+        db = DatabaseManager(db_path)
+        with db.get_connection() as conn:
+            conn.execute('ANALYZE')
+        
+        for label, filters in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = db.search_vehicles_faceted(**filters)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            print(f"{label:<50} total={result['total']:>8}  "
+                  f"mediana={timings[len(timings) // 2] * 1000:8.1f} ms  "
+                  f"melhor={timings[0] * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,189 @@
 import sqlite3
 import os
 
-def create_database():
-    """Create the SQLite database and tables for the car dealership system"""
+def add_column_if_missing(cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> bool:
+    """Add a column to an existing table (schema migration); returns True if added"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column in [row[1] for row in cursor.fetchall()]:
+        return False
+    cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return True
+
+# Tables whose changes are recorded in change_log
+CHANGE_LOG_TABLES = ('vehicles', 'customers', 'sales', 'employees', 'vehicles_archive', 'sales_archive')
+
+# Hot table -> archive table holding its archived rows (see archive.py)
+ARCHIVE_TABLES = {'vehicles': 'vehicles_archive', 'sales': 'sales_archive'}
+
+def sync_archive_table(cursor: sqlite3.Cursor, table: str):
+    """Create table's archive and add any column the hot table has gained.
     
-    # Create database directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
+    Archive columns copy the hot column types without constraints or
+    defaults (rows are always copied in whole), plus when and why each row
+    was archived.
+    """
+    archive = ARCHIVE_TABLES[table]
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {archive} (
+            id INTEGER PRIMARY KEY,
+            archived_at TIMESTAMP NOT NULL,
+            archive_reason TEXT
+        )
+    ''')
+    cursor.execute(f'PRAGMA table_info({table})')
+    for _, column, column_type, _, _, _ in cursor.fetchall():
+        add_column_if_missing(cursor, archive, column, column_type)
+
+def sync_trigger(cursor: sqlite3.Cursor, name: str, sql: str):
+    """Create a trigger, replacing an existing one whose definition differs"""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+    row = cursor.fetchone()
+    if row is None or row[0] != sql:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(sql)
+
+def change_log_triggers(cursor: sqlite3.Cursor, table: str) -> dict:
+    """CREATE TRIGGER statements logging every change of table, keyed by trigger name"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    columns = [row[1] for row in cursor.fetchall()]
+    new_values = ', '.join(f"'{column}', NEW.{column}" for column in columns)
+    old_values = ', '.join(f"'{column}', OLD.{column}" for column in columns)
+    changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+    now = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+    return {
+        f'trg_{table}_log_insert': f"""CREATE TRIGGER trg_{table}_log_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO change_log (table_name, row_id, operation, new_values, changed_at)
+            VALUES ('{table}', NEW.id, 'INSERT', json_object({new_values}), {now});
+        END""",
+        f'trg_{table}_log_update': f"""CREATE TRIGGER trg_{table}_log_update AFTER UPDATE ON {table}
+        WHEN {changed}
+        BEGIN
+            INSERT INTO change_log (table_name, row_id, operation, old_values, new_values, changed_at)
+            VALUES ('{table}', NEW.id, 'UPDATE', json_object({old_values}), json_object({new_values}), {now});
+        END""",
+        f'trg_{table}_log_delete': f"""CREATE TRIGGER trg_{table}_log_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO change_log (table_name, row_id, operation, old_values, changed_at)
+            VALUES ('{table}', OLD.id, 'DELETE', json_object({old_values}), {now});
+        END""",
+    }
+
+def sync_change_log_triggers(cursor: sqlite3.Cursor):
+    """(Re)create the change-log triggers whose column list is out of date"""
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_%_log_%'")
+    existing = dict(cursor.fetchall())
+    for table in CHANGE_LOG_TABLES:
+        for name, sql in change_log_triggers(cursor, table).items():
+            if existing.get(name) != sql:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+                cursor.execute(sql)
+
+# Columns of the sales_view read model and the SELECT over the source tables
+# that computes them (sales joined to customer, vehicle and salesperson)
+SALES_VIEW_COLUMNS = ('id', 'customer_id', 'vehicle_id', 'employee_id', 'sale_price', 'sale_date',
+                      'payment_method', 'notes', 'commission', 'customer_name', 'customer_email',
+                      'brand', 'model', 'year', 'color', 'employee_name')
+SALES_VIEW_SELECT = '''
+    SELECT s.id, s.customer_id, s.vehicle_id, s.employee_id, s.sale_price, s.sale_date,
+           s.payment_method, s.notes, s.commission, c.name, c.email,
+           COALESCE(v.brand, va.brand), COALESCE(v.model, va.model), COALESCE(v.year, va.year),
+           COALESCE(v.color, va.color), e.name
+    FROM sales s
+    LEFT JOIN customers c ON s.customer_id = c.id
+    LEFT JOIN vehicles v ON s.vehicle_id = v.id
+    LEFT JOIN vehicles_archive va ON s.vehicle_id = va.id
+    LEFT JOIN employees e ON s.employee_id = e.id'''
+
+def rebuild_sales_view(cursor: sqlite3.Cursor) -> int:
+    """Recompute every sales_view row from the source tables; returns the row count"""
+    cursor.execute('DELETE FROM sales_view')
+    cursor.execute(f"INSERT INTO sales_view ({', '.join(SALES_VIEW_COLUMNS)}) {SALES_VIEW_SELECT}")
+    return cursor.rowcount
+
+def sales_view_differences(cursor: sqlite3.Cursor) -> int:
+    """Rows of sales_view that are missing, stale or left over (0 when it is consistent)"""
+    columns = ', '.join(SALES_VIEW_COLUMNS)
+    cursor.execute(f'''
+        SELECT (SELECT COUNT(*) FROM ({SALES_VIEW_SELECT} EXCEPT SELECT {columns} FROM sales_view))
+             + (SELECT COUNT(*) FROM (SELECT {columns} FROM sales_view EXCEPT {SALES_VIEW_SELECT}))
+    ''')
+    return cursor.fetchone()[0]
+
+def sync_sales_view(cursor: sqlite3.Cursor):
+    """Create the denormalized sales_view and the triggers that keep it current.
     
-    # Connect to SQLite database
-    conn = sqlite3.connect('data/dealership.db')
+    A sale's row is recomputed whenever the sale changes, and the rows of
+    a customer, vehicle or salesperson are recomputed when that row is
+    inserted, edited (in a column the view copies) or deleted. Archived
+    sales leave the view with their delete from sales.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sales_view'")
+    view_exists = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales_view (
+            id INTEGER PRIMARY KEY,
+            customer_id INTEGER,
+            vehicle_id INTEGER,
+            employee_id INTEGER,
+            sale_price REAL,
+            sale_date TIMESTAMP,
+            payment_method TEXT,
+            notes TEXT,
+            commission REAL,
+            customer_name TEXT,
+            customer_email TEXT,
+            brand TEXT,
+            model TEXT,
+            year INTEGER,
+            color TEXT,
+            employee_name TEXT
+        )
+    ''')
+    # Sort columns of the sales listing (see paging.py)
+    for column in ('sale_date', 'sale_price', 'customer_name', 'brand'):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_sales_view_{column} ON sales_view ({column})')
+    if not view_exists:
+        rebuild_sales_view(cursor)
+    
+    def refresh(where: str) -> str:
+        return (f"INSERT OR REPLACE INTO sales_view ({', '.join(SALES_VIEW_COLUMNS)}) "
+                f"{SALES_VIEW_SELECT} WHERE {where};")
+    
+    sync_trigger(cursor, 'trg_sales_view_insert', f'''CREATE TRIGGER trg_sales_view_insert AFTER INSERT ON sales
+        BEGIN
+            {refresh('s.id = NEW.id')}
+        END''')
+    sync_trigger(cursor, 'trg_sales_view_update', f'''CREATE TRIGGER trg_sales_view_update AFTER UPDATE ON sales
+        BEGIN
+            DELETE FROM sales_view WHERE id = OLD.id AND OLD.id <> NEW.id;
+            {refresh('s.id = NEW.id')}
+        END''')
+    sync_trigger(cursor, 'trg_sales_view_delete', '''CREATE TRIGGER trg_sales_view_delete AFTER DELETE ON sales
+        BEGIN
+            DELETE FROM sales_view WHERE id = OLD.id;
+        END''')
+    # Dimension table -> (sales column referencing it, columns the view copies)
+    dimensions = {
+        'customers': ('customer_id', 'name, email'),
+        'vehicles': ('vehicle_id', 'brand, model, year, color'),
+        'vehicles_archive': ('vehicle_id', 'brand, model, year, color'),
+        'employees': ('employee_id', 'name'),
+    }
+    for table, (key, columns) in dimensions.items():
+        for event, row in (('INSERT', 'NEW'), (f'UPDATE OF {columns}', 'NEW'), ('DELETE', 'OLD')):
+            name = f"trg_sales_view_{table}_{event.split()[0].lower()}"
+            sync_trigger(cursor, name, f'''CREATE TRIGGER {name} AFTER {event} ON {table}
+        BEGIN
+            {refresh(f's.{key} = {row}.id')}
+        END''')
+
+# Stored in the file's user_version by apply_schema. Bump it whenever
+# apply_schema changes, so existing databases are upgraded when next opened.
+SCHEMA_VERSION = 1
+
+def apply_schema(conn: sqlite3.Connection):
+    """Create or upgrade all tables and indexes. Safe to run on an existing database."""
     cursor = conn.cursor()
     
     # Create vehicles table
@@ -28,6 +203,22 @@ def create_database():
         )
     ''')
     
+    # Indexes for faceted vehicle search: the wide index covers the facet
+    # GROUP BY (including free-text matching on model/color) so counting
+    # never touches the table rows
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_vehicles_facets
+        ON vehicles (status, fuel_type, transmission, brand, year, price, mileage, model, color)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_vehicles_brand_model ON vehicles (brand, model)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_vehicles_year_price ON vehicles (year, price)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_vehicles_price ON vehicles (price)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_vehicles_created_at ON vehicles (created_at)')
+    # Sort columns of the paged listings (see paging.py): a single-column index
+    # is ordered by (column, rowid), exactly the listing's tie-broken order
+    for column in ('brand', 'model', 'year', 'mileage'):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_vehicles_{column} ON vehicles ({column})')
+    
     # Create customers table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS customers (
@@ -37,10 +228,22 @@ def create_database():
             phone TEXT NOT NULL,
             address TEXT,
             cpf TEXT UNIQUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            phone_digits TEXT,
+            name_key TEXT
         )
     ''')
     
+    # No CPF is NULL, not '' (which UNIQUE allows only once; see validation.py)
+    cursor.execute("UPDATE customers SET cpf = NULL WHERE cpf = ''")
+    
+    # Lookup keys for customer search, filled in by DatabaseManager
+    add_column_if_missing(cursor, 'customers', 'phone_digits', 'TEXT')
+    add_column_if_missing(cursor, 'customers', 'name_key', 'TEXT')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_phone_digits ON customers (phone_digits)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_name_key ON customers (name_key)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_name ON customers (name)')
+    
     # Create sales table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS sales (
@@ -56,6 +259,94 @@ def create_database():
         )
     ''')
     
+    # Salesperson credited with each sale and the commission earned, fixed
+    # when the sale is recorded (see DatabaseManager.add_sale)
+    add_column_if_missing(cursor, 'sales', 'employee_id', 'INTEGER')
+    add_column_if_missing(cursor, 'sales', 'commission', 'REAL')
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_customer_date ON sales (customer_id, sale_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_employee_date ON sales (employee_id, sale_date)')
+    # Archival selects by date and checks whether a vehicle still has hot sales
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_date ON sales (sale_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_vehicle ON sales (vehicle_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_price ON sales (sale_price)')
+    
+    # Archive tiers for sold vehicles and old sales
+    sync_archive_table(cursor, 'vehicles')
+    sync_archive_table(cursor, 'sales')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_archive_customer_date '
+                   'ON sales_archive (customer_id, sale_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_archive_vehicle ON sales_archive (vehicle_id)')
+    
+    # Per-customer lifetime aggregates, kept current by the triggers below
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'customer_stats'")
+    stats_exist = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customer_stats (
+            customer_id INTEGER PRIMARY KEY,
+            purchase_count INTEGER NOT NULL DEFAULT 0,
+            lifetime_spend REAL NOT NULL DEFAULT 0,
+            last_purchase_date TIMESTAMP
+        )
+    ''')
+    if not stats_exist:
+        cursor.execute('''
+            INSERT INTO customer_stats (customer_id, purchase_count, lifetime_spend, last_purchase_date)
+            SELECT customer_id, COUNT(*), SUM(sale_price), MAX(sale_date)
+            FROM (SELECT customer_id, sale_price, sale_date FROM sales
+                  UNION ALL
+                  SELECT customer_id, sale_price, sale_date FROM sales_archive)
+            GROUP BY customer_id
+        ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_sales_stats_insert AFTER INSERT ON sales
+        BEGIN
+            INSERT INTO customer_stats (customer_id, purchase_count, lifetime_spend, last_purchase_date)
+            VALUES (NEW.customer_id, 1, NEW.sale_price, NEW.sale_date)
+            ON CONFLICT (customer_id) DO UPDATE SET
+                purchase_count = purchase_count + 1,
+                lifetime_spend = lifetime_spend + excluded.lifetime_spend,
+                last_purchase_date = MAX(COALESCE(last_purchase_date, ''), excluded.last_purchase_date);
+        END
+    ''')
+    # Lifetime figures include archived sales: moving a sale to the archive
+    # (it is copied there before being deleted) leaves them untouched
+    last_purchase = '''(SELECT MAX(sale_date) FROM (
+                    SELECT sale_date FROM sales WHERE customer_id = OLD.customer_id
+                    UNION ALL
+                    SELECT sale_date FROM sales_archive WHERE customer_id = OLD.customer_id))'''
+    sync_trigger(cursor, 'trg_sales_stats_delete', f'''CREATE TRIGGER trg_sales_stats_delete AFTER DELETE ON sales
+        WHEN NOT EXISTS (SELECT 1 FROM sales_archive WHERE id = OLD.id)
+        BEGIN
+            UPDATE customer_stats SET
+                purchase_count = purchase_count - 1,
+                lifetime_spend = lifetime_spend - OLD.sale_price,
+                last_purchase_date = {last_purchase}
+            WHERE customer_id = OLD.customer_id;
+        END''')
+    sync_trigger(cursor, 'trg_sales_stats_update', f'''CREATE TRIGGER trg_sales_stats_update
+        AFTER UPDATE OF customer_id, sale_price, sale_date ON sales
+        BEGIN
+            UPDATE customer_stats SET
+                purchase_count = purchase_count - 1,
+                lifetime_spend = lifetime_spend - OLD.sale_price,
+                last_purchase_date = {last_purchase}
+            WHERE customer_id = OLD.customer_id;
+            INSERT INTO customer_stats (customer_id, purchase_count, lifetime_spend, last_purchase_date)
+            VALUES (NEW.customer_id, 1, NEW.sale_price, NEW.sale_date)
+            ON CONFLICT (customer_id) DO UPDATE SET
+                purchase_count = purchase_count + 1,
+                lifetime_spend = lifetime_spend + excluded.lifetime_spend,
+                last_purchase_date = MAX(COALESCE(last_purchase_date, ''), excluded.last_purchase_date);
+        END''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_stats_delete AFTER DELETE ON customers
+        BEGIN
+            DELETE FROM customer_stats WHERE customer_id = OLD.id;
+        END
+    ''')
+    
     # Create employees table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS employees (
@@ -68,7 +359,173 @@ def create_database():
         )
     ''')
     
+    # Commission rates: a sale earns the rate of the matching rule with the
+    # highest minimum price, rules for the seller's position before general
+    # ones (position NULL)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'commission_rules'")
+    rules_exist = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS commission_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            position TEXT,
+            min_sale_price REAL NOT NULL DEFAULT 0,
+            rate REAL NOT NULL
+        )
+    ''')
+    if not rules_exist:
+        cursor.execute('INSERT INTO commission_rules (position, min_sale_price, rate) VALUES (NULL, 0, 0.01)')
+    
+    # Per-employee, per-month sales aggregates ('YYYY-MM' periods), kept
+    # current by the triggers below; the (period, metric) indexes answer a
+    # monthly leaderboard by reading only its top rows
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employee_sales_stats'")
+    employee_stats_exist = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS employee_sales_stats (
+            employee_id INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            commission REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, period)
+        )
+    ''')
+    for metric in ('units', 'revenue', 'commission'):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_employee_sales_stats_{metric} '
+                       f'ON employee_sales_stats (period, {metric})')
+    if not employee_stats_exist:
+        cursor.execute('''
+            INSERT INTO employee_sales_stats (employee_id, period, units, revenue, commission)
+            SELECT employee_id, substr(sale_date, 1, 7), COUNT(*), SUM(sale_price), TOTAL(commission)
+            FROM (SELECT employee_id, sale_date, sale_price, commission FROM sales
+                  UNION ALL
+                  SELECT employee_id, sale_date, sale_price, commission FROM sales_archive)
+            WHERE employee_id IS NOT NULL
+            GROUP BY employee_id, substr(sale_date, 1, 7)
+        ''')
+    
+    add_employee_stats = '''INSERT INTO employee_sales_stats (employee_id, period, units, revenue, commission)
+            SELECT NEW.employee_id, substr(NEW.sale_date, 1, 7), 1, NEW.sale_price, COALESCE(NEW.commission, 0)
+            WHERE NEW.employee_id IS NOT NULL
+            ON CONFLICT (employee_id, period) DO UPDATE SET
+                units = units + 1,
+                revenue = revenue + excluded.revenue,
+                commission = commission + excluded.commission;'''
+    remove_employee_stats = '''UPDATE employee_sales_stats SET
+                units = units - 1,
+                revenue = revenue - OLD.sale_price,
+                commission = commission - COALESCE(OLD.commission, 0)
+            WHERE employee_id = OLD.employee_id AND period = substr(OLD.sale_date, 1, 7);
+            DELETE FROM employee_sales_stats
+            WHERE employee_id = OLD.employee_id AND period = substr(OLD.sale_date, 1, 7) AND units <= 0;'''
+    sync_trigger(cursor, 'trg_sales_employee_stats_insert', f'''CREATE TRIGGER trg_sales_employee_stats_insert
+        AFTER INSERT ON sales
+        BEGIN
+            {add_employee_stats}
+        END''')
+    # Archiving copies the sale to sales_archive before deleting it; the
+    # aggregates keep counting it
+    sync_trigger(cursor, 'trg_sales_employee_stats_delete', f'''CREATE TRIGGER trg_sales_employee_stats_delete
+        AFTER DELETE ON sales
+        WHEN OLD.employee_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM sales_archive WHERE id = OLD.id)
+        BEGIN
+            {remove_employee_stats}
+        END''')
+    sync_trigger(cursor, 'trg_sales_employee_stats_update', f'''CREATE TRIGGER trg_sales_employee_stats_update
+        AFTER UPDATE OF employee_id, sale_price, sale_date, commission ON sales
+        BEGIN
+            {remove_employee_stats}
+            {add_employee_stats}
+        END''')
+    
+    # Flat read model of the sales listing, kept current by triggers
+    sync_sales_view(cursor)
+    
+    # Background job queue (see jobs.py); timestamps are local time, set by jobs.py
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL DEFAULT '{}',
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            progress REAL NOT NULL DEFAULT 0,
+            message TEXT,
+            result TEXT,
+            error TEXT,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            worker TEXT,
+            created_at TIMESTAMP NOT NULL,
+            run_after TIMESTAMP NOT NULL,
+            started_at TIMESTAMP,
+            heartbeat_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    ''')
+    # Workers take the next due job straight from this index
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, id)')
+    
+    # Offline journal entries already replayed (see offline.py): replaying an
+    # entry again is a no-op, and conflicts stay here for review
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS offline_replays (
+            entry_id TEXT PRIMARY KEY,
+            operation TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result_id INTEGER,
+            reason TEXT,
+            terminal TEXT,
+            recorded_at TIMESTAMP NOT NULL,
+            replayed_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_offline_replays_status ON offline_replays (status, replayed_at)')
+    
+    # Append-only change log (audit trail and replication feed)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL,
+            old_values TEXT,
+            new_values TEXT,
+            changed_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log (table_name, row_id, seq)')
+    sync_change_log_triggers(cursor)
+    
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
+
+def create_database(db_path: str = None, page_size: int = None):
+    """Create the SQLite database and tables for the car dealership system.
+    
+    ``page_size`` (bytes, a power of two from 512 to 65536) only applies to
+    a new file; SQLite's default is 4096. See storage.py. Both default to
+    the configured settings (see settings.py).
+    """
+    from settings import get_settings
+    from storage import check_page_size
+    db_path = db_path or get_settings().db_path
+    page_size = page_size or get_settings().page_size
+    check_page_size(page_size)
+    
+    # Create database directory if it doesn't exist
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    
+    # Connect to SQLite database
+    conn = sqlite3.connect(db_path)
+    if page_size:
+        # Must be set before the first table is created
+        conn.execute(f'PRAGMA page_size = {page_size}')
+    apply_schema(conn)
     conn.close()
     print("Database created successfully!")
 
@@ -0,0 +1,132 @@
+"""
+Synthetic data generator for benchmarks and load testing.
+
+Usage (from the project root):
+    python -m scripts.generate_data data/bench.db --vehicles 1000000 --customers 100000 --sales 500000
+"""
+
+import argparse
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from normalization import fold_text, phone_key
+from validation import FUEL_TYPES, PAYMENT_METHODS, TRANSMISSIONS, cpf_check_digits
+
+BRANDS = {
+    'Toyota': ['Corolla', 'Yaris', 'Hilux', 'Etios'],
+    'Honda': ['Civic', 'City', 'Fit', 'HR-V'],
+    'Ford': ['Focus', 'Ka', 'Ranger', 'EcoSport'],
+    'Volkswagen': ['Golf', 'Gol', 'Polo', 'T-Cross'],
+    'Chevrolet': ['Onix', 'Cruze', 'Tracker', 'S10'],
+    'Nissan': ['Sentra', 'Versa', 'Kicks', 'Frontier'],
+    'Hyundai': ['HB20', 'Creta', 'Tucson'],
+    'Fiat': ['Argo', 'Mobi', 'Toro', 'Strada'],
+}
+COLORS = ['White', 'Black', 'Silver', 'Gray', 'Red', 'Blue']
+FIRST_NAMES = ['João', 'Maria', 'Pedro', 'Ana', 'Carlos', 'Lúcia', 'José', 'Fernanda', 'Márcio', 'Beatriz']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Costa', 'Ferreira', 'Gonçalves', 'Araújo']
+
+BATCH_SIZE = 10000
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def generate_vehicles(conn: sqlite3.Connection, count: int, seed: int = 1):
+    """Insert count random vehicles"""
+    rng = random.Random(seed)
+    brands = list(BRANDS)
+    start = datetime(2015, 1, 1)
+    
+    def rows():
+        for _ in range(count):
+            brand = rng.choice(brands)
+            year = rng.randint(2010, 2024)
+            mileage = max(0, int((2025 - year) * rng.gauss(12000, 4000)))
+            price = round(max(15000.0, 140000.0 * (0.92 ** (2025 - year)) - mileage * 0.05
+                              + rng.gauss(0, 8000)), 2)
+            created = start + timedelta(minutes=rng.randint(0, 5_000_000))
+            yield (brand, rng.choice(BRANDS[brand]), year, rng.choice(COLORS), price, mileage,
+                   rng.choice(FUEL_TYPES), rng.choice(TRANSMISSIONS),
+                   'Sold' if rng.random() < 0.6 else 'Available',
+                   created.strftime('%Y-%m-%d %H:%M:%S'))
+    
+    for batch in _batches(rows()):
+        conn.executemany('''
+            INSERT INTO vehicles (brand, model, year, color, price, mileage, fuel_type,
+                                  transmission, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+    conn.commit()
+
+def generate_customers(conn: sqlite3.Connection, count: int, seed: int = 2):
+    """Insert count random customers with unique emails and CPFs"""
+    rng = random.Random(seed)
+    
+    def rows():
+        for i in range(count):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+            phone = f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+            base = f"{i + 1:09d}"
+            cpf = base + cpf_check_digits(base)
+            yield (name, f"cliente{i}@email.com", phone, '', f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}",
+                   fold_text(name), phone_key(phone))
+    
+    for batch in _batches(rows()):
+        conn.executemany('''
+            INSERT INTO customers (name, email, phone, address, cpf, name_key, phone_digits)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+    conn.commit()
+
+def generate_sales(conn: sqlite3.Connection, count: int, seed: int = 3):
+    """Insert count random sales referencing existing customers and vehicles"""
+    rng = random.Random(seed)
+    max_customer = conn.execute('SELECT MAX(id) FROM customers').fetchone()[0] or 0
+    max_vehicle = conn.execute('SELECT MAX(id) FROM vehicles').fetchone()[0] or 0
+    if not max_customer or not max_vehicle:
+        raise ValueError("generate customers and vehicles before sales")
+    start = datetime(2018, 1, 1)
+    
+    def rows():
+        for _ in range(count):
+            sale_date = start + timedelta(minutes=rng.randint(0, 4_000_000))
+            yield (rng.randint(1, max_customer), rng.randint(1, max_vehicle),
+                   round(rng.uniform(20000, 150000), 2), sale_date.strftime('%Y-%m-%d %H:%M:%S'),
+                   rng.choice(PAYMENT_METHODS), '')
+    
+    for batch in _batches(rows()):
+        conn.executemany('''
+            INSERT INTO sales (customer_id, vehicle_id, sale_price, sale_date, payment_method, notes)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', batch)
+    conn.commit()
+
+def create_benchmark_database(db_path: str, vehicles: int = 0, customers: int = 0, sales: int = 0):
+    """Create a database at db_path with the current schema and synthetic data"""
+    from scripts.create_database import create_database
+    create_database(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        generate_vehicles(conn, vehicles)
+        generate_customers(conn, customers)
+        if sales:
+            generate_sales(conn, sales)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic dealership data")
+    parser.add_argument('db_path')
+    parser.add_argument('--vehicles', type=int, default=100000)
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--sales', type=int, default=50000)
+    args = parser.parse_args()
+    create_benchmark_database(args.db_path, args.vehicles, args.customers, args.sales)
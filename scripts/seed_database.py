@@ -2,10 +2,13 @@ import sqlite3
 from datetime import datetime, timedelta
 import random
 
-def seed_database():
-    """Populate the database with sample data"""
+from normalization import fold_text, phone_key
+
+def seed_database(db_path: str = None):
+    """Populate the database with sample data (default: the configured database, see settings.py)"""
+    from settings import get_settings
     
-    conn = sqlite3.connect('data/dealership.db')
+    conn = sqlite3.connect(db_path or get_settings().db_path)
     cursor = conn.cursor()
     
     # Sample vehicles data
@@ -27,17 +30,18 @@ def seed_database():
     
     # Sample customers data
     customers_data = [
-        ('João Silva', 'joao.silva@email.com', '(11) 99999-1111', 'Rua das Flores, 123', '123.456.789-01'),
-        ('Maria Santos', 'maria.santos@email.com', '(11) 99999-2222', 'Av. Paulista, 456', '987.654.321-02'),
-        ('Pedro Oliveira', 'pedro.oliveira@email.com', '(11) 99999-3333', 'Rua da Paz, 789', '456.789.123-03'),
-        ('Ana Costa', 'ana.costa@email.com', '(11) 99999-4444', 'Rua do Sol, 321', '789.123.456-04'),
-        ('Carlos Ferreira', 'carlos.ferreira@email.com', '(11) 99999-5555', 'Av. Brasil, 654', '321.654.987-05'),
+        ('João Silva', 'joao.silva@email.com', '(11) 99999-1111', 'Rua das Flores, 123', '123.456.789-09'),
+        ('Maria Santos', 'maria.santos@email.com', '(11) 99999-2222', 'Av. Paulista, 456', '987.654.321-00'),
+        ('Pedro Oliveira', 'pedro.oliveira@email.com', '(11) 99999-3333', 'Rua da Paz, 789', '456.789.123-64'),
+        ('Ana Costa', 'ana.costa@email.com', '(11) 99999-4444', 'Rua do Sol, 321', '789.123.456-64'),
+        ('Carlos Ferreira', 'carlos.ferreira@email.com', '(11) 99999-5555', 'Av. Brasil, 654', '321.654.987-91'),
     ]
     
+    # Lookup keys, as DatabaseManager.add_customer fills them in
     cursor.executemany('''
-        INSERT INTO customers (name, email, phone, address, cpf)
-        VALUES (?, ?, ?, ?, ?)
-    ''', customers_data)
+        INSERT INTO customers (name, email, phone, address, cpf, name_key, phone_digits)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [row + (fold_text(row[0]), phone_key(row[2])) for row in customers_data])
     
     # Sample employees data
     employees_data = [
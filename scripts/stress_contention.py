@@ -0,0 +1,147 @@
+"""
+Multi-process write contention stress test.
+
+Starts --writers processes adding customers, vehicles and sales and
+updating prices, and --readers processes running the listings' queries,
+all through DatabaseManager on one database file, for --seconds. Reports
+throughput and latency percentiles per role, the errors seen, and the
+lock metrics of the writers (waits, retries, give-ups; see contention.py).
+
+Usage (from the project root):
+    python -m scripts.stress_contention --writers 4 --readers 4 --seconds 20
+    python -m scripts.stress_contention --busy-timeout 0 --retries 0      # no contention handling
+    python -m scripts.stress_contention --journal-mode wal
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+
+from contention import LockMetrics
+from database import DatabaseManager
+from scripts.generate_data import create_benchmark_database
+
+def writer_step(db: DatabaseManager, rng: random.Random, tag: str, max_vehicle: int, max_customer: int):
+    choice = rng.random()
+    if choice < 0.3:
+        db.add_customer(f"Cliente {tag}", f"{tag}@stress.com", '(11) 91234-5678')
+    elif choice < 0.5:
+        db.add_vehicle('Fiat', 'Argo', 2022, 'White', rng.uniform(50000, 90000))
+    elif choice < 0.8:
+        db.update_vehicle(rng.randint(1, max_vehicle), price=round(rng.uniform(20000, 150000), 2))
+    else:
+        db.add_sale(rng.randint(1, max_customer), rng.randint(1, max_vehicle), rng.uniform(20000, 150000))
+
+def reader_step(db: DatabaseManager, rng: random.Random, tag: str, max_vehicle: int, max_customer: int):
+    choice = rng.random()
+    if choice < 0.4:
+        db.search_vehicles_faceted(brand='Honda', status='Available', limit=50)
+    elif choice < 0.7:
+        db.get_customer_history(rng.randint(1, max_customer), limit=20)
+    else:
+        db.get_vehicle_by_id(rng.randint(1, max_vehicle))
+
+def run_client(role: str, number: int, db_path: str, options: dict, start, results):
+    """One process: run ``role`` steps until the deadline, then report its measurements"""
+    try:
+        # Startup schema check with the default timeout: clients starting together would lock each other out
+        db = DatabaseManager(db_path)
+    except sqlite3.Error as e:
+        start.wait()
+        results.put((role, [], {str(e): 1}, LockMetrics().to_dict()))
+        return
+    db.busy_timeout, db.write_retries = options['busy_timeout'], options['retries']
+    db.close()  # reopened with the timeout under test
+    db.lock_metrics.reset()
+    step = writer_step if role == 'writer' else reader_step
+    rng = random.Random(number * 1000 + (role == 'writer'))
+    latencies = []
+    errors = Counter()
+    start.wait()
+    deadline = time.perf_counter() + options['seconds']
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+        began = time.perf_counter()
+        try:
+            step(db, rng, f"w{number}-{count}", options['max_vehicle'], options['max_customer'])
+        except sqlite3.Error as e:
+            errors[str(e)] += 1
+        latencies.append(time.perf_counter() - began)
+    results.put((role, latencies, dict(errors), db.lock_metrics.to_dict()))
+    db.close()
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--busy-timeout', type=float, default=5.0, help="segundos de espera por um lock")
+    parser.add_argument('--retries', type=int, default=5, help="novas tentativas de uma escrita")
+    parser.add_argument('--journal-mode', choices=('delete', 'wal'), default='delete')
+    parser.add_argument('--vehicles', type=int, default=50000)
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--sales', type=int, default=20000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+        create_benchmark_database(db_path, vehicles=args.vehicles, customers=args.customers, sales=args.sales)
+        conn = sqlite3.connect(db_path)
+        conn.execute(f'PRAGMA journal_mode = {args.journal_mode}')
+        conn.close()
+        # Schema upgrades happen once here, not in every client at the start
+        DatabaseManager(db_path).close()
+        
+        options = {'busy_timeout': args.busy_timeout, 'retries': args.retries, 'seconds': args.seconds,
+                   'max_vehicle': args.vehicles, 'max_customer': args.customers}
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        clients = [multiprocessing.Process(target=run_client, args=(role, number, db_path, options, start, results))
+                   for role, count in (('writer', args.writers), ('reader', args.readers))
+                   for number in range(count)]
+        for client in clients:
+            client.start()
+        print(f"{args.writers} escritor(es) e {args.readers} leitor(es) por {args.seconds:g} s "
+              f"(busy timeout {args.busy_timeout:g} s, {args.retries} nova(s) tentativa(s), "
+              f"journal {args.journal_mode})")
+        start.set()
+        reports = [results.get() for _ in clients]
+        for client in clients:
+            client.join()
+    
+    print(f"\n{'papel':<9} {'operações':>10} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'máx ms':>9} {'erros':>7}")
+    for role in ('writer', 'reader'):
+        latencies = sorted(value for report in reports if report[0] == role for value in report[1])
+        errors = sum(sum(report[2].values()) for report in reports if report[0] == role)
+        print(f"{role:<9} {len(latencies):>10} {len(latencies) / args.seconds:>9.1f} "
+              f"{percentile(latencies, 0.5) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f} "
+              f"{(latencies[-1] if latencies else 0) * 1000:>9.1f} {errors:>7}")
+    
+    errors = Counter()
+    for report in reports:
+        errors.update(report[2])
+    for message, count in errors.most_common(5):
+        print(f"  {count}x {message}")
+    
+    writers = [report[3] for report in reports if report[0] == 'writer']
+    transactions = sum(metrics['lock_wait']['count'] for metrics in writers)
+    wait_ms = sum(metrics['lock_wait']['total_ms'] for metrics in writers)
+    print(f"\nLocks dos escritores: {transactions} espera(s), média {wait_ms / max(transactions, 1):.2f} ms, "
+          f"máx {max((metrics['lock_wait']['max_ms'] for metrics in writers), default=0):.1f} ms; "
+          f"{sum(metrics['retries'] for metrics in writers)} nova(s) tentativa(s), "
+          f"{sum(metrics['gave_up'] for metrics in writers)} desistência(s)")
+
+if __name__ == "__main__":
+    main()
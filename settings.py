@@ -0,0 +1,242 @@
+"""
+Settings: where the database lives and the performance knobs.
+
+Each setting (see FIELDS) comes from, in increasing precedence:
+
+- its default below;
+- the ``[concessionaria]`` section of an INI file: ``--config``, else
+  $CONCESSIONARIA_CONFIG, else concessionaria.ini in the project folder
+  (relative paths in the file are relative to the file);
+- an environment variable, CONCESSIONARIA_ and the name in upper case
+  (CONCESSIONARIA_DB_PATH, CONCESSIONARIA_CACHE_MB, ...);
+- a command line flag (``python main.py --cache-mb 64 tui``).
+
+main.py reads them once at startup and installs them with use_settings;
+DatabaseManager, create_database, seed_database, JobRunner, run_report
+and FederatedDatabase take what they are not given from get_settings().
+
+Example concessionaria.ini:
+    [concessionaria]
+    db_path = /srv/loja/dealership.db
+    pragma_profile = wal
+    cache_mb = 64
+
+Usage (from the project root):
+    python main.py settings                      # settings in effect and where each came from
+    python -m scripts.benchmark_settings --sweep pragma_profile=default,wal --sweep cache_mb=2,64
+"""
+
+import configparser
+import itertools
+import os
+from typing import Dict, List, Optional
+
+from contention import DEFAULT_BUSY_TIMEOUT, DEFAULT_WRITE_RETRIES
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(PROJECT_DIR, 'data')
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'dealership.db')
+
+DEFAULT_CONFIG_PATH = os.path.join(PROJECT_DIR, 'concessionaria.ini')
+CONFIG_SECTION = 'concessionaria'
+ENV_PREFIX = 'CONCESSIONARIA_'
+
+# PRAGMAs set on every connection. journal_mode is stored in the database
+# file, so it is switched once, when DatabaseManager opens the database.
+PRAGMA_PROFILES = {
+    # SQLite's defaults: rollback journal, synchronous FULL
+    'default': {},
+    # Readers never wait for the writer and commits skip most fsyncs; every
+    # process must run on the machine holding the file (no network shares)
+    'wal': {'journal_mode': 'wal', 'synchronous': 'normal', 'temp_store': 'memory'},
+    # Rollback journal, also fsyncing the journal's directory on every commit
+    'durable': {'journal_mode': 'delete', 'synchronous': 'extra'},
+}
+
+# name -> (type, default, help). None defaults leave the choice to the
+# component (SQLite's own defaults, one report process per CPU, ...).
+FIELDS = {
+    'db_path': (str, DEFAULT_DB_PATH, "arquivo da base de dados"),
+    'busy_timeout': (float, DEFAULT_BUSY_TIMEOUT, "segundos de espera por um lock"),
+    'write_retries': (int, DEFAULT_WRITE_RETRIES, "novas tentativas de uma escrita bloqueada"),
+    'mmap_mb': (int, None, "memória mapeada por conexão, em MB (padrão do SQLite: nenhuma)"),
+    'cache_mb': (int, None, "cache de páginas por conexão, em MB (padrão do SQLite: cerca de 2)"),
+    'statement_cache': (int, None, "comandos preparados guardados por conexão"),
+    'pragma_profile': (str, 'default', f"perfil de PRAGMAs: {', '.join(PRAGMA_PROFILES)}"),
+    'page_size': (int, None, "tamanho de página de bases novas e reorganizadas, em bytes (padrão do SQLite: 4096)"),
+    'job_workers': (int, 1, "tarefas em segundo plano executadas ao mesmo tempo"),
+    'report_workers': (int, None, "processos dos relatórios de receita (padrão: um por CPU)"),
+    'store_workers': (int, None, "consultas simultâneas entre lojas (padrão: uma por loja)"),
+}
+
+SOURCE_LABELS = {'default': 'padrão', 'file': 'arquivo', 'env': 'ambiente', 'cli': 'linha de comando',
+                 'code': 'programa'}
+
+def parse_value(name: str, text) -> Optional[object]:
+    """Setting ``name`` converted from text (an empty string or None clears it to None)"""
+    if name not in FIELDS:
+        raise ValueError(f"configuração desconhecida: {name}")
+    if text is None or (isinstance(text, str) and not text.strip()):
+        return None
+    kind = FIELDS[name][0]
+    try:
+        return kind(text.strip() if isinstance(text, str) else text)
+    except ValueError:
+        raise ValueError(f"valor inválido para {name}: {text!r}") from None
+
+class Settings:
+    """One value per FIELDS entry, and where each came from (``sources``)"""
+    
+    def __init__(self, **values):
+        self.sources = {}
+        for name, (_, default, _) in FIELDS.items():
+            setattr(self, name, default)
+            self.sources[name] = 'default'
+        self.update(values, 'code')
+    
+    def update(self, values: Dict, source: str):
+        """Set the given settings (None values are skipped), then check them"""
+        for name, value in values.items():
+            if name not in FIELDS:
+                raise ValueError(f"configuração desconhecida: {name}")
+            if value is None:
+                continue
+            setattr(self, name, value)
+            self.sources[name] = source
+        self.check()
+    
+    def check(self):
+        """Raise ValueError on out-of-range settings"""
+        from storage import check_page_size
+        check_page_size(self.page_size)
+        if self.pragma_profile not in PRAGMA_PROFILES:
+            raise ValueError(f"perfil de PRAGMAs desconhecido: {self.pragma_profile} "
+                             f"(use {', '.join(PRAGMA_PROFILES)})")
+        if not self.db_path:
+            raise ValueError("db_path não pode ser vazio")
+        for name in ('busy_timeout', 'write_retries', 'mmap_mb', 'cache_mb'):
+            if getattr(self, name) is not None and getattr(self, name) < 0:
+                raise ValueError(f"{name} não pode ser negativo")
+        for name in ('statement_cache', 'job_workers', 'report_workers', 'store_workers'):
+            if getattr(self, name) is not None and getattr(self, name) < 1:
+                raise ValueError(f"{name} deve ser ao menos 1")
+    
+    def replace(self, **values) -> 'Settings':
+        """A copy with some settings changed (None restores the default's meaning, e.g. SQLite's own)"""
+        copy = Settings()
+        copy.__dict__.update({name: getattr(self, name) for name in FIELDS})
+        copy.sources = dict(self.sources)
+        for name, value in values.items():
+            if name not in FIELDS:
+                raise ValueError(f"configuração desconhecida: {name}")
+            setattr(copy, name, value)
+            copy.sources[name] = 'code'
+        copy.check()
+        return copy
+    
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in FIELDS}
+    
+    @property
+    def mmap_size(self) -> Optional[int]:
+        """Memory-mapped I/O in bytes (None: SQLite default)"""
+        return None if self.mmap_mb is None else self.mmap_mb * 1024 * 1024
+    
+    @property
+    def cache_size(self) -> Optional[int]:
+        """Page cache in bytes (None: SQLite default)"""
+        return None if self.cache_mb is None else self.cache_mb * 1024 * 1024
+    
+    @property
+    def pragmas(self) -> Dict[str, str]:
+        return PRAGMA_PROFILES[self.pragma_profile]
+    
+    def describe(self) -> str:
+        """One line per setting with its value and source"""
+        return '\n'.join(f"{name:<16} {'' if getattr(self, name) is None else getattr(self, name)!s:<40} "
+                         f"({SOURCE_LABELS[self.sources[name]]})" for name in FIELDS)
+
+def read_config_file(path: str) -> Dict:
+    """Settings in the [concessionaria] section of an INI file"""
+    parser = configparser.ConfigParser()
+    try:
+        with open(path, encoding='utf-8') as f:
+            parser.read_file(f)
+    except configparser.Error as e:
+        raise ValueError(f"arquivo de configuração inválido ({path}): {e}") from None
+    if not parser.has_section(CONFIG_SECTION):
+        return {}
+    values = {name: parse_value(name, text) for name, text in parser.items(CONFIG_SECTION)}
+    if values.get('db_path'):
+        values['db_path'] = os.path.join(os.path.dirname(os.path.abspath(path)), values['db_path'])
+    return values
+
+def read_environment(environ=None) -> Dict:
+    """Settings given as CONCESSIONARIA_<NAME> environment variables"""
+    environ = os.environ if environ is None else environ
+    return {name: parse_value(name, environ[ENV_PREFIX + name.upper()])
+            for name in FIELDS if ENV_PREFIX + name.upper() in environ}
+
+def load_settings(config_path: str = None, overrides: Dict = None, environ=None) -> Settings:
+    """Defaults, then the config file, the environment and ``overrides`` (command line flags).
+    
+    A missing config file is an error only when ``config_path`` or
+    $CONCESSIONARIA_CONFIG names it.
+    """
+    environ = os.environ if environ is None else environ
+    settings = Settings()
+    path = config_path or environ.get(ENV_PREFIX + 'CONFIG')
+    if path and not os.path.exists(path):
+        raise ValueError(f"arquivo de configuração não encontrado: {path}")
+    path = path or DEFAULT_CONFIG_PATH
+    if os.path.exists(path):
+        settings.update(read_config_file(path), 'file')
+    settings.update(read_environment(environ), 'env')
+    settings.update(overrides or {}, 'cli')
+    return settings
+
+_current: Optional[Settings] = None
+
+def get_settings() -> Settings:
+    """Settings in effect: those given to use_settings, else loaded on first call"""
+    global _current
+    if _current is None:
+        _current = load_settings()
+    return _current
+
+def use_settings(settings: Settings) -> Settings:
+    """Make ``settings`` the ones returned by get_settings() from now on"""
+    global _current
+    _current = settings
+    return settings
+
+def add_arguments(parser):
+    """Add --config and one flag per setting (--db-path, --cache-mb, ...) to an argparse parser"""
+    parser.add_argument('--config', metavar='ARQUIVO', help="arquivo de configuração (INI)")
+    for name, (kind, _, help_text) in FIELDS.items():
+        flag = '--' + name.replace('_', '-')
+        if name == 'pragma_profile':
+            parser.add_argument(flag, choices=tuple(PRAGMA_PROFILES), help=help_text)
+        else:
+            parser.add_argument(flag, type=kind, help=help_text)
+
+def from_arguments(options) -> Settings:
+    """load_settings with the flags added by add_arguments as overrides"""
+    return load_settings(options.config, {name: getattr(options, name) for name in FIELDS})
+
+def parse_sweep(specs: List[str]) -> Dict[str, List]:
+    """'name=value,value' strings -> {name: [values]}"""
+    axes = {}
+    for spec in specs:
+        name, separator, values = spec.partition('=')
+        name = name.strip().replace('-', '_')
+        if not separator or not values.strip():
+            raise ValueError(f"use NOME=VALOR,VALOR: {spec}")
+        axes[name] = [parse_value(name, value) for value in values.split(',')]
+    return axes
+
+def expand_sweep(base: Settings, axes: Dict[str, List]) -> List[Settings]:
+    """One Settings per combination of the axes' values, on top of ``base``"""
+    names = list(axes)
+    return [base.replace(**dict(zip(names, combination)))
+            for combination in itertools.product(*(axes[name] for name in names))]
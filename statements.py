@@ -0,0 +1,60 @@
+"""
+Registry of the UPDATE statements used by DatabaseManager.
+
+Only whitelisted columns can be updated, and every set of columns maps to
+one canonical SQL text (columns in table order, whatever order the caller
+passed them in). The same update therefore always reuses the same cached
+prepared statement, and caller-supplied names never reach the SQL text.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+# Columns that update methods may set, in table order
+UPDATABLE_COLUMNS = {
+    'vehicles': ('brand', 'model', 'year', 'color', 'price', 'mileage', 'fuel_type', 'transmission',
+                 'status'),
+    'customers': ('name', 'email', 'phone', 'address', 'cpf', 'name_key', 'phone_digits'),
+}
+
+# Column sets sent by the edit dialogs, which replace the whole editable row
+FULL_ROW_COLUMNS = {
+    'vehicles': ('brand', 'model', 'year', 'color', 'price', 'mileage', 'fuel_type', 'transmission'),
+    'customers': ('name', 'email', 'phone', 'address', 'cpf', 'name_key', 'phone_digits'),
+}
+
+_statements: Dict[Tuple[str, frozenset], Tuple[str, Tuple[str, ...]]] = {}
+
+def update_statement(table: str, columns: Iterable[str]) -> Tuple[str, Tuple[str, ...]]:
+    """Canonical ``UPDATE table SET ... WHERE id = ?`` for a set of columns.
+    
+    Returns the SQL and the column order its parameters follow. Raises
+    ValueError for a table or column that is not whitelisted.
+    """
+    key = (table, frozenset(columns))
+    statement = _statements.get(key)
+    if statement is None:
+        allowed = UPDATABLE_COLUMNS.get(table)
+        if allowed is None:
+            raise ValueError(f"tabela não atualizável: {table}")
+        unknown = sorted(key[1].difference(allowed))
+        if unknown:
+            raise ValueError(f"colunas inválidas para {table}: {', '.join(unknown)}")
+        if not key[1]:
+            raise ValueError("nenhuma coluna para atualizar")
+        ordered = tuple(column for column in allowed if column in key[1])
+        sql = f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in ordered)} WHERE id = ?"
+        statement = _statements[key] = (sql, ordered)
+    return statement
+
+# Full-row updates skip building the frozenset key: a keys-view comparison suffices
+_full_rows = {table: (update_statement(table, columns), frozenset(columns))
+              for table, columns in FULL_ROW_COLUMNS.items()}
+
+def update_parameters(table: str, row_id: int, values: Dict) -> Tuple[str, List]:
+    """SQL and parameters to set ``values`` on the row with id ``row_id``"""
+    full_row = _full_rows.get(table)
+    if full_row is not None and values.keys() == full_row[1]:
+        sql, columns = full_row[0]
+    else:
+        sql, columns = update_statement(table, values)
+    return sql, [values[column] for column in columns] + [row_id]
@@ -0,0 +1,131 @@
+"""
+Storage tuning: memory-mapped reads, page cache size and page layout.
+
+By default SQLite reads pages with read() into a small private cache
+(about 2 MB). With ``mmap_size`` set, up to that many bytes of the file
+are mapped into memory and read straight from the OS page cache, and
+``cache_size`` enlarges the private cache. Both are per connection
+(DatabaseManager applies them to every connection it opens).
+
+The page size is fixed when a database is created (``create_database``)
+and can only change by rewriting the file: ``vacuum_into`` writes a
+defragmented copy with the chosen page size, and ``relayout`` swaps such
+a copy in for the live database.
+
+Usage (from the project root):
+    python main.py storage                       # current layout and settings
+    python main.py --page-size 8192 storage --relayout
+    python -m scripts.benchmark_storage --vehicles 500000 --sales 300000
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+# Page sizes SQLite accepts: powers of two from 512 bytes to 64 KiB
+VALID_PAGE_SIZES = tuple(512 << shift for shift in range(8))
+
+# SQLite's defaults: no memory mapping and a 2000 KiB page cache
+DEFAULT_MMAP_SIZE = 0
+DEFAULT_CACHE_SIZE = 2000 * 1024
+
+def check_page_size(page_size: Optional[int]):
+    """Raise ValueError unless page_size is None or a valid SQLite page size"""
+    if page_size is not None and page_size not in VALID_PAGE_SIZES:
+        raise ValueError(f"tamanho de página inválido: {page_size} "
+                         f"(use {', '.join(str(size) for size in VALID_PAGE_SIZES)})")
+
+def apply_connection_settings(conn: sqlite3.Connection, mmap_size: int = None, cache_size: int = None):
+    """Set memory-mapped I/O and page cache size (both in bytes; None keeps SQLite's default)"""
+    if mmap_size is not None:
+        conn.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+    if cache_size is not None:
+        # A negative cache_size is a size in KiB rather than a number of pages
+        conn.execute(f'PRAGMA cache_size = {-max(1, int(cache_size) // 1024)}')
+
+def storage_info(db_path: str) -> Dict:
+    """Page size, page and free page counts, file size and journal mode of a database"""
+    conn = sqlite3.connect(f'file:{quote(os.path.abspath(db_path))}?mode=ro', uri=True)
+    try:
+        info = {name: conn.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('page_size', 'page_count', 'freelist_count', 'journal_mode')}
+    finally:
+        conn.close()
+    info['file_bytes'] = os.path.getsize(db_path)
+    return info
+
+def vacuum_into(src_path: str, dest_path: str, page_size: int = None) -> Dict:
+    """Write a defragmented copy of src_path to dest_path, optionally with a new page size.
+    
+    VACUUM INTO reads one consistent snapshot of the source, so it can run
+    while the database is in use; tables and indexes come out stored in
+    contiguous pages. Returns the page size, size in bytes and seconds taken.
+    """
+    check_page_size(page_size)
+    if os.path.exists(dest_path):
+        raise FileExistsError(f"arquivo já existe: {dest_path}")
+    start = time.perf_counter()
+    conn = sqlite3.connect(src_path)
+    try:
+        if page_size:
+            # Pending page size of the main schema, used by the copy
+            conn.execute(f'PRAGMA page_size = {page_size}')
+        conn.execute('VACUUM INTO ?', (dest_path,))
+    finally:
+        conn.close()
+    info = storage_info(dest_path)
+    return {'page_size': info['page_size'], 'bytes': info['file_bytes'],
+            'seconds': time.perf_counter() - start}
+
+def relayout(db_path: str, page_size: int = None, backup_dir: str = None,
+             safety_snapshot: bool = True) -> Dict:
+    """Rewrite the live database with vacuum_into and copy the result back in place.
+    
+    The copy back goes through the backup API (see backup.py), so open
+    connections see either the old or the new file. Unless disabled, a
+    snapshot of the current database is taken first. Returns the
+    vacuum_into statistics plus ``safety_snapshot`` (its path or None).
+    """
+    import backup
+    
+    check_page_size(page_size)
+    safety_path = None
+    if safety_snapshot:
+        safety_path = backup.create_snapshot(db_path, backup_dir or backup.DEFAULT_BACKUP_DIR)
+    
+    directory = os.path.dirname(os.path.abspath(db_path))
+    fd, tmp_path = tempfile.mkstemp(suffix='.db', dir=directory)
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        stats = vacuum_into(db_path, tmp_path, page_size)
+        problems = backup.check_integrity(tmp_path)
+        if problems:
+            raise backup.BackupError(f"cópia reorganizada falhou na verificação: {problems[:5]}")
+        backup.backup_database(tmp_path, db_path, step_sleep=0)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    stats['safety_snapshot'] = safety_path
+    return stats
+
+def evict_from_os_cache(paths: List[str]):
+    """Ask the OS to drop cached pages of the given files (for cold-read measurements).
+    
+    Only clean pages are dropped and no privileges are needed; a no-op
+    where posix_fadvise is unavailable.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
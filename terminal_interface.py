@@ -1,16 +1,37 @@
-import os
+import sqlite3
 import sys
 from typing import Optional
 from database import DatabaseManager
+from offline import OFFLINE_NOTICE
+from validation import FUEL_TYPES, PAYMENT_METHODS, SCHEMAS, TRANSMISSIONS, VEHICLE_STATUSES
 
 class TerminalInterface:
-    def __init__(self):
-        self.db = DatabaseManager()
+    # Columns shown by the paged listings, keyed by paging.SOURCES name
+    LISTING_COLUMNS = {
+        'vehicles': ('id', 'brand', 'model', 'year', 'color', 'price', 'mileage', 'status'),
+        'customers': ('id', 'name', 'email', 'phone', 'cpf'),
+        'sales': ('id', 'sale_date', 'customer_name', 'brand', 'model', 'year', 'sale_price', 'payment_method',
+                  'employee_name'),
+        'employees': ('id', 'name', 'email', 'position', 'salary'),
+    }
+    MAX_COLUMN_WIDTH = 28
+    
+    # Revenue report dimensions as typed by the user -> reports.REPORT_DIMENSIONS key
+    REPORT_DIMENSION_LABELS = {'marca': 'brand', 'modelo': 'model', 'ano': 'year',
+                               'mes': 'month', 'pagamento': 'payment_method'}
+    
+    def __init__(self, db: Optional[DatabaseManager] = None):
+        self.db = db or DatabaseManager()
         self.running = True
+        self.job_runner = None
+        # Created on first use, then only refreshed when sales changed
+        self.pricing = None
     
     def clear_screen(self):
         """Clear the terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        # ANSI escapes instead of os.system('clear'), which forks a shell each time
+        sys.stdout.write("\033[2J\033[H")
+        sys.stdout.flush()
     
     def print_header(self, title: str):
         """Print a formatted header"""
@@ -28,8 +49,12 @@ class TerminalInterface:
         print("0. Voltar/Sair")
         print()
     
-    def get_input(self, prompt: str, input_type: type = str, required: bool = True):
-        """Get user input with validation"""
+    def get_input(self, prompt: str, input_type: type = str, required: bool = True, normalize=None):
+        """Get user input with validation.
+        
+        ``normalize`` (a validation.SCHEMAS normalizer) canonicalizes the
+        value; while it raises ValueError the question is asked again.
+        """
         while True:
             try:
                 value = input(f"{prompt}: ").strip()
@@ -39,24 +64,143 @@ class TerminalInterface:
                 if not value and not required:
                     return None
                 if input_type == int:
-                    return int(value)
+                    value = int(value)
                 elif input_type == float:
-                    return float(value)
-                return value
+                    value = float(value)
             except ValueError:
                 print(f"Por favor, insira um valor válido ({input_type.__name__})")
+                continue
             except KeyboardInterrupt:
                 print("\nOperação cancelada.")
                 return None
+            if normalize is None:
+                return value
+            try:
+                return normalize(value)
+            except ValueError as e:
+                print(f"Erro: {e}")
     
     def wait_for_enter(self):
         """Wait for user to press Enter"""
         input("\nPressione Enter para continuar...")
     
+    @staticmethod
+    def print_offline_notice(row_id: int):
+        """Explain a provisional (negative) id returned while the database is unreachable"""
+        if row_id is not None and row_id < 0:
+            print(OFFLINE_NOTICE)
+    
+    @staticmethod
+    def format_cell(value, value_type: type) -> str:
+        if value is None:
+            return '-'
+        if value_type is float:
+            return f"R${value:,.2f}"
+        return str(value)
+    
+    def render_page(self, source, rows: list, columns: tuple) -> list:
+        """Table lines for one page; column widths are fitted to this page only"""
+        definitions = source.columns
+        cells = [[self.format_cell(row[column], definitions[column][2]) for column in columns] for row in rows]
+        headers = []
+        for column in columns:
+            marker = (' v' if source.descending else ' ^') if column == source.sort else ''
+            headers.append(definitions[column][1] + marker)
+        widths = [min(self.MAX_COLUMN_WIDTH, max([len(header)] + [len(row[i]) for row in cells]))
+                  for i, header in enumerate(headers)]
+        numeric = [definitions[column][2] is not str for column in columns]
+        
+        def line(values):
+            return ' '.join(value[:width].rjust(width) if right else value[:width].ljust(width)
+                            for value, width, right in zip(values, widths, numeric))
+        
+        return [line(headers), '-' * (sum(widths) + len(widths) - 1)] + [line(row) for row in cells]
+    
+    def browse(self, source_name: str, title: str, empty_message: str):
+        """Interactive pager over a listing: one page is read from the database at a time"""
+        from paging import PagedSource
+        
+        source = PagedSource(self.db, source_name)
+        columns = self.LISTING_COLUMNS[source_name]
+        labels = ', '.join(source.columns[column][1].lower() for column in columns)
+        number = 0
+        message = ''
+        while True:
+            rows = source.page(number)
+            if not rows and number > 0:
+                # Rows were removed since the count was taken
+                source.invalidate()
+                number = min(number - 1, source.page_count - 1)
+                continue
+            
+            self.clear_screen()
+            self.print_header(title)
+            lines = self.render_page(source, rows, columns) if rows else [empty_message]
+            lines.append('')
+            lines.append(f"Página {number + 1} de {source.page_count} ({source.count()} registro(s))"
+                         + (f" | filtro: {source.filter_text}" if source.filter_text else ''))
+            if message:
+                lines.append(message)
+            lines.append("[Enter/n] próxima  [p] anterior  [g N] ir para página  "
+                         "[o coluna] ordenar  [f filtro] filtrar  [q] voltar")
+            # One write per screen instead of one print per row
+            sys.stdout.write('\n'.join(lines) + '\n')
+            sys.stdout.flush()
+            message = ''
+            
+            try:
+                command = input("> ").strip()
+            except (KeyboardInterrupt, EOFError):
+                print()
+                return
+            action, _, argument = command.partition(' ')
+            action = action.lower()
+            argument = argument.strip()
+            
+            if action in ('q', '0'):
+                return
+            elif action in ('', 'n'):
+                if number + 1 < source.page_count:
+                    number += 1
+                else:
+                    message = "Esta é a última página."
+            elif action == 'p':
+                if number > 0:
+                    number -= 1
+                else:
+                    message = "Esta é a primeira página."
+            elif action == 'g' or action.isdigit():
+                target = argument if action == 'g' else action
+                if target.isdigit() and 1 <= int(target) <= source.page_count:
+                    number = int(target) - 1
+                else:
+                    message = f"Página inválida (1 a {source.page_count})."
+            elif action == 'o':
+                try:
+                    source.set_sort(argument)
+                    number = 0
+                except ValueError as e:
+                    message = f"{e}. Colunas: {labels}"
+            elif action == 'f':
+                try:
+                    source.set_filter(argument)
+                    number = 0
+                except ValueError as e:
+                    message = f"{e}. Exemplo: marca=Honda preço<60000 modelo~civic"
+            else:
+                message = "Comando inválido."
+    
     def run(self):
-        """Main application loop"""
-        while self.running:
-            self.main_menu()
+        """Main application loop; background jobs are run while it is open"""
+        from jobs import JobRunner
+        
+        self.job_runner = JobRunner(self.db)
+        self.job_runner.start()
+        try:
+            while self.running:
+                self.main_menu()
+        finally:
+            self.job_runner.stop()
     
     def main_menu(self):
         """Display main menu"""
@@ -66,10 +210,12 @@ class TerminalInterface:
             "Gerenciar Vendas",
             "Gerenciar Funcionários",
             "Relatórios",
-            "Buscar Veículos"
+            "Buscar Veículos",
+            "Tarefas em Segundo Plano"
         ]
         
         self.print_menu("SISTEMA DE CONCESSIONÁRIA", options)
+        self.print_job_status()
         
         choice = self.get_input("Escolha uma opção", int, False)
         
@@ -85,6 +231,8 @@ class TerminalInterface:
             self.reports_menu()
         elif choice == 6:
             self.search_vehicles()
+        elif choice == 7:
+            self.jobs_menu()
         elif choice == 0:
             self.running = False
             print("Obrigado por usar o Sistema de Concessionária!")
@@ -124,18 +272,22 @@ class TerminalInterface:
         self.clear_screen()
         self.print_header("ADICIONAR VEÍCULO")
         
+        fields = SCHEMAS['vehicles']
         brand = self.get_input("Marca")
         model = self.get_input("Modelo")
-        year = self.get_input("Ano", int)
+        year = self.get_input("Ano", int, normalize=fields['year'])
         color = self.get_input("Cor")
-        price = self.get_input("Preço", float)
-        mileage = self.get_input("Quilometragem", int, False) or 0
-        fuel_type = self.get_input("Tipo de Combustível (Gasoline/Flex/Diesel)", str, False) or "Gasoline"
-        transmission = self.get_input("Transmissão (Manual/Automatic)", str, False) or "Manual"
+        price = self.get_input("Preço", float, normalize=fields['price'])
+        mileage = self.get_input("Quilometragem", int, False, fields['mileage']) or 0
+        fuel_type = self.get_input(f"Tipo de Combustível ({'/'.join(FUEL_TYPES)})", str, False,
+                                   fields['fuel_type']) or "Gasoline"
+        transmission = self.get_input(f"Transmissão ({'/'.join(TRANSMISSIONS)})", str, False,
+                                      fields['transmission']) or "Manual"
         
         try:
             vehicle_id = self.db.add_vehicle(brand, model, year, color, price, mileage, fuel_type, transmission)
             print(f"Veículo adicionado com sucesso! ID: {vehicle_id}")
+            self.print_offline_notice(vehicle_id)
         except Exception as e:
             print(f"Erro ao adicionar veículo: {e}")
         
@@ -143,21 +295,7 @@ class TerminalInterface:
     
     def list_vehicles(self):
         """List all vehicles"""
-        self.clear_screen()
-        self.print_header("LISTA DE VEÍCULOS")
-        
-        vehicles = self.db.get_vehicles()
-        
-        if not vehicles:
-            print("Nenhum veículo encontrado.")
-        else:
-            print(f"{'ID':<5} {'Marca':<12} {'Modelo':<15} {'Ano':<6} {'Cor':<10} {'Preço':<12} {'Status':<10}")
-            print("-" * 80)
-            for vehicle in vehicles:
-                print(f"{vehicle['id']:<5} {vehicle['brand']:<12} {vehicle['model']:<15} "
-                      f"{vehicle['year']:<6} {vehicle['color']:<10} R${vehicle['price']:<11.2f} {vehicle['status']:<10}")
-        
-        self.wait_for_enter()
+        self.browse('vehicles', "LISTA DE VEÍCULOS", "Nenhum veículo encontrado.")
     
     def update_vehicle(self):
         """Update vehicle information"""
@@ -183,14 +321,11 @@ class TerminalInterface:
         model = self.get_input("Novo modelo", str, False)
         if model: updates['model'] = model
         
-        price_str = self.get_input("Novo preço", str, False)
-        if price_str:
-            try:
-                updates['price'] = float(price_str)
-            except ValueError:
-                print("Preço inválido!")
+        price = self.get_input("Novo preço", float, False, SCHEMAS['vehicles']['price'])
+        if price is not None: updates['price'] = price
         
-        status = self.get_input("Novo status (Available/Sold)", str, False)
+        status = self.get_input(f"Novo status ({'/'.join(VEHICLE_STATUSES)})", str, False,
+                                SCHEMAS['vehicles']['status'])
         if status: updates['status'] = status
         
         if updates:
@@ -236,7 +371,9 @@ class TerminalInterface:
                 "Adicionar Cliente",
                 "Listar Clientes",
                 "Atualizar Cliente",
-                "Remover Cliente"
+                "Remover Cliente",
+                "Buscar Cliente",
+                "Histórico de Compras"
             ]
             
             self.print_menu("GERENCIAR CLIENTES", options)
@@ -250,6 +387,10 @@ class TerminalInterface:
                 self.update_customer()
             elif choice == 4:
                 self.delete_customer()
+            elif choice == 5:
+                self.search_customers()
+            elif choice == 6:
+                self.customer_history()
             elif choice == 0:
                 break
             else:
@@ -261,15 +402,17 @@ class TerminalInterface:
         self.clear_screen()
         self.print_header("ADICIONAR CLIENTE")
         
+        fields = SCHEMAS['customers']
         name = self.get_input("Nome")
-        email = self.get_input("Email")
-        phone = self.get_input("Telefone")
+        email = self.get_input("Email", normalize=fields['email'])
+        phone = self.get_input("Telefone", normalize=fields['phone'])
         address = self.get_input("Endereço", str, False) or ""
-        cpf = self.get_input("CPF", str, False) or ""
+        cpf = self.get_input("CPF", str, False, fields['cpf'])
         
         try:
             customer_id = self.db.add_customer(name, email, phone, address, cpf)
             print(f"Cliente adicionado com sucesso! ID: {customer_id}")
+            self.print_offline_notice(customer_id)
         except Exception as e:
             print(f"Erro ao adicionar cliente: {e}")
         
@@ -277,20 +420,7 @@ class TerminalInterface:
     
     def list_customers(self):
         """List all customers"""
-        self.clear_screen()
-        self.print_header("LISTA DE CLIENTES")
-        
-        customers = self.db.get_customers()
-        
-        if not customers:
-            print("Nenhum cliente encontrado.")
-        else:
-            print(f"{'ID':<5} {'Nome':<20} {'Email':<25} {'Telefone':<15}")
-            print("-" * 70)
-            for customer in customers:
-                print(f"{customer['id']:<5} {customer['name']:<20} {customer['email']:<25} {customer['phone']:<15}")
-        
-        self.wait_for_enter()
+        self.browse('customers', "LISTA DE CLIENTES", "Nenhum cliente encontrado.")
     
     def update_customer(self):
         """Update customer information"""
@@ -313,10 +443,10 @@ class TerminalInterface:
         name = self.get_input("Novo nome", str, False)
         if name: updates['name'] = name
         
-        email = self.get_input("Novo email", str, False)
+        email = self.get_input("Novo email", str, False, SCHEMAS['customers']['email'])
         if email: updates['email'] = email
         
-        phone = self.get_input("Novo telefone", str, False)
+        phone = self.get_input("Novo telefone", str, False, SCHEMAS['customers']['phone'])
         if phone: updates['phone'] = phone
         
         if updates:
@@ -355,6 +485,73 @@ class TerminalInterface:
         
         self.wait_for_enter()
     
+    def search_customers(self):
+        """Search customers by name, CPF, email or phone"""
+        self.clear_screen()
+        self.print_header("BUSCAR CLIENTE")
+        
+        print("1. Nome (início do nome)")
+        print("2. CPF")
+        print("3. Email")
+        print("4. Telefone")
+        print()
+        
+        modes = {1: 'name_prefix', 2: 'cpf', 3: 'email', 4: 'phone'}
+        mode = self.get_input("Buscar por", int)
+        if mode not in modes:
+            print("Opção inválida!")
+            self.wait_for_enter()
+            return
+        
+        term = self.get_input("Termo de busca")
+        if not term:
+            return
+        customers = self.db.find_customers(**{modes[mode]: term})
+        
+        if not customers:
+            print("Nenhum cliente encontrado.")
+        else:
+            print(f"{'ID':<5} {'Nome':<20} {'Email':<25} {'Telefone':<15} {'CPF':<14}")
+            print("-" * 85)
+            for customer in customers:
+                print(f"{customer['id']:<5} {customer['name']:<20} {customer['email']:<25} "
+                      f"{customer['phone']:<15} {customer['cpf'] or '':<14}")
+        
+        self.wait_for_enter()
+    
+    def customer_history(self):
+        """Show a customer's purchase history and lifetime statistics"""
+        self.clear_screen()
+        self.print_header("HISTÓRICO DE COMPRAS")
+        
+        customer_id = self.get_input("ID do cliente", int)
+        history = self.db.get_customer_history(customer_id, include_archive=True)
+        
+        if not history:
+            print("Cliente não encontrado!")
+            self.wait_for_enter()
+            return
+        
+        customer = history['customer']
+        stats = history['stats']
+        print(f"Cliente: {customer['name']} - {customer['email']}")
+        print(f"Total de Compras: {stats['purchase_count']}")
+        print(f"Valor Total Gasto: R${stats['lifetime_spend'] or 0:.2f}")
+        print(f"Última Compra: {stats['last_purchase_date'] or 'N/A'}")
+        print()
+        
+        if not history['sales']:
+            print("Nenhuma compra registrada.")
+        else:
+            print(f"{'Venda':<7} {'Data':<12} {'Veículo':<30} {'Preço':<14} {'Pagamento':<15}")
+            print("-" * 80)
+            for sale in history['sales']:
+                vehicle_info = f"{sale['brand']} {sale['model']} {sale['year']}"
+                print(f"{sale['id']:<7} {sale['sale_date'][:10]:<12} {vehicle_info:<30} "
+                      f"R${sale['sale_price']:<12.2f} {sale['payment_method']:<15}")
+        
+        self.wait_for_enter()
+    
     def sales_menu(self):
         """Sales management menu"""
         while True:
@@ -376,6 +573,23 @@ class TerminalInterface:
                 print("Opção inválida!")
                 self.wait_for_enter()
     
+    def pricing_engine(self):
+        """The interface's pricing engine, up to date with the recorded sales"""
+        if self.pricing is None:
+            from pricing import PricingEngine
+            self.pricing = PricingEngine(self.db)
+        self.pricing.refresh_if_stale()
+        return self.pricing
+    
+    def suggest_price(self, vehicle):
+        """Model-suggested sale price, or None if no suggestion is available"""
+        try:
+            return self.pricing_engine().suggest_price(vehicle)
+        except (sqlite3.Error, OSError) as e:
+            # A suggestion is a convenience; never block a sale on it
+            print(f"Aviso: sugestão de preço indisponível ({e})")
+            return None
+    
     def add_sale(self):
         """Add a new sale"""
         self.clear_screen()
@@ -419,13 +633,34 @@ class TerminalInterface:
             self.wait_for_enter()
             return
         
-        sale_price = self.get_input(f"Preço de venda (sugerido: R${vehicle['price']:.2f})", float)
-        payment_method = self.get_input("Método de pagamento", str, False) or "Cash"
+        # Salesperson credited with the sale (optional)
+        employees = {employee['id']: employee for employee in self.db.get_employees()}
+        employee_id = None
+        if employees:
+            print("\nVendedores:")
+            for employee in employees.values():
+                print(f"ID {employee['id']}: {employee['name']} - {employee['position']}")
+            while True:
+                employee_id = self.get_input("ID do vendedor (Enter para nenhum)", int, False)
+                if employee_id is None or employee_id in employees:
+                    break
+                print("Vendedor não encontrado!")
+        
+        suggested = self.suggest_price(vehicle)
+        if suggested is not None:
+            prompt = f"Preço de venda (tabela: R${vehicle['price']:.2f}, sugerido: R${suggested:.2f})"
+        else:
+            prompt = f"Preço de venda (sugerido: R${vehicle['price']:.2f})"
+        sale_price = self.get_input(prompt, float, normalize=SCHEMAS['sales']['sale_price'])
+        payment_method = self.get_input(f"Método de pagamento ({'/'.join(PAYMENT_METHODS)})", str, False,
+                                        SCHEMAS['sales']['payment_method']) or "Cash"
         notes = self.get_input("Observações", str, False) or ""
         
         try:
-            sale_id = self.db.add_sale(customer_id, vehicle_id, sale_price, payment_method, notes)
+            sale_id = self.db.add_sale(customer_id, vehicle_id, sale_price, payment_method, notes,
+                                       employee_id=employee_id)
             print(f"Venda registrada com sucesso! ID: {sale_id}")
+            self.print_offline_notice(sale_id)
         except Exception as e:
             print(f"Erro ao registrar venda: {e}")
         
@@ -433,33 +668,16 @@ class TerminalInterface:
     
     def list_sales(self):
         """List all sales"""
-        self.clear_screen()
-        self.print_header("LISTA DE VENDAS")
-        
-        sales = self.db.get_sales()
-        
-        if not sales:
-            print("Nenhuma venda encontrada.")
-        else:
-            for sale in sales:
-                print(f"Venda ID: {sale['id']}")
-                print(f"Cliente: {sale['customer_name']} ({sale['customer_email']})")
-                print(f"Veículo: {sale['brand']} {sale['model']} {sale['year']} - {sale['color']}")
-                print(f"Preço: R${sale['sale_price']:.2f}")
-                print(f"Data: {sale['sale_date']}")
-                print(f"Pagamento: {sale['payment_method']}")
-                if sale['notes']:
-                    print(f"Observações: {sale['notes']}")
-                print("-" * 50)
-        
-        self.wait_for_enter()
+        self.browse('sales', "LISTA DE VENDAS", "Nenhuma venda encontrada.")
     
     def employee_menu(self):
         """Employee management menu"""
         while True:
             options = [
                 "Adicionar Funcionário",
-                "Listar Funcionários"
+                "Listar Funcionários",
+                "Ranking de Vendedores",
+                "Regras de Comissão"
             ]
             
             self.print_menu("GERENCIAR FUNCIONÁRIOS", options)
@@ -469,6 +687,10 @@ class TerminalInterface:
                 self.add_employee()
             elif choice == 2:
                 self.list_employees()
+            elif choice == 3:
+                self.sales_leaderboard()
+            elif choice == 4:
+                self.commission_rules()
             elif choice == 0:
                 break
             else:
@@ -481,10 +703,9 @@ class TerminalInterface:
         self.print_header("ADICIONAR FUNCIONÁRIO")
         
         name = self.get_input("Nome")
-        email = self.get_input("Email")
+        email = self.get_input("Email", normalize=SCHEMAS['employees']['email'])
         position = self.get_input("Cargo")
-        salary_str = self.get_input("Salário", str, False)
-        salary = float(salary_str) if salary_str else 0.0
+        salary = self.get_input("Salário", float, False, SCHEMAS['employees']['salary']) or 0.0
         
         try:
             employee_id = self.db.add_employee(name, email, position, salary)
@@ -496,27 +717,107 @@ class TerminalInterface:
     
     def list_employees(self):
         """List all employees"""
-        self.clear_screen()
-        self.print_header("LISTA DE FUNCIONÁRIOS")
+        self.browse('employees', "LISTA DE FUNCIONÁRIOS", "Nenhum funcionário encontrado.")
+    
+    def sales_leaderboard(self):
+        """Top sellers of a month or year, read from the per-employee aggregates"""
+        from datetime import datetime
         
-        employees = self.db.get_employees()
+        self.clear_screen()
+        self.print_header("RANKING DE VENDEDORES")
+        
+        current = datetime.now().strftime('%Y-%m')
+        period = self.get_input(f"Período (AAAA-MM ou AAAA, padrão: {current})", str, False) or current
+        metrics = {'receita': 'revenue', 'unidades': 'units', 'comissao': 'commission'}
+        answer = self.get_input("Ordenar por (receita, unidades, comissao; padrão: receita)", str, False)
+        metric = metrics.get((answer or 'receita').strip().lower())
+        if metric is None:
+            print("Critério inválido!")
+            self.wait_for_enter()
+            return
         
-        if not employees:
-            print("Nenhum funcionário encontrado.")
+        leaders = self.db.get_leaderboard(period, metric)
+        if not leaders:
+            print(f"\nNenhuma venda atribuída a vendedores em {period}.")
         else:
-            print(f"{'ID':<5} {'Nome':<20} {'Email':<25} {'Cargo':<15} {'Salário':<10}")
-            print("-" * 80)
-            for employee in employees:
-                salary_str = f"R${employee['salary']:.2f}" if employee['salary'] else "N/A"
-                print(f"{employee['id']:<5} {employee['name']:<20} {employee['email']:<25} "
-                      f"{employee['position']:<15} {salary_str:<10}")
+            print(f"\n{'#':<3} {'Vendedor':<25} {'Cargo':<15} {'Vendas':>6} {'Receita':>16} {'Comissão':>13}")
+            print("-" * 83)
+            for position, leader in enumerate(leaders, 1):
+                print(f"{position:<3} {leader['name'][:25]:<25} {leader['position'][:15]:<15} {leader['units']:>6} "
+                      f"R${leader['revenue']:>14,.2f} R${leader['commission']:>11,.2f}")
         
         self.wait_for_enter()
     
+    def commission_rules(self):
+        """List, add and remove commission rules"""
+        while True:
+            self.clear_screen()
+            self.print_header("REGRAS DE COMISSÃO")
+            
+            rules = self.db.get_commission_rules()
+            print(f"{'ID':<5} {'Cargo':<20} {'Venda mínima':>15} {'Taxa':>8}")
+            print("-" * 51)
+            for rule in rules:
+                print(f"{rule['id']:<5} {(rule['position'] or 'Todos'):<20} "
+                      f"R${rule['min_sale_price']:>13,.2f} {rule['rate'] * 100:>7.2f}%")
+            print("\nVale a regra do cargo do vendedor com a maior venda mínima atingida;")
+            print("sem regra do cargo, vale a regra geral. Novas regras valem para vendas futuras.")
+            print("\n1. Adicionar regra  2. Remover regra  0. Voltar")
+            
+            choice = self.get_input("Escolha uma opção", int, False)
+            if choice == 1:
+                position = self.get_input("Cargo (Enter para todos)", str, False)
+                min_sale_price = self.get_input("Venda mínima (Enter para 0)", float, False) or 0.0
+                rate = self.get_input("Taxa em %", float)
+                if rate is None:
+                    # Cancelled with Ctrl+C
+                    continue
+                try:
+                    self.db.add_commission_rule(rate / 100, min_sale_price, position)
+                except ValueError as e:
+                    print(f"Erro: {e}")
+                    self.wait_for_enter()
+            elif choice == 2:
+                rule_id = self.get_input("ID da regra", int)
+                if rule_id is None:
+                    continue
+                if not self.db.delete_commission_rule(rule_id):
+                    print("Regra não encontrada!")
+                    self.wait_for_enter()
+            elif choice == 0 or choice is None:
+                break
+    
     def reports_menu(self):
         """Reports menu"""
+        while True:
+            options = [
+                "Resumo Geral",
+                "Desempenho de Consultas",
+                "Receita por Marca/Modelo/Mês/Pagamento",
+                "Avaliação do Estoque"
+            ]
+            
+            self.print_menu("RELATÓRIOS", options)
+            choice = self.get_input("Escolha uma opção", int, False)
+            
+            if choice == 1:
+                self.summary_report()
+            elif choice == 2:
+                self.query_performance_report()
+            elif choice == 3:
+                self.revenue_report()
+            elif choice == 4:
+                self.inventory_valuation_report()
+            elif choice == 0:
+                break
+            else:
+                print("Opção inválida!")
+                self.wait_for_enter()
+    
+    def summary_report(self):
+        """Show sales summary"""
         self.clear_screen()
-        self.print_header("RELATÓRIOS")
+        self.print_header("RESUMO GERAL")
         
         summary = self.db.get_sales_summary()
         
@@ -527,6 +828,251 @@ class TerminalInterface:
         
         self.wait_for_enter()
     
+    def revenue_report(self):
+        """Revenue report computed in parallel worker processes"""
+        from reports import ReportCancelled, run_report
+        
+        self.clear_screen()
+        self.print_header("RECEITA POR DIMENSÃO")
+        
+        options = self.ask_report_options()
+        if options is None:
+            return
+        dimensions, include_archive = options
+        
+        def show_progress(done, total):
+            sys.stdout.write(f"\rProcessando partições: {done}/{total} ({done * 100 // total}%)")
+            sys.stdout.flush()
+        
+        print("Pressione Ctrl+C para cancelar.")
+        try:
+            report = run_report(self.db.db_path, dimensions, progress=show_progress,
+                                include_archive=include_archive, mmap_size=self.db.mmap_size)
+        except ReportCancelled:
+            print("\nRelatório cancelado.")
+            self.wait_for_enter()
+            return
+        print()
+        
+        self.print_revenue_table(report)
+        self.wait_for_enter()
+    
+    def ask_report_options(self):
+        """Ask the revenue report dimensions and whether to include archived sales (None if invalid)"""
+        from reports import REPORT_DIMENSIONS
+        
+        labels = self.REPORT_DIMENSION_LABELS
+        print(f"Dimensões disponíveis: {', '.join(labels)}")
+        answer = self.get_input("Agrupar por (separadas por vírgula, padrão: marca)", str, False) or 'marca'
+        dimensions = [labels.get(name.strip().lower(), name.strip()) for name in answer.split(',') if name.strip()]
+        unknown = [name for name in dimensions if name not in REPORT_DIMENSIONS]
+        if unknown:
+            print(f"Dimensão inválida: {', '.join(unknown)}")
+            self.wait_for_enter()
+            return None
+        
+        answer = self.get_input("Incluir vendas arquivadas? (s/N)", str, False)
+        return dimensions, bool(answer) and answer.lower() == 's'
+    
+    def print_revenue_table(self, report: dict):
+        """Print the rows of a revenue report and its run statistics"""
+        labels = self.REPORT_DIMENSION_LABELS
+        dimensions = report['dimensions']
+        headers = [name for name, column in labels.items() if column in dimensions]
+        headers.sort(key=lambda name: dimensions.index(labels[name]))
+        print(" ".join(f"{name.capitalize():<15}" for name in headers) +
+              f"{'Vendas':>8} {'Receita':>16} {'Ticket Médio':>14}")
+        print("-" * (16 * len(headers) + 40))
+        for row in report['rows']:
+            print(" ".join(f"{str(row[column])[:15]:<15}" for column in dimensions) +
+                  f"{row['sales']:>8} R${row['revenue']:>14,.2f} R${row['average']:>12,.2f}")
+        print(f"\n{len(report['rows'])} grupo(s), {report['partitions']} partições em "
+              f"{report['workers']} processo(s), {report['seconds']:.2f} s")
+    
+    def print_job_status(self):
+        """One line about queued and running background jobs, if there are any"""
+        from jobs import JobQueue
+        
+        counts = JobQueue(self.db).counts()
+        if counts['running'] or counts['queued']:
+            print(f"Tarefas em segundo plano: {counts['running']} em execução, {counts['queued']} na fila\n")
+    
+    def jobs_menu(self):
+        """Submit background jobs and follow their progress"""
+        from jobs import JOB_TYPES, STATUS_LABELS, JobQueue
+        
+        queue = JobQueue(self.db)
+        while True:
+            self.clear_screen()
+            self.print_header("TAREFAS EM SEGUNDO PLANO")
+            
+            recent = queue.list(limit=15)
+            if recent:
+                print(f"{'ID':<6} {'Tipo':<24} {'Status':<11} {'Progresso':>9}  {'Criada em':<19}  Situação")
+                print("-" * 100)
+                for job in recent:
+                    label = JOB_TYPES[job['kind']][1] if job['kind'] in JOB_TYPES else job['kind']
+                    print(f"{job['id']:<6} {label[:24]:<24} {STATUS_LABELS[job['status']]:<11} "
+                          f"{job['progress'] * 100:>8.0f}%  {job['created_at']:<19}  "
+                          f"{(job['error'] or job['message'] or '')[:40]}")
+            else:
+                print("Nenhuma tarefa.")
+            
+            print("\n1. Backup  2. Arquivar registros antigos  3. Relatório de receita")
+            print("4. Atualizar modelo de preços  5. Exportar listagem (CSV)")
+            print("6. Detalhes  7. Cancelar  8. Repetir  Enter. Atualizar lista  0. Voltar")
+            
+            choice = self.get_input("Escolha uma opção", int, False)
+            job_id = None
+            if choice == 1:
+                job_id = queue.submit('backup')
+            elif choice == 2:
+                months = self.get_input("Arquivar vendas com mais de quantos meses? (padrão 24)", int, False)
+                job_id = queue.submit('archive', {'months': months or 24})
+            elif choice == 3:
+                options = self.ask_report_options()
+                if options:
+                    job_id = queue.submit('report', {'dimensions': options[0], 'include_archive': options[1]})
+            elif choice == 4:
+                job_id = queue.submit('pricing')
+            elif choice == 5:
+                job_id = self.submit_export(queue)
+            elif choice == 6:
+                self.show_job(queue, self.get_input("ID da tarefa", int))
+            elif choice == 7:
+                if not queue.cancel(self.get_input("ID da tarefa", int)):
+                    print("Tarefa não encontrada ou já terminada.")
+                    self.wait_for_enter()
+            elif choice == 8:
+                if not queue.retry(self.get_input("ID da tarefa", int)):
+                    print("Só tarefas que falharam ou foram canceladas podem ser repetidas.")
+                    self.wait_for_enter()
+            elif choice == 0:
+                break
+            
+            if job_id:
+                print(f"Tarefa {job_id} enfileirada; acompanhe o andamento nesta tela.")
+                self.wait_for_enter()
+    
+    def submit_export(self, queue) -> Optional[int]:
+        """Ask which listing to export and where; returns the queued job id"""
+        import os
+        from jobs import DEFAULT_EXPORT_DIR
+        from paging import parse_filter
+        
+        sources = {'1': ('vehicles', 'veiculos'), '2': ('customers', 'clientes'),
+                   '3': ('sales', 'vendas'), '4': ('employees', 'funcionarios')}
+        print("Listagem: 1. Veículos  2. Clientes  3. Vendas  4. Funcionários")
+        choice = self.get_input("Escolha a listagem", str)
+        if choice not in sources:
+            print("Opção inválida!")
+            self.wait_for_enter()
+            return None
+        source, name = sources[choice]
+        filter_text = self.get_input("Filtro (ex.: marca=Honda preço<60000, Enter para todos)", str, False) or ''
+        try:
+            parse_filter(source, filter_text)
+        except ValueError as e:
+            print(f"Erro: {e}")
+            self.wait_for_enter()
+            return None
+        default_path = os.path.join(DEFAULT_EXPORT_DIR, f"{name}.csv")
+        path = self.get_input(f"Arquivo (Enter para {default_path})", str, False) or default_path
+        return queue.submit('export', {'source': source, 'path': os.path.abspath(path), 'filter': filter_text})
+    
+    def show_job(self, queue, job_id: int):
+        """Parameters, outcome and result of one job"""
+        from jobs import JOB_TYPES, STATUS_LABELS
+        
+        job = queue.get(job_id) if job_id else None
+        if not job:
+            print("Tarefa não encontrada!")
+            self.wait_for_enter()
+            return
+        
+        self.clear_screen()
+        self.print_header(f"TAREFA {job['id']}")
+        print(f"Tipo: {JOB_TYPES[job['kind']][1] if job['kind'] in JOB_TYPES else job['kind']}")
+        print(f"Status: {STATUS_LABELS[job['status']]} ({job['progress'] * 100:.0f}%)")
+        print(f"Prioridade: {job['priority']}")
+        print(f"Tentativas: {job['attempts']} de {job['max_attempts']}")
+        print(f"Criada em: {job['created_at']}")
+        print(f"Iniciada em: {job['started_at'] or '-'}")
+        print(f"Terminada em: {job['finished_at'] or '-'}")
+        for key, value in job['params'].items():
+            print(f"Parâmetro {key}: {value}")
+        if job['error']:
+            print(f"Erro: {job['error']}")
+        if job['message']:
+            print(f"Situação: {job['message']}")
+        
+        result = job['result']
+        if result is not None:
+            print()
+            if job['kind'] == 'report':
+                self.print_revenue_table(result)
+            else:
+                for key, value in result.items():
+                    print(f"{key}: {value}")
+        self.wait_for_enter()
+    
+    def inventory_valuation_report(self):
+        """Inventory value at list prices and at model-suggested prices"""
+        from pricing import MIN_TRAINING_SALES
+        
+        self.clear_screen()
+        self.print_header("AVALIAÇÃO DO ESTOQUE")
+        
+        valuation = self.pricing_engine().inventory_valuation()
+        if not valuation['model_ready']:
+            print(f"Modelo de preços ainda sem dados suficientes ({valuation['training_sales']} de "
+                  f"{MIN_TRAINING_SALES} vendas); valores sugeridos iguais aos de tabela.\n")
+        
+        print(f"{'Marca':<15} {'Qtd':>5} {'Valor de Tabela':>18} {'Valor Sugerido':>18}")
+        print("-" * 59)
+        for brand, totals in sorted(valuation['by_brand'].items()):
+            print(f"{brand:<15} {totals['count']:>5} R${totals['list_value']:>16,.2f} "
+                  f"R${totals['suggested_value']:>16,.2f}")
+        print("-" * 59)
+        print(f"{'TOTAL':<15} {valuation['count']:>5} R${valuation['list_value']:>16,.2f} "
+              f"R${valuation['suggested_value']:>16,.2f}")
+        
+        self.wait_for_enter()
+    
+    def query_performance_report(self):
+        """Show query instrumentation statistics"""
+        self.clear_screen()
+        self.print_header("DESEMPENHO DE CONSULTAS")
+        
+        instrumentation = self.db.instrumentation
+        if instrumentation is None:
+            print("A instrumentação de consultas está desativada.")
+            confirm = self.get_input("Ativar agora? (s/N)", str, False)
+            if confirm and confirm.lower() == 's':
+                threshold = self.get_input("Limite para consulta lenta em ms (padrão 100)", float, False)
+                self.db.enable_instrumentation(threshold if threshold is not None else 100.0)
+                print("Instrumentação ativada. Use o sistema e volte a este relatório.")
+            self.wait_for_enter()
+            return
+        
+        print(instrumentation.format_report())
+        print()
+        
+        path = self.get_input("Salvar relatório em JSON (caminho, Enter para pular)", str, False)
+        if path:
+            try:
+                instrumentation.dump_json(path)
+                print(f"Relatório salvo em {path}")
+            except OSError as e:
+                print(f"Erro ao salvar relatório: {e}")
+        
+        confirm = self.get_input("Zerar estatísticas? (s/N)", str, False)
+        if confirm and confirm.lower() == 's':
+            instrumentation.reset()
+            print("Estatísticas zeradas.")
+        
+        self.wait_for_enter()
+    
     def search_vehicles(self):
         """Search vehicles"""
         self.clear_screen()
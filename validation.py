@@ -0,0 +1,263 @@
+"""
+Validation and normalization of everything written to the database.
+
+DatabaseManager, the dialogs, the terminal prompts and batch imports all
+go through the rules below, so stored values are always canonical: CPFs
+with a valid checksum as 000.000.000-00 (empty CPFs as NULL), emails in
+lower case, phones as (DD) NNNNN-NNNN, and vehicle status, fuel type,
+transmission and payment method from fixed lists. The lookup indexes
+hold these canonical forms, so a search never misses a row because of
+punctuation or case.
+
+validate_batch checks an import a column at a time: each column is
+normalized with one map() over its values, and only a column that has
+errors is walked value by value to report them per row.
+"""
+
+import math
+import re
+from datetime import date
+from operator import mul
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from normalization import digits_only, phone_key
+
+VEHICLE_STATUSES = ('Available', 'Sold')
+FUEL_TYPES = ('Gasoline', 'Flex', 'Diesel', 'Electric', 'Hybrid')
+TRANSMISSIONS = ('Manual', 'Automatic', 'CVT')
+PAYMENT_METHODS = ('Cash', 'Credit Card', 'Debit Card', 'Bank Transfer', 'Financing')
+
+MIN_YEAR = 1900
+# Next year's models are sold from the middle of this year
+MAX_YEAR = date.today().year + 1
+
+_EMAIL = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s.]+')
+_FORMATTED_CPF = re.compile(r'\d{3}\.\d{3}\.\d{3}-\d{2}')
+_FORMATTED_PHONE = re.compile(r'\([1-9]\d\) \d{4,5}-\d{4}')
+_CPF_WEIGHTS = (tuple(range(10, 1, -1)), tuple(range(11, 1, -1)))
+
+class ValidationError(ValueError):
+    """Invalid data; ``errors`` maps each offending field to its message"""
+    
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        super().__init__('; '.join(errors.values()))
+
+def cpf_check_digits(base: str) -> str:
+    """The two check digits of a CPF whose first nine digits are ``base``"""
+    digits = list(map(int, base))
+    for weights in _CPF_WEIGHTS:
+        digits.append(sum(map(mul, digits, weights)) * 10 % 11 % 10)
+    return f'{digits[9]}{digits[10]}'
+
+def _cpf_checksum_matches(cpf: str) -> bool:
+    """Whether a CPF formatted as 000.000.000-00 ends in its check digits"""
+    digits = cpf[:3] + cpf[4:7] + cpf[8:11]
+    return cpf_check_digits(digits) == cpf[12:]
+
+def normalize_cpf(value) -> str:
+    """CPF as 000.000.000-00, or None when empty; raises ValueError on a bad checksum"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    if _FORMATTED_CPF.fullmatch(value):
+        cpf = value
+    else:
+        digits = digits_only(value)
+        if len(digits) != 11:
+            raise ValueError(f"CPF inválido: {value}")
+        cpf = f'{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}'
+    # Repeated digits (000.000.000-00, ...) pass the checksum but are not issued
+    if cpf.count(cpf[0]) == 11 or not _cpf_checksum_matches(cpf):
+        raise ValueError(f"CPF inválido: {value}")
+    return cpf
+
+def normalize_email(value) -> str:
+    email = str(value or '').strip().lower()
+    if not email:
+        raise ValueError("campo obrigatório: email")
+    if not _EMAIL.fullmatch(email):
+        raise ValueError(f"email inválido: {value}")
+    return email
+
+def normalize_phone(value) -> str:
+    """Phone as (DD) NNNNN-NNNN (mobile) or (DD) NNNN-NNNN, from any punctuation"""
+    text = str(value or '').strip()
+    if _FORMATTED_PHONE.fullmatch(text):
+        return text
+    digits = phone_key(text)
+    if not digits:
+        raise ValueError("campo obrigatório: telefone")
+    if len(digits) not in (10, 11) or digits[0] == '0':
+        raise ValueError(f"telefone inválido: {value} (use DDD e número)")
+    return f'({digits[:2]}) {digits[2:-4]}-{digits[-4:]}'
+
+def required_text(label: str) -> Callable:
+    def normalize(value) -> str:
+        text = str(value if value is not None else '').strip()
+        if not text:
+            raise ValueError(f"campo obrigatório: {label}")
+        return text
+    return normalize
+
+def optional_text(value) -> str:
+    return str(value).strip() if value is not None else ''
+
+def choice(label: str, choices: Sequence[str]) -> Callable:
+    """Normalizer accepting one of ``choices`` in any case"""
+    canonical = {option.casefold(): option for option in choices}
+    
+    def normalize(value) -> str:
+        try:
+            return canonical[str(value).strip().casefold()]
+        except KeyError:
+            raise ValueError(f"valor inválido para {label}: {value} (use {', '.join(choices)})") from None
+    return normalize
+
+def number(label: str, value_type: type = float, minimum: float = None, maximum: float = None,
+           exclusive_minimum: bool = False) -> Callable:
+    """Normalizer for a number in a range; text is accepted, with a decimal comma too"""
+    def normalize(value):
+        try:
+            if isinstance(value, str):
+                value = value.strip().replace(',', '.') if value_type is float else value.strip()
+            result = value_type(value)
+            # int() truncates: 2022.9 must not be stored as 2022
+            if value_type is int and not isinstance(value, str) and result != value:
+                raise ValueError(value)
+            # 'nan' slips past every range check (nan <= 0 is False); SQLite stores it as NULL
+            if not math.isfinite(result):
+                raise ValueError(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"valor inválido para {label}: {value}") from None
+        if minimum is not None and (result <= minimum if exclusive_minimum else result < minimum):
+            raise ValueError(f"{label} deve ser maior que {minimum:g}" if exclusive_minimum
+                             else f"{label} deve ser no mínimo {minimum:g}")
+        if maximum is not None and result > maximum:
+            raise ValueError(f"{label} deve estar entre {minimum:g} e {maximum:g}")
+        return result
+    return normalize
+
+# Table -> column -> normalizer. Columns not listed are written as given.
+SCHEMAS = {
+    'vehicles': {
+        'brand': required_text("marca"),
+        'model': required_text("modelo"),
+        'year': number("ano", int, MIN_YEAR, MAX_YEAR),
+        'color': required_text("cor"),
+        'price': number("preço", float, 0, exclusive_minimum=True),
+        'mileage': number("quilometragem", int, 0),
+        'fuel_type': choice("combustível", FUEL_TYPES),
+        'transmission': choice("câmbio", TRANSMISSIONS),
+        'status': choice("status", VEHICLE_STATUSES),
+    },
+    'customers': {
+        'name': required_text("nome"),
+        'email': normalize_email,
+        'phone': normalize_phone,
+        'address': optional_text,
+        'cpf': normalize_cpf,
+    },
+    'employees': {
+        'name': required_text("nome"),
+        'email': normalize_email,
+        'position': required_text("cargo"),
+        'salary': number("salário", float, 0),
+    },
+    'sales': {
+        'sale_price': number("preço", float, 0, exclusive_minimum=True),
+        'payment_method': choice("forma de pagamento", PAYMENT_METHODS),
+        'notes': optional_text,
+    },
+}
+
+# Columns a new row must have (the others fall back to the table defaults)
+REQUIRED_COLUMNS = {
+    'vehicles': ('brand', 'model', 'year', 'color', 'price'),
+    'customers': ('name', 'email', 'phone'),
+    'employees': ('name', 'email', 'position'),
+    'sales': ('sale_price',),
+}
+
+# UNIQUE columns; a batch may not repeat a value (NULLs excepted)
+UNIQUE_COLUMNS = {'customers': ('email', 'cpf'), 'employees': ('email',)}
+
+def validate(table: str, data: Dict, partial: bool = False) -> Dict:
+    """Normalized copy of one row of ``table``; raises ValidationError with every problem.
+    
+    With ``partial`` (an update) only the columns present are checked;
+    otherwise the required columns must be present too.
+    """
+    schema = SCHEMAS[table]
+    errors = {}
+    cleaned = dict(data)
+    if not partial:
+        for column in REQUIRED_COLUMNS[table]:
+            if data.get(column) is None:
+                cleaned[column] = None
+    for column, value in cleaned.items():
+        normalize = schema.get(column)
+        if normalize is None:
+            continue
+        try:
+            cleaned[column] = normalize(value)
+        except ValueError as e:
+            errors[column] = str(e)
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+def validate_batch(table: str, columns: Sequence[str],
+                   rows: Sequence[Sequence]) -> Tuple[List[tuple], List[int], List[Tuple[int, str, str]]]:
+    """Validate many rows of ``table`` given as sequences in ``columns`` order.
+    
+    Returns the normalized valid rows, their indexes in ``rows`` and the
+    errors as (row index, column, message), in row order. Raises
+    ValueError if a required column is missing from ``columns``.
+    """
+    schema = SCHEMAS[table]
+    missing = [column for column in REQUIRED_COLUMNS[table] if column not in columns]
+    if missing:
+        raise ValueError(f"colunas obrigatórias ausentes: {', '.join(missing)}")
+    
+    errors = []
+    normalized = []
+    for position, column in enumerate(columns):
+        values = [row[position] for row in rows]
+        normalize = schema.get(column)
+        if normalize is None:
+            normalized.append(values)
+            continue
+        try:
+            normalized.append(list(map(normalize, values)))
+            continue
+        except ValueError:
+            pass
+        cleaned = []
+        for index, value in enumerate(values):
+            try:
+                cleaned.append(normalize(value))
+            except ValueError as e:
+                cleaned.append(None)
+                errors.append((index, column, str(e)))
+        normalized.append(cleaned)
+    
+    for column in UNIQUE_COLUMNS.get(table, ()):
+        if column not in columns:
+            continue
+        seen = set()
+        failed = {index for index, _, _ in errors}
+        for index, value in enumerate(normalized[columns.index(column)]):
+            if value is None or index in failed:
+                continue
+            if value in seen:
+                errors.append((index, column, f"{column} repetido no lote: {value}"))
+            seen.add(value)
+    
+    errors.sort(key=lambda error: error[0])
+    failed = {index for index, _, _ in errors}
+    valid_indexes = [index for index in range(len(rows)) if index not in failed]
+    all_rows = list(zip(*normalized)) if normalized else [()] * len(rows)
+    return [all_rows[index] for index in valid_indexes], valid_indexes, errors